@@ -0,0 +1,209 @@
+"""Admission control for expensive parking endpoints.
+
+Path finding, nearest-lot search and forecasting can each load the road
+graph, run many A* searches or fit models. Requests to those endpoints pass
+through three checks before reaching the handler:
+
+- a token bucket per client (user ID from the bearer token, else the client
+  IP) and endpoint group,
+- a concurrency cap per endpoint group, with a bounded queue behind it,
+- load shedding, which rejects a queued request once it has waited longer
+  than the group's latency target.
+
+Rate-limited requests get 429 and shed requests 503, both with Retry-After.
+Other endpoints are not affected.
+
+Behind a reverse proxy every connection comes from the proxy, so the client
+IP is only trusted as configured by TRUSTED_PROXY_HOPS:
+
+- unset (the default): anonymous requests are not rate limited, only capped
+  and queued; bearer-token requests are still limited per user,
+- ``0``: the connection address is the client (no proxy, or the server
+  already resolves proxy headers, e.g. uvicorn ``--forwarded-allow-ips``),
+- ``N``: N trusted proxies each append to X-Forwarded-For; the client is
+  the Nth address from the right (1 on Render).
+"""
+import asyncio
+import math
+import os
+import time
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+import token_service
+
+ADMISSION_CONTROL_ENABLED = os.environ.get("ADMISSION_CONTROL_ENABLED", "1") == "1"
+TRUSTED_PROXY_HOPS = (
+    int(os.environ["TRUSTED_PROXY_HOPS"]) if os.environ.get("TRUSTED_PROXY_HOPS", "") != "" else None
+)
+
+_MAX_CLIENT_BUCKETS = 10000
+
+
+class EndpointPolicy:
+    def __init__(
+        self,
+        name: str,
+        prefixes,
+        rate: float,
+        burst: int,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+    ):
+        self.name = name
+        self.prefixes = tuple(prefixes)
+        self.rate = rate  # requests per second per client
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout  # seconds
+
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+        self._semaphore = None
+        self._loop = None
+        self._buckets: Dict[str, list] = {}
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    def take_token(self, client: str) -> float:
+        """Consume a token for the client; return 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= _MAX_CLIENT_BUCKETS:
+                self._buckets.clear()
+            bucket = self._buckets[client] = [float(self.burst), now]
+
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / self.rate
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "shed": self.shed,
+        }
+
+
+POLICIES = [
+    EndpointPolicy("nearest", ["/parking/nearest"], rate=1, burst=5, max_concurrency=4, max_queue=16, queue_timeout=2.0),
+    EndpointPolicy("path", ["/parking/path"], rate=1, burst=5, max_concurrency=4, max_queue=16, queue_timeout=2.0),
+    EndpointPolicy(
+        "forecast",
+        ["/parking/forecast", "/parking/best-time", "/parking/daily-pattern",
+         "/parking/weekly-pattern", "/parking/time-breakdown"],
+        rate=5, burst=20, max_concurrency=8, max_queue=32, queue_timeout=1.0,
+    ),
+]
+
+
+def _policy_for(path: str) -> Optional[EndpointPolicy]:
+    for policy in POLICIES:
+        if path.startswith(policy.prefixes):
+            return policy
+    return None
+
+
+def _client_ip(request: Request) -> Optional[str]:
+    if TRUSTED_PROXY_HOPS is None:
+        return None
+    if TRUSTED_PROXY_HOPS > 0:
+        forwarded = [
+            address.strip()
+            for header in request.headers.getlist("X-Forwarded-For")
+            for address in header.split(",")
+            if address.strip()
+        ]
+        # Addresses left of the trusted hops are client-supplied and can be forged
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else None
+
+
+def _client_key(request: Request) -> Optional[str]:
+    """Rate-limit key for the request, or None when the client cannot be told apart."""
+    authorization = request.headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        try:
+            return f"user:{token_service.decode_access_token(authorization[7:])['user_id']}"
+        except Exception:
+            pass
+    client_ip = _client_ip(request)
+    return f"ip:{client_ip}" if client_ip else None
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+async def admission_middleware(request: Request, call_next):
+    policy = _policy_for(request.url.path) if ADMISSION_CONTROL_ENABLED else None
+    if policy is None:
+        return await call_next(request)
+
+    client = _client_key(request)
+    wait = policy.take_token(client) if client is not None else 0.0
+    if wait > 0:
+        policy.rate_limited += 1
+        return _reject(429, "Rate limit exceeded", wait)
+
+    if policy.queued >= policy.max_queue:
+        policy.shed += 1
+        return _reject(503, "Server busy, try again shortly", policy.queue_timeout)
+
+    policy.queued += 1
+    acquired = False
+    try:
+        async with asyncio.timeout(policy.queue_timeout):
+            await policy.semaphore.acquire()
+            acquired = True
+    except TimeoutError:
+        # The deadline can land just after the permit was handed over
+        if acquired:
+            policy.semaphore.release()
+        policy.shed += 1
+        return _reject(503, "Server busy, try again shortly", policy.queue_timeout)
+    finally:
+        policy.queued -= 1
+
+    policy.in_flight += 1
+    policy.admitted += 1
+    try:
+        return await call_next(request)
+    finally:
+        policy.in_flight -= 1
+        policy.semaphore.release()
+
+
+def stats() -> Dict:
+    return {
+        "enabled": ADMISSION_CONTROL_ENABLED,
+        "endpoints": {policy.name: policy.stats() for policy in POLICIES},
+    }
@@ -0,0 +1,134 @@
+"""Stateless access-token claims and user revocation tracking.
+
+Access tokens carry the user's role and account status, so authenticated
+requests are authorized from the token alone without reading the users
+table. When a user is changed or deleted, the moment is recorded as a
+revocation and every token issued before it is rejected. Revocations live in
+a small in-memory TTL cache and are mirrored to the user_revocations table,
+which each worker re-reads every few seconds to pick up changes made by the
+others.
+
+Refresh tokens are rotated: the jti of each one is recorded in
+used_refresh_tokens when it is exchanged, and presenting it again revokes
+the user, since only a stolen copy would be replayed.
+
+Admin checks use an in-process set of admin user IDs, loaded at startup,
+refreshed after changes and re-read periodically, rather than querying the
+administrators table on each request.
+"""
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from db_manager import execute_query, execute_transaction, execute_write_query
+import token_service
+
+ROLE_ADMIN = "admin"
+ROLE_USER = "user"
+
+# As long as any access or refresh token lives, so an expired revocation can no longer match a valid token
+_REVOCATION_TTL = token_service.MAX_TOKEN_LIFETIME  # seconds
+_REVOCATION_SYNC_INTERVAL = 5  # seconds
+_ADMIN_SYNC_INTERVAL = 30  # seconds
+
+_revoked_at: Dict[int, float] = {}
+_revocation_lock = threading.Lock()
+_last_revocation_sync = 0.0
+
+_admin_ids = frozenset()
+_last_admin_sync = 0.0
+
+
+def build_claims(user: Mapping, is_admin: bool) -> Dict[str, Any]:
+    return {
+        "sub": user["email"],
+        "user_id": user["userID"],
+        "role": ROLE_ADMIN if is_admin else ROLE_USER,
+        "status": user["status"],
+        "iat": time.time(),
+    }
+
+
+def principal_from_claims(payload: Mapping) -> Optional[Dict[str, Any]]:
+    """Build the current user from token claims, or None for tokens issued without them."""
+    if "role" not in payload or "iat" not in payload:
+        return None
+    return {
+        "userID": payload["user_id"],
+        "email": payload["sub"],
+        "role": payload["role"],
+        "status": payload.get("status"),
+    }
+
+
+def revoke_user(user_id: int) -> None:
+    revoked_at = time.time()
+    with _revocation_lock:
+        _revoked_at[user_id] = revoked_at
+    execute_write_query(
+        "INSERT OR REPLACE INTO user_revocations (userID, revokedAt) VALUES (?, ?)",
+        (user_id, revoked_at),
+    )
+
+
+def _sync_revocations() -> None:
+    global _last_revocation_sync
+
+    now = time.time()
+    if now - _last_revocation_sync < _REVOCATION_SYNC_INTERVAL:
+        return
+    _last_revocation_sync = now
+
+    try:
+        rows = execute_query(
+            "SELECT userID, revokedAt FROM user_revocations WHERE revokedAt > ?",
+            (now - _REVOCATION_TTL,),
+        )
+    except Exception as e:
+        print(f"Error syncing user revocations: {e}")
+        return
+
+    with _revocation_lock:
+        for user_id in [u for u, t in _revoked_at.items() if t <= now - _REVOCATION_TTL]:
+            del _revoked_at[user_id]
+        for row in rows:
+            _revoked_at[row["userID"]] = max(_revoked_at.get(row["userID"], 0.0), row["revokedAt"])
+
+
+def is_revoked(user_id: int, issued_at: float) -> bool:
+    _sync_revocations()
+    revoked_at = _revoked_at.get(user_id)
+    return revoked_at is not None and issued_at <= revoked_at
+
+
+def use_refresh_token(user_id: int, jti: str, expires_at: float) -> bool:
+    """Spend a refresh token; False, and the user revoked, if it was already used."""
+    try:
+        execute_transaction([
+            ("DELETE FROM used_refresh_tokens WHERE expiresAt <= ?", (time.time(),)),
+            ("INSERT INTO used_refresh_tokens (jti, userID, expiresAt) VALUES (?, ?, ?)", (jti, user_id, expires_at)),
+        ])
+    except sqlite3.IntegrityError:
+        print(f"Refresh token reused for user {user_id}, revoking their tokens")
+        revoke_user(user_id)
+        return False
+    return True
+
+
+def refresh_admin_ids() -> None:
+    global _admin_ids, _last_admin_sync
+
+    try:
+        rows = execute_query("SELECT userID FROM administrators")
+    except Exception as e:
+        print(f"Error loading administrators: {e}")
+        return
+    _admin_ids = frozenset(row["userID"] for row in rows)
+    _last_admin_sync = time.time()
+
+
+def is_admin(user_id: int) -> bool:
+    if time.time() - _last_admin_sync >= _ADMIN_SYNC_INTERVAL:
+        refresh_admin_ids()
+    return user_id in _admin_ids
@@ -0,0 +1,152 @@
+"""Push lot availability changes to clients over Server-Sent Events.
+
+Reservation create/cancel call ``publish`` after commit, which wakes the
+single broadcaster task right away to push the lots they touched. Changes
+committed by other workers never reach this process's ``publish``, so the
+broadcaster also checks the whole live-status snapshot every STREAM_TICK
+seconds. Reservations that land while a push is being built are coalesced
+into the next one. Each subscriber gets the full list of lots when it
+connects, then only the changed lots.
+"""
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+import campus_index
+import live_status
+
+STREAM_TICK = float(os.environ.get("STREAM_TICK", 0.5))  # seconds
+_HEARTBEAT_INTERVAL = 15  # seconds
+_SUBSCRIBER_QUEUE_SIZE = 32
+
+_STATUS_FIELDS = ("totalSpots", "occupiedSpots", "availableSpots", "status")
+
+
+class Subscriber:
+    def __init__(self, campus: Optional[str] = None):
+        self.campus = campus
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=_SUBSCRIBER_QUEUE_SIZE)
+
+    def filter(self, lots: List[Dict]) -> List[Dict]:
+        if self.campus is None:
+            return lots
+        lot_ids = set(campus_index.lot_ids(self.campus))
+        return [lot for lot in lots if lot["parkingLotID"] in lot_ids]
+
+    def push(self, event: str, lots: List[Dict]) -> None:
+        lots = self.filter(lots)
+        if not lots:
+            return
+        if self.queue.full():
+            # A slow client missed updates; replace its backlog with a full resync
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event, lots = "snapshot", self.filter(live_status.get_snapshot().lots)
+        self.queue.put_nowait((event, lots))
+
+
+_subscribers: Set[Subscriber] = set()
+_last_sent: Dict[int, tuple] = {}
+_last_snapshot = None
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_wakeup: Optional[asyncio.Event] = None
+_published: Set[int] = set()
+
+
+def subscriber_count() -> int:
+    return len(_subscribers)
+
+
+def _mark_published(lot_id: int) -> None:
+    _published.add(lot_id)
+    _wakeup.set()
+
+
+def publish(lot_id: int) -> None:
+    """Push a lot's new availability to subscribers; call after commit.
+
+    Safe to call from request threads; does nothing before the broadcaster runs.
+    """
+    if _loop is None or not _subscribers:
+        return
+    try:
+        _loop.call_soon_threadsafe(_mark_published, lot_id)
+    except RuntimeError:
+        # Event loop already closed during shutdown
+        pass
+
+
+def _changed_lots(snapshot, lot_ids: Optional[Set[int]] = None) -> List[Dict]:
+    if lot_ids is None:
+        lots = snapshot.lots
+    else:
+        lots = [snapshot.lots_by_id[lot_id] for lot_id in lot_ids if lot_id in snapshot.lots_by_id]
+    changed = []
+    for lot in lots:
+        key = tuple(lot[field] for field in _STATUS_FIELDS)
+        if _last_sent.get(lot["parkingLotID"]) != key:
+            _last_sent[lot["parkingLotID"]] = key
+            changed.append(lot)
+    return changed
+
+
+async def run_broadcaster(tick: float = STREAM_TICK):
+    global _last_snapshot, _loop, _wakeup
+
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+    while True:
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=tick)
+            # Published lots only; the next tick still diffs every lot
+            lot_ids = set(_published)
+        except asyncio.TimeoutError:
+            lot_ids = None
+        _wakeup.clear()
+        _published.clear()
+        if not _subscribers:
+            continue
+        try:
+            snapshot = await asyncio.to_thread(live_status.get_snapshot)
+        except Exception as e:
+            print(f"Error reading live status for stream: {e}")
+            continue
+        if lot_ids is None and snapshot is _last_snapshot:
+            continue
+
+        if _last_snapshot is None:
+            # First snapshot only records what subscribers got on connect
+            _changed_lots(snapshot)
+            _last_snapshot = snapshot
+            continue
+        changed = _changed_lots(snapshot, lot_ids)
+        if lot_ids is None:
+            # Only a full diff covers changes other workers made
+            _last_snapshot = snapshot
+        if changed:
+            for subscriber in list(_subscribers):
+                subscriber.push("update", changed)
+
+
+def _format_event(event: str, lots: List[Dict]) -> str:
+    return f"event: {event}\ndata: {json.dumps(lots, separators=(',', ':'))}\n\n"
+
+
+async def stream_events(campus: Optional[str] = None) -> AsyncIterator[str]:
+    subscriber = Subscriber(campus)
+    _subscribers.add(subscriber)
+    try:
+        snapshot = await asyncio.to_thread(live_status.get_snapshot)
+        yield _format_event("snapshot", subscriber.filter(snapshot.lots))
+        while True:
+            try:
+                event, lots = await asyncio.wait_for(subscriber.queue.get(), timeout=_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            yield _format_event(event, lots)
+    finally:
+        _subscribers.discard(subscriber)
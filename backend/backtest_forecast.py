@@ -0,0 +1,134 @@
+"""Backtest forecasting backends against recorded reservation history.
+
+Each backend is fitted on history before a cutoff and asked to forecast the
+holdout window after it. Accuracy (MAE/RMSE of hourly reservations relative
+to capacity) and fit/forecast latency are reported per backend.
+
+    python backtest_forecast.py --holdout-hours 48 --backends arima seasonal
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import tabulate as tabulate_module
+
+import forecasting
+from db_manager import execute_query
+
+
+def _actual_rates(
+    lot_ids: List[int], start: datetime, hours: int, capacities: Dict[int, Dict]
+) -> np.ndarray:
+    placeholders = ", ".join("?" for _ in lot_ids)
+    query = f"""
+    SELECT
+        parkingLotID,
+        strftime('%Y-%m-%d %H', startTime) as hour,
+        COUNT(*) as reservation_count
+    FROM
+        reservations
+    WHERE
+        parkingLotID IN ({placeholders}) AND
+        startTime >= ? AND
+        startTime < ? AND
+        reservationStatus IN ('Completed', 'Pending')
+    GROUP BY
+        parkingLotID, hour
+    """
+    end = start + timedelta(hours=hours)
+    rows = execute_query(query, tuple(lot_ids) + (start.isoformat(), end.isoformat()))
+
+    row_index = {lot_id: row for row, lot_id in enumerate(lot_ids)}
+    actual = np.zeros((len(lot_ids), hours))
+    for r in rows:
+        hour = int((datetime.strptime(r["hour"], "%Y-%m-%d %H") - start).total_seconds() // 3600)
+        capacity = max(1, capacities[r["parkingLotID"]]["capacity"])
+        actual[row_index[r["parkingLotID"]], hour] = r["reservation_count"] / capacity
+    return actual
+
+
+def _create_backend(name: str) -> forecasting.Forecaster:
+    if name == forecasting.ArimaForecaster.name:
+        # Private model dict so the backtest never touches the shared model store
+        return forecasting.ArimaForecaster(models={}, persist=False)
+    return forecasting.FORECASTER_BACKENDS[name]()
+
+
+def run_backtest(
+    lot_ids: Optional[List[int]] = None,
+    holdout_hours: int = 48,
+    backends: Optional[List[str]] = None,
+) -> Dict:
+    backends = backends or list(forecasting.FORECASTER_BACKENDS)
+    capacities = forecasting._get_bulk_capacity(lot_ids)
+    lot_ids = [lot_id for lot_id in (lot_ids or capacities) if lot_id in capacities]
+    if not lot_ids:
+        return {"lots": [], "backends": {}}
+
+    cutoff = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=holdout_hours)
+
+    # Occupancy at the cutoff is approximated by the reservations in the hour before it
+    previous_hour = _actual_rates(lot_ids, cutoff - timedelta(hours=1), 1, capacities)[:, 0]
+    cutoff_capacities = {
+        lot_id: {
+            "capacity": capacities[lot_id]["capacity"],
+            "reserved_slots": round(previous_hour[row] * capacities[lot_id]["capacity"]),
+        }
+        for row, lot_id in enumerate(lot_ids)
+    }
+    actual = _actual_rates(lot_ids, cutoff, holdout_hours, capacities)
+
+    report = {"lots": lot_ids, "cutoff": cutoff.isoformat(), "holdout_hours": holdout_hours, "backends": {}}
+    for name in backends:
+        backend = _create_backend(name)
+
+        started = time.perf_counter()
+        backend.fit(lot_ids, cutoff_capacities, until=cutoff)
+        fit_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        predicted = backend.forecast(lot_ids, cutoff, holdout_hours, cutoff_capacities)
+        forecast_seconds = time.perf_counter() - started
+
+        errors = predicted - actual
+        report["backends"][name] = {
+            "mae": float(np.mean(np.abs(errors))),
+            "rmse": float(np.sqrt(np.mean(errors ** 2))),
+            "fit_ms": round(fit_seconds * 1000, 2),
+            "forecast_ms": round(forecast_seconds * 1000, 2),
+            "forecast_ms_per_lot": round(forecast_seconds * 1000 / len(lot_ids), 4),
+            "mae_per_lot": dict(zip(lot_ids, np.mean(np.abs(errors), axis=1).round(5).tolist())),
+        }
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest parking forecasting backends")
+    parser.add_argument("--lots", type=int, nargs="*", help="Parking lot IDs (default: all)")
+    parser.add_argument("--holdout-hours", type=int, default=48, help="Hours held out after the cutoff")
+    parser.add_argument("--backends", nargs="*", choices=list(forecasting.FORECASTER_BACKENDS))
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    report = run_backtest(args.lots, args.holdout_hours, args.backends)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    rows = [
+        [name, f"{r['mae']:.5f}", f"{r['rmse']:.5f}", r["fit_ms"], r["forecast_ms"], r["forecast_ms_per_lot"]]
+        for name, r in report["backends"].items()
+    ]
+    print(f"Backtest over {len(report['lots'])} lots, {args.holdout_hours}h holdout")
+    print(tabulate_module.tabulate(
+        rows, headers=["Backend", "MAE", "RMSE", "Fit (ms)", "Forecast (ms)", "Per lot (ms)"]
+    ))
+
+
+if __name__ == "__main__":
+    main()
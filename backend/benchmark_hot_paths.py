@@ -0,0 +1,399 @@
+"""Micro-benchmarks for the pathfinder and forecasting hot paths.
+
+Runs offline against synthetic fixtures: a grid road graph and square lot
+polygons stand in for the OpenStreetMap download and polygon.parquet, and a
+temporary database is filled with a generated reservation history at each
+requested size. Every case records mean/min/p95 time and the peak memory
+traced during one extra run. Results are appended to a JSON-lines history
+file and compared with the last entry recorded with the same graph size,
+lot count and repeat count, so a regression shows up as a percentage change
+against the last comparable run.
+
+    python benchmark_hot_paths.py --sizes 10000,100000,1000000 --repeat 5
+    python benchmark_hot_paths.py --sizes 10000 --fail-on-regression
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import tabulate as tabulate_module
+
+# Campus bounding box the synthetic grid is laid over
+_LAT_RANGE = (40.900, 40.920)
+_LNG_RANGE = (-73.135, -73.110)
+_METERS_PER_DEGREE = 111_000
+_GRID_NODE_OFFSET = 10_000_000  # keeps grid node IDs clear of the polygon index
+_INSERT_CHUNK = 50_000
+
+
+# ---------------------- Fixtures ---------------------- #
+def synthetic_road_graph(size: int = 60):
+    """A size x size street grid shaped like osmnx's graph_from_bbox output."""
+    import networkx as nx
+
+    graph = nx.MultiDiGraph(crs="EPSG:4326")
+    lat_step = (_LAT_RANGE[1] - _LAT_RANGE[0]) / (size - 1)
+    lng_step = (_LNG_RANGE[1] - _LNG_RANGE[0]) / (size - 1)
+
+    def node_id(row, col):
+        return _GRID_NODE_OFFSET + row * size + col
+
+    for row in range(size):
+        for col in range(size):
+            graph.add_node(node_id(row, col), y=_LAT_RANGE[0] + row * lat_step, x=_LNG_RANGE[0] + col * lng_step)
+
+    rng = random.Random(size)
+    for row in range(size):
+        for col in range(size):
+            for d_row, d_col, step in ((0, 1, lng_step), (1, 0, lat_step)):
+                if row + d_row < size and col + d_col < size:
+                    # Jittered lengths so A* has real choices to make
+                    length = step * _METERS_PER_DEGREE * rng.uniform(0.9, 1.3)
+                    u, v = node_id(row, col), node_id(row + d_row, col + d_col)
+                    graph.add_edge(u, v, length=length)
+                    graph.add_edge(v, u, length=length)
+    return graph
+
+
+def synthetic_polygons(lots: int = 40, seed: int = 416):
+    """Square lot polygons named "LOT n", with the columns _load_polygon_data adds."""
+    import geopandas as gpd
+    from shapely.geometry import Polygon
+
+    rng = random.Random(seed)
+    names, geometries = [], []
+    for i in range(1, lots + 1):
+        lat, lng = rng.uniform(*_LAT_RANGE), rng.uniform(*_LNG_RANGE)
+        half = 0.0004
+        names.append(f"LOT {i}")
+        geometries.append(Polygon([
+            (lng - half, lat - half), (lng + half, lat - half),
+            (lng + half, lat + half), (lng - half, lat + half),
+        ]))
+
+    gdf = gpd.GeoDataFrame({"Name": names}, geometry=geometries, crs="EPSG:4326")
+    gdf["centroid"] = gdf["geometry"].centroid
+    gdf["X"] = gdf["centroid"].x
+    gdf["Y"] = gdf["centroid"].y
+    return gdf
+
+
+def generate_reservations(lot_ids: List[int], user_ids: List[int], rows: int,
+                          days: int = 90, seed: int = 416) -> Iterator[tuple]:
+    """Yield reservation rows spread over the last ``days`` days, weighted towards weekday peaks."""
+    rng = random.Random(seed)
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    hours = list(range(24))
+    hour_weights = [1 if h < 7 or h > 20 else 6 if 8 <= h <= 11 else 4 for h in hours]
+    statuses = ["Completed"] * 8 + ["Pending", "Cancelled"]
+    for _ in range(rows):
+        day = now - timedelta(days=rng.randint(1, days))
+        start = day.replace(hour=rng.choices(hours, hour_weights)[0])
+        duration = rng.randint(1, 4)
+        yield (
+            rng.choice(lot_ids), rng.choice(user_ids), start.isoformat(),
+            (start + timedelta(hours=duration)).isoformat(), 2.0 * duration,
+            rng.choice(statuses), (start - timedelta(days=1)).isoformat(),
+        )
+
+
+def fill_reservations(db_path: str, rows: int, seed: int = 416) -> None:
+    """Replace the reservations table's contents with ``rows`` generated rows.
+
+    Stored forecast models were fitted on the old history, so they are dropped too.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        lot_ids = [r[0] for r in conn.execute("SELECT parkingLotID FROM parking_lots")]
+        user_ids = [r[0] for r in conn.execute("SELECT userID FROM users")]
+        conn.execute("DELETE FROM reservations")
+        conn.execute("DELETE FROM forecast_models")
+        chunk = []
+        for row in generate_reservations(lot_ids, user_ids, rows, seed=seed):
+            chunk.append(row)
+            if len(chunk) >= _INSERT_CHUNK:
+                _insert_reservations(conn, chunk)
+                chunk = []
+        if chunk:
+            _insert_reservations(conn, chunk)
+        conn.commit()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+
+def _insert_reservations(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+    conn.executemany(
+        """INSERT INTO reservations
+           (parkingLotID, userID, startTime, endTime, price, reservationStatus, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+
+
+def seed_database(db_path: str, lots: int, users: int = 200) -> None:
+    """Schema from main.init_db plus lots named to match synthetic_polygons."""
+    import main
+
+    main.init_db()
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO parking_lots (name, location, capacity, evSlots, reserved_slots, campus) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"Lot {i}", f"{i} Circle Road, West Campus", 400, 12, 100, "West Campus") for i in range(1, lots + 1)],
+    )
+    conn.executemany(
+        "INSERT INTO users (email, userName, password, userType, status) VALUES (?, ?, ?, ?, ?)",
+        [(f"bench{i}@stonybrook.edu", f"Bench {i}", "x", "Visitor", "approved") for i in range(users)],
+    )
+    conn.commit()
+    conn.close()
+
+
+@contextmanager
+def offline_graph(graphs: List, polygons):
+    """Serve pre-built graph copies in place of the OpenStreetMap download."""
+    import pathfinder
+
+    original_download = pathfinder.ox.graph_from_bbox
+    original_polygons = pathfinder._load_polygon_data
+    pathfinder.ox.graph_from_bbox = lambda bbox, network_type="drive": graphs.pop()
+    pathfinder._load_polygon_data = lambda: polygons.copy()
+    try:
+        yield
+    finally:
+        pathfinder.ox.graph_from_bbox = original_download
+        pathfinder._load_polygon_data = original_polygons
+
+
+# ---------------------- Measurement ---------------------- #
+def measure(func: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict:
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "min_ms": round(timings[0], 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def _pathfinder_cases(graph_size: int, lots: int, repeat: int,
+                      include_load: bool) -> List[Tuple[str, Callable, Optional[Callable]]]:
+    import pathfinder
+
+    base_graph = synthetic_road_graph(graph_size)
+    polygons = synthetic_polygons(lots)
+    # One copy for the warm cache below, plus one per timed run and the memory run
+    graphs = [base_graph.copy() for _ in range(repeat + 2 if include_load else 1)]
+    rng = random.Random(graph_size)
+
+    def reset_graph_cache():
+        pathfinder._graph_cache = None
+
+    def load_graph():
+        with offline_graph(graphs, polygons):
+            pathfinder._load_road_graph()
+
+    # Warm the caches the remaining cases read
+    reset_graph_cache()
+    load_graph()
+    pathfinder._polygon_gdf_cache = pathfinder._graph_cache[1]
+    pathfinder._last_cache_time = time.time()
+
+    def find_path():
+        pathfinder.find_path(rng.uniform(*_LAT_RANGE), rng.uniform(*_LNG_RANGE), rng.randint(1, lots))
+
+    def find_nearest():
+        pathfinder.find_nearest_available_lots(rng.uniform(*_LAT_RANGE), rng.uniform(*_LNG_RANGE), limit=5)
+
+    cases = [
+        ("pathfinder.find_path", find_path, None),
+        ("pathfinder.find_nearest_available_lots", find_nearest, None),
+    ]
+    if include_load:
+        cases.insert(0, ("pathfinder._load_road_graph", load_graph, reset_graph_cache))
+    return cases
+
+
+def _forecasting_cases(lots: int) -> List[Tuple[str, Callable, Optional[Callable]]]:
+    import forecasting
+
+    rng = random.Random(lots)
+
+    def clear_forecast_cache():
+        forecasting._forecast_cache.clear()
+
+    def forecast():
+        forecasting.get_parking_lot_forecast(rng.randint(1, lots), hours_ahead=12)
+
+    def daily_pattern():
+        forecasting.get_daily_pattern(rng.randint(1, lots), random_mode=False)
+
+    return [
+        ("forecasting.get_parking_lot_forecast", forecast, clear_forecast_cache),
+        ("forecasting.get_daily_pattern", daily_pattern, None),
+    ]
+
+
+def run_benchmarks(db_path: str, sizes: List[int], graph_size: int, lots: int, repeat: int) -> List[Dict]:
+    import forecasting
+    import pathfinder
+
+    seed_database(db_path, lots)
+    results = []
+    for rows in sizes:
+        print(f"Generating {rows} reservations...")
+        fill_reservations(db_path, rows)
+        # fill_reservations dropped the stored models; drop the in-memory ones
+        # too so every lot is refitted on this history size before timing
+        forecasting._arima_models.clear()
+        forecasting._forecast_cache.clear()
+        for lot_id in range(1, lots + 1):
+            forecasting._get_arima_model(lot_id)
+
+        # Building the graph doesn't read reservations, so it is only timed at the first size
+        cases = _pathfinder_cases(graph_size, lots, repeat, rows == sizes[0]) + _forecasting_cases(lots)
+        for name, func, setup in cases:
+            stats = measure(func, repeat, setup)
+            results.append({"case": name, "rows": rows, **stats})
+            print(f"  {name} ({rows} rows): {stats['mean_ms']} ms, peak {stats['peak_kb']} KB")
+
+    pathfinder._graph_cache = None
+    return results
+
+
+# ---------------------- History ---------------------- #
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).parent, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+_RUN_PARAMETERS = ("graph_size", "lots", "repeat")
+
+
+def _previous_run(history_path: Path, parameters: Dict) -> Optional[Dict]:
+    """The last recorded run with the same parameters; timings of other fixtures are not comparable."""
+    if not history_path.exists():
+        return None
+    for line in reversed(history_path.read_text().splitlines()):
+        if not line.strip():
+            continue
+        run = json.loads(line)
+        if all(run.get(name) == parameters[name] for name in _RUN_PARAMETERS):
+            return run
+    return None
+
+
+def compare(results: List[Dict], previous: Dict, threshold_pct: float) -> Tuple[List[List], bool]:
+    before = {(r["case"], r["rows"]): r for r in previous["results"]}
+    rows, regressed = [], False
+    for result in results:
+        old = before.get((result["case"], result["rows"]))
+        if old is None:
+            rows.append([result["case"], result["rows"], None, result["mean_ms"], None, None, result["peak_kb"], None, "new"])
+            continue
+        time_change = (result["mean_ms"] - old["mean_ms"]) / old["mean_ms"] * 100 if old["mean_ms"] else 0.0
+        memory_change = (result["peak_kb"] - old["peak_kb"]) / old["peak_kb"] * 100 if old["peak_kb"] else 0.0
+        verdict = "ok"
+        if time_change > threshold_pct or memory_change > threshold_pct:
+            verdict = "REGRESSION"
+            regressed = True
+        elif time_change < -threshold_pct:
+            verdict = "faster"
+        rows.append([result["case"], result["rows"], old["mean_ms"], result["mean_ms"], round(time_change, 1),
+                     old["peak_kb"], result["peak_kb"], round(memory_change, 1), verdict])
+    return rows, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pathfinder and forecasting hot functions offline")
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="Comma-separated reservation history sizes")
+    parser.add_argument("--graph-size", type=int, default=60, help="Synthetic road grid is N x N intersections")
+    parser.add_argument("--lots", type=int, default=40, help="Synthetic parking lots")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--history", default=str(Path(__file__).parent / "benchmark_history.jsonl"),
+                        help="JSON-lines file runs are appended to and compared against")
+    parser.add_argument("--threshold", type=float, default=15,
+                        help="Percent slowdown or memory growth counted as a regression")
+    parser.add_argument("--no-record", action="store_true", help="Compare only, don't append to the history")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if any case regressed against the previous run")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        # Must be set before db_manager is imported
+        db_path = os.path.join(tmp, "parking.db")
+        os.environ["DATABASE"] = db_path
+        results = run_benchmarks(db_path, sizes, args.graph_size, args.lots, args.repeat)
+
+    print(tabulate_module.tabulate(
+        [[r["case"], r["rows"], r["mean_ms"], r["min_ms"], r["p95_ms"], r["peak_kb"]] for r in results],
+        headers=["Case", "Reservations", "Mean (ms)", "Min (ms)", "p95 (ms)", "Peak memory (KB)"],
+    ))
+
+    history_path = Path(args.history)
+    parameters = {name: getattr(args, name) for name in _RUN_PARAMETERS}
+    previous = _previous_run(history_path, parameters)
+    regressed = False
+    if previous is not None:
+        rows, regressed = compare(results, previous, args.threshold)
+        print(f"\nCompared with run at {previous['recorded_at']} ({previous.get('commit') or 'unknown commit'})")
+        print(tabulate_module.tabulate(rows, headers=[
+            "Case", "Reservations", "Mean before", "Mean now", "Time %",
+            "Peak KB before", "Peak KB now", "Memory %", "Verdict",
+        ]))
+
+    if not args.no_record:
+        record = {
+            "recorded_at": datetime.now().isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **parameters,
+            "results": results,
+        }
+        with open(history_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"Recorded in {history_path}")
+
+    if regressed and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Benchmark response serialization for the large list endpoints.
+
+Compares the default path (build Pydantic models, then jsonable_encoder and
+json.dumps as FastAPI does) with fast_json (project rows onto the model's
+fields, then orjson) on synthetic payloads shaped like /parking/lots,
+/user/{id}/reservations, /admin/users, /admin/feedback and /parking/nearest.
+
+    python benchmark_json.py --rows 2000 --repeat 20
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+import tabulate as tabulate_module
+
+import fast_json
+from main import FeedbackResponse, ParkingLotOut, ReservationOut, UserOut
+
+
+def _lots(n: int) -> List[Dict]:
+    campuses = ["West Campus", "East Campus", "South P", "Research and Development Park"]
+    return [
+        {
+            "parkingLotID": i,
+            "name": f"Lot {i}",
+            "location": f"{i} Circle Road, {campuses[i % len(campuses)]}",
+            "capacity": 400,
+            "evSlots": 12,
+            "reserved_slots": random.randint(0, 400),
+            "campus": campuses[i % len(campuses)],
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def _reservations(n: int) -> List[Dict]:
+    start = datetime(2025, 3, 1, 8)
+    return [
+        {
+            "reservationID": i,
+            "userID": 7,
+            "parkingLotID": random.randint(1, 60),
+            "startTime": (start + timedelta(hours=i)).isoformat(),
+            "endTime": (start + timedelta(hours=i + 2)).isoformat(),
+            "price": 4.0,
+            "reservationStatus": "Completed",
+            "created_at": start.isoformat(),
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def _users(n: int) -> List[Dict]:
+    return [
+        {
+            "userID": i,
+            "userName": f"User {i}",
+            "email": f"user{i}@stonybrook.edu",
+            "phone": "631-555-0100",
+            "userType": "Visitor",
+            "status": "approved",
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def _feedback(n: int) -> List[Dict]:
+    return [
+        {
+            "feedbackID": i,
+            "userID": i % 50,
+            "date": datetime(2025, 3, 1).isoformat(),
+            "message": "The lot near the Javits Center was full by 9am again.",
+            "rating": 3,
+            "reply": None,
+            "type": "General",
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def _nearest(n_lots: int = 5, path_points: int = 400) -> List[Dict]:
+    return [
+        {
+            "id": i,
+            "name": f"Lot {i}",
+            "location": f"{i} Circle Road, West Campus",
+            "available": 120,
+            "evSlots": 12,
+            "distance": 1234.5,
+            "path": [
+                {"lat": 40.91 + random.random() / 100, "lng": -73.12 + random.random() / 100}
+                for _ in range(path_points)
+            ],
+            "forecast": [
+                {"timestamp": (datetime(2025, 3, 1) + timedelta(hours=h)).isoformat(), "occupancy_rate": 0.5}
+                for h in range(24)
+            ],
+        }
+        for i in range(n_lots)
+    ]
+
+
+def _default_path(rows: List[Dict], model) -> bytes:
+    if model is None:
+        return json.dumps(jsonable_encoder(rows), separators=(",", ":")).encode()
+    models = [model(**row) for row in rows]
+    return json.dumps(jsonable_encoder(models), separators=(",", ":")).encode()
+
+
+def _fast_path(rows: List[Dict], model) -> bytes:
+    items = list(fast_json.project(rows, model)) if model is not None else rows
+    return fast_json.dumps(items)
+
+
+def _time(func: Callable[[], bytes], repeat: int):
+    body = func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000, len(body)
+
+
+def run_benchmark(rows: int = 2000, repeat: int = 20) -> List[Dict]:
+    random.seed(416)
+    payloads = [
+        ("/parking/lots", _lots(rows), ParkingLotOut),
+        ("/user/{id}/reservations", _reservations(rows), ReservationOut),
+        ("/admin/users", _users(rows), UserOut),
+        ("/admin/feedback", _feedback(rows), FeedbackResponse),
+        ("/parking/nearest", _nearest(), None),
+    ]
+
+    results = []
+    for endpoint, data, model in payloads:
+        default_ms, default_bytes = _time(lambda: _default_path(data, model), repeat)
+        fast_ms, fast_bytes = _time(lambda: _fast_path(data, model), repeat)
+        results.append({
+            "endpoint": endpoint,
+            "items": len(data),
+            "default_ms": round(default_ms, 3),
+            "fast_ms": round(fast_ms, 3),
+            "speedup": round(default_ms / fast_ms, 1) if fast_ms else None,
+            "default_bytes": default_bytes,
+            "fast_bytes": fast_bytes,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON serialization of list endpoints")
+    parser.add_argument("--rows", type=int, default=2000, help="Rows per list payload")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per payload")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.rows, args.repeat)
+    encoder = "orjson" if fast_json.orjson is not None else "json (orjson not installed)"
+    print(f"Fast path encoder: {encoder}")
+    print(tabulate_module.tabulate(
+        [list(r.values()) for r in results],
+        headers=["Endpoint", "Items", "Default (ms)", "Fast (ms)", "Speedup", "Default bytes", "Fast bytes"],
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Per-worker memory of the networkx road graph versus the shared graph store.
+
+Forks N workers the way gunicorn does and has each one get ready to route:
+in ``networkx`` mode every worker builds its own graph with pathfinder, in
+``shared`` mode the graph is exported once and every worker opens the
+memory-mapped arrays from graph_store. Each worker then answers a few
+nearest-lot searches, and its PSS (shared pages split between the processes
+mapping them) and USS (pages only it holds) are read from
+/proc/<pid>/smaps_rollup while all workers are still alive. Linux only.
+
+    python benchmark_worker_memory.py --workers 4 --graph-size 100
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+import tabulate as tabulate_module
+
+from benchmark_hot_paths import offline_graph, synthetic_polygons, synthetic_road_graph
+
+
+def _memory(pid: int) -> Dict[str, float]:
+    """PSS and USS of a process in MB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "pss_mb": round(fields["Pss"] / 1024, 1),
+        "uss_mb": round((fields["Private_Clean"] + fields["Private_Dirty"]) / 1024, 1),
+    }
+
+
+def _worker(mode: str, graph_size: int, polygons, searches: int, ready, done) -> None:
+    import pathfinder
+
+    started = time.perf_counter()
+    if mode == "networkx":
+        with offline_graph([synthetic_road_graph(graph_size)], polygons):
+            pathfinder._load_road_graph()
+    router = pathfinder._get_router()
+    setup_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(os.getpid())
+    lots = list(router.lots.index)
+    started = time.perf_counter()
+    for _ in range(searches):
+        router.routes(rng.choice(lots), lots, "benchmark")
+    search_ms = (time.perf_counter() - started) * 1000 / max(searches, 1)
+
+    ready.put((os.getpid(), round(setup_ms, 1), round(search_ms, 2)))
+    done.wait()
+
+
+def run(mode: str, workers: int, graph_size: int, lots: int, searches: int) -> List[Dict]:
+    import graph_store
+    import pathfinder
+
+    polygons = synthetic_polygons(lots)
+    with tempfile.TemporaryDirectory(prefix="graph-store-") as store:
+        if mode == "shared":
+            with offline_graph([synthetic_road_graph(graph_size)], polygons):
+                graph, gdf_polygon = pathfinder._load_road_graph()
+            graph_store.export_graph(graph, gdf_polygon, store)
+            pathfinder._graph_cache = None
+            del graph, gdf_polygon
+            graph_store.GRAPH_STORE_DIR = store
+        else:
+            graph_store.GRAPH_STORE_DIR = None
+
+        context = multiprocessing.get_context("fork")
+        ready, done = context.Queue(), context.Event()
+        processes = [
+            context.Process(target=_worker, args=(mode, graph_size, polygons, searches, ready, done))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            reports = [ready.get(timeout=600) for _ in processes]
+            # Every worker is alive and holding its graph while memory is read
+            results = [
+                {"mode": mode, "pid": pid, "setup_ms": setup_ms, "search_ms": search_ms, **_memory(pid)}
+                for pid, setup_ms, search_ms in reports
+            ]
+        finally:
+            done.set()
+            for process in processes:
+                process.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-worker memory of networkx and shared road graphs")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes to fork")
+    parser.add_argument("--graph-size", type=int, default=100, help="Synthetic road grid is N x N intersections")
+    parser.add_argument("--lots", type=int, default=40, help="Synthetic parking lots")
+    parser.add_argument("--searches", type=int, default=5, help="Nearest-lot searches per worker")
+    parser.add_argument("--mode", choices=["networkx", "shared", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ["networkx", "shared"] if args.mode == "both" else [args.mode]
+    results = []
+    for mode in modes:
+        results.extend(run(mode, args.workers, args.graph_size, args.lots, args.searches))
+
+    print(tabulate_module.tabulate(
+        [[r["mode"], r["pid"], r["setup_ms"], r["search_ms"], r["pss_mb"], r["uss_mb"]] for r in results],
+        headers=["Mode", "PID", "Setup (ms)", "Search (ms)", "PSS (MB)", "USS (MB)"],
+    ))
+    print()
+    print(tabulate_module.tabulate(
+        [[mode,
+          sum(r["pss_mb"] for r in results if r["mode"] == mode),
+          sum(r["uss_mb"] for r in results if r["mode"] == mode)] for mode in modes],
+        headers=["Mode", f"Total PSS for {args.workers} workers (MB)", "Total USS (MB)"],
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""In-memory campus -> parking lot IDs map.
+
+Backed by the indexed parking_lots.campus column. Loaded at startup,
+updated by create_parking_lot and re-read periodically so lots created by
+other workers show up. Campus names match case-insensitively.
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from db_manager import execute_query
+
+_REFRESH_INTERVAL = 30  # seconds
+
+_campuses: Dict[str, Tuple[str, List[int]]] = {}  # lowercased name -> (display name, lot IDs)
+_lock = threading.Lock()
+_last_refresh = 0.0
+
+
+def campus_from_location(location: str) -> str:
+    """Campus part of a "<address>, <campus>" location string."""
+    _, separator, campus = location.partition(", ")
+    return campus if separator else location
+
+
+def refresh() -> None:
+    global _campuses, _last_refresh
+
+    try:
+        rows = execute_query(
+            "SELECT parkingLotID, campus FROM parking_lots WHERE campus IS NOT NULL ORDER BY parkingLotID"
+        )
+    except Exception as e:
+        print(f"Error loading campus index: {e}")
+        return
+
+    campuses = {}
+    for row in rows:
+        entry = campuses.setdefault(row["campus"].lower(), (row["campus"], []))
+        entry[1].append(row["parkingLotID"])
+    with _lock:
+        _campuses = campuses
+        _last_refresh = time.time()
+
+
+def _current() -> Dict[str, Tuple[str, List[int]]]:
+    if time.time() - _last_refresh >= _REFRESH_INTERVAL:
+        refresh()
+    return _campuses
+
+
+def add_lot(lot_id: int, campus: str) -> None:
+    with _lock:
+        name, lot_ids = _campuses.get(campus.lower(), (campus, []))
+        _campuses[campus.lower()] = (name, lot_ids + [lot_id])
+
+
+def campuses() -> List[str]:
+    return sorted(name for name, _ in _current().values())
+
+
+def campus_name(campus: str) -> Optional[str]:
+    entry = _current().get(campus.lower())
+    return entry[0] if entry else None
+
+
+def lot_ids(campus: str) -> List[int]:
+    entry = _current().get(campus.lower())
+    return list(entry[1]) if entry else []
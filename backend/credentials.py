@@ -0,0 +1,93 @@
+"""Password hashing on a dedicated, bounded worker pool.
+
+bcrypt is deliberately slow, so hashing and verification run on their own
+executor instead of the shared request threadpool. At most
+CREDENTIAL_WORKERS hashes run at once and CREDENTIAL_MAX_QUEUE more may
+wait; beyond that callers get a 429 with Retry-After, so a login storm
+cannot starve parking queries. The bcrypt work factor comes from
+BCRYPT_ROUNDS, and hashes made with a different factor are upgraded on the
+next successful login.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+CREDENTIAL_WORKERS = int(os.environ.get("CREDENTIAL_WORKERS", 4))
+CREDENTIAL_MAX_QUEUE = int(os.environ.get("CREDENTIAL_MAX_QUEUE", 32))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor = ThreadPoolExecutor(max_workers=CREDENTIAL_WORKERS, thread_name_prefix="credentials")
+_lock = threading.Lock()
+_pending = 0
+_rejected = 0
+_avg_seconds = 0.25  # running average of one hash, seeds Retry-After before the first sample
+
+
+def _timed(func, *args):
+    global _avg_seconds
+
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    with _lock:
+        _avg_seconds = 0.8 * _avg_seconds + 0.2 * elapsed
+    return result
+
+
+def _retry_after() -> int:
+    return max(1, math.ceil(_pending / CREDENTIAL_WORKERS * _avg_seconds))
+
+
+async def _submit(func, *args):
+    global _pending, _rejected
+
+    with _lock:
+        if _pending >= CREDENTIAL_WORKERS + CREDENTIAL_MAX_QUEUE:
+            _rejected += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many credential checks in progress, try again shortly",
+                headers={"Retry-After": str(_retry_after())},
+            )
+        _pending += 1
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, _timed, func, *args)
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _submit(pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Return whether the password matches and, if its hash is outdated, a replacement hash."""
+    return await _submit(pwd_context.verify_and_update, password, hashed_password)
+
+
+def stats() -> Dict:
+    with _lock:
+        pending = _pending
+        rejected = _rejected
+        avg_seconds = _avg_seconds
+    return {
+        "workers": CREDENTIAL_WORKERS,
+        "max_queue": CREDENTIAL_MAX_QUEUE,
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+        "in_flight": min(pending, CREDENTIAL_WORKERS),
+        "queued": max(0, pending - CREDENTIAL_WORKERS),
+        "rejected": rejected,
+        "avg_hash_ms": round(avg_seconds * 1000, 2),
+    }
@@ -0,0 +1,206 @@
+"""Streaming CSV/Parquet exports of reservations, payments and feedback.
+
+For analytics, instead of scraping the API or copying parking.db. Rows are
+read from a dedicated read-only connection inside one read transaction,
+so an export (and every table of a multi-table CLI export) sees a single
+consistent snapshot of the database. Under WAL, writers carry on meanwhile;
+the WAL only keeps growing until the export finishes, because a checkpoint
+cannot pass an open reader. Rows are fetched EXPORT_CHUNK_ROWS at a time and
+written out chunk by chunk (one Parquet row group per chunk), so memory
+stays bounded however large the tables are.
+
+Served at ``GET /admin/export/{table}`` and from the command line:
+
+    python data_export.py reservations payments --format parquet \\
+        --start 2025-01-01 --end 2025-02-01 --out exports/
+"""
+import argparse
+import csv
+import io
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from db_manager import DB_PATH
+
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", 10000))
+
+# Table -> the date column filtered by --start/--end, and a unique tiebreaker for the row order
+TABLES: Dict[str, Tuple[str, str]] = {
+    "reservations": ("startTime", "reservationID"),
+    "payments": ("paymentDate", "paymentID"),
+    "feedback": ("date", "feedbackID"),
+}
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def parse_date(value: Optional[str]) -> Optional[str]:
+    """Validate an ISO date or datetime; stored dates are ISO strings, so it is compared as text."""
+    if value is None:
+        return None
+    datetime.fromisoformat(value)
+    return value
+
+
+@contextmanager
+def snapshot(db_path: str = DB_PATH) -> Iterator[sqlite3.Connection]:
+    """Read-only connection holding one read transaction, i.e. one snapshot, until closed."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    try:
+        conn.execute("BEGIN")
+        yield conn
+    finally:
+        conn.close()
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[Tuple[str, str]]:
+    return [(row[1], (row[2] or "").upper()) for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _rows(conn: sqlite3.Connection, table: str, start: Optional[str], end: Optional[str]) -> Iterator[List[tuple]]:
+    date_column, id_column = TABLES[table]
+    conditions, params = [], []
+    if start is not None:
+        conditions.append(f"{date_column} >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append(f"{date_column} < ?")
+        params.append(end)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    cursor = conn.execute(f"SELECT * FROM {table} {where} ORDER BY {date_column}, {id_column}", params)
+    while True:
+        rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+        if not rows:
+            return
+        yield rows
+
+
+def _csv_chunks(columns: List[Tuple[str, str]], chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _StreamSink:
+    """Write-only file for ParquetWriter that hands out what was written so far."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # ParquetWriter records column chunk offsets from this, so it counts everything ever written
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_type(declared: str):
+    import pyarrow as pa
+
+    if "INT" in declared or declared == "BOOLEAN":
+        return pa.int64()
+    if "REAL" in declared or "FLOA" in declared or "DOUB" in declared:
+        return pa.float64()
+    return pa.string()
+
+
+def _parquet_chunks(columns: List[Tuple[str, str]], chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, _arrow_type(declared)) for name, declared in columns])
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        for rows in chunks:
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_table(
+    conn: sqlite3.Connection,
+    table: str,
+    fmt: str = "csv",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> Iterator[bytes]:
+    """The table's rows in ``fmt``, oldest first, as a stream of byte chunks."""
+    if table not in TABLES:
+        raise ValueError(f"table must be one of {list(TABLES)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {list(FORMATS)}")
+
+    columns = _columns(conn, table)
+    chunks = _rows(conn, table, start, end)
+    if fmt == "csv":
+        return _csv_chunks(columns, chunks)
+    return _parquet_chunks(columns, chunks)
+
+
+def stream_export(table: str, fmt: str, start: Optional[str], end: Optional[str]) -> Iterator[bytes]:
+    """``export_table`` over its own snapshot, closed once the stream ends."""
+    with snapshot() as conn:
+        yield from export_table(conn, table, fmt, start, end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export tables as CSV or Parquet from one consistent snapshot")
+    parser.add_argument("tables", nargs="*", help=f"Tables to export, of {', '.join(TABLES)} (default: all)")
+    parser.add_argument("--format", choices=list(FORMATS), default="csv")
+    parser.add_argument("--start", type=parse_date, help="Rows dated on or after this ISO date/datetime")
+    parser.add_argument("--end", type=parse_date, help="Rows dated before this ISO date/datetime")
+    parser.add_argument("--db", default=DB_PATH, help="Database to read")
+    parser.add_argument("--out", default=".", help="Directory for <table>.<format> files")
+    args = parser.parse_args()
+    unknown = [table for table in args.tables if table not in TABLES]
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(unknown)}")
+
+    os.makedirs(args.out, exist_ok=True)
+    with snapshot(args.db) as conn:
+        for table in args.tables or list(TABLES):
+            path = os.path.join(args.out, f"{table}.{FORMATS[args.format][1]}")
+            size = 0
+            with open(path, "wb") as f:
+                for chunk in export_table(conn, table, args.format, args.start, args.end):
+                    f.write(chunk)
+                    size += len(chunk)
+            print(f"Wrote {table} to {path} ({size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
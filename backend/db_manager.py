@@ -1,4 +1,7 @@
+from collections import deque
 from contextlib import contextmanager
+from datetime import datetime
+import random
 import sqlite3
 from typing import Any, Dict, List, Optional, Tuple
 import time
@@ -7,9 +10,163 @@ import queue
 import os
 from pathlib import Path
 
+import metrics
+
 MAX_CONNECTIONS = 20
 CONNECTION_TIMEOUT = 5  # seconds
-DB_PATH = os.path.join(Path(__file__).parent, "parking.db")
+DB_PATH = os.environ.get("DATABASE", os.path.join(Path(__file__).parent, "parking.db"))
+
+# Statements at or above this many milliseconds are logged; 0 turns the log off
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 100))
+# Share of slow statements that also capture EXPLAIN QUERY PLAN (always the first per fingerprint)
+SLOW_QUERY_PLAN_SAMPLE_RATE = float(os.environ.get("SLOW_QUERY_PLAN_SAMPLE_RATE", 0.1))
+_MAX_SLOW_FINGERPRINTS = 1000
+_PLANNABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+_slow_queries: Dict[str, Dict[str, Any]] = {}
+_recent_slow_queries = deque(maxlen=200)
+_slow_lock = threading.Lock()
+
+
+def _params_shape(parameters) -> str:
+    """Parameter types without their values, e.g. "(int, str)"."""
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+
+
+def _query_plan(conn: sqlite3.Connection, sql: str, parameters) -> Optional[str]:
+    try:
+        # Plain sqlite3 cursor, so the EXPLAIN itself is neither timed nor logged
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+    except sqlite3.Error:
+        return None
+    depth = {0: 0}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, 0) + 1
+        lines.append("  " * (depth[node_id] - 1) + detail)
+    return "\n".join(lines)
+
+
+def _record_slow_query(cursor: sqlite3.Cursor, sql: str, parameters, elapsed: float,
+                       many: bool = False) -> Dict[str, Any]:
+    fingerprint = metrics.fingerprint(sql)
+    duration_ms = round(elapsed * 1000, 2)
+    if many:
+        # Only lists and tuples can be inspected without consuming them
+        first = parameters[0] if isinstance(parameters, (list, tuple)) and parameters else None
+        shape = f"many x {_params_shape(first)}" if first is not None else "many"
+    else:
+        shape = _params_shape(parameters)
+
+    with _slow_lock:
+        stats = _slow_queries.get(fingerprint)
+        want_plan = stats is None or stats["plan"] is None or random.random() < SLOW_QUERY_PLAN_SAMPLE_RATE
+    plan = None
+    if want_plan and not many and sql.lstrip().upper().startswith(_PLANNABLE):
+        plan = _query_plan(cursor.connection, sql, parameters)
+
+    entry = {
+        "statement": fingerprint,
+        "durationMs": duration_ms,
+        "params": shape,
+        # SELECT rows are counted as they are fetched
+        "rows": 0 if cursor.description is not None else cursor.rowcount,
+        "at": datetime.now().isoformat(),
+        "plan": plan,
+    }
+    with _slow_lock:
+        _recent_slow_queries.append(entry)
+        stats = _slow_queries.get(fingerprint)
+        if stats is None:
+            if len(_slow_queries) >= _MAX_SLOW_FINGERPRINTS:
+                return entry
+            stats = _slow_queries[fingerprint] = {
+                "statement": fingerprint, "count": 0, "totalMs": 0.0, "maxMs": 0.0, "plan": None,
+            }
+        stats["count"] += 1
+        stats["totalMs"] += duration_ms
+        stats["maxMs"] = max(stats["maxMs"], duration_ms)
+        stats["last"] = entry
+        if plan is not None:
+            stats["plan"] = plan
+
+    print(f"Slow query ({duration_ms} ms, params {shape}): {fingerprint}")
+    return entry
+
+
+def slow_query_stats(limit: int = 20, order_by: str = "totalMs") -> Dict[str, Any]:
+    """Slowest statement fingerprints seen by this worker."""
+    with _slow_lock:
+        statements = [
+            dict(stats, last=dict(stats["last"]), meanMs=round(stats["totalMs"] / stats["count"], 2))
+            for stats in _slow_queries.values()
+        ]
+        recent = [dict(entry) for entry in list(_recent_slow_queries)[-limit:]]
+    statements.sort(key=lambda stats: stats[order_by], reverse=True)
+    for stats in statements:
+        stats["totalMs"] = round(stats["totalMs"], 2)
+    return {"thresholdMs": SLOW_QUERY_MS, "statements": statements[:limit], "recent": recent[::-1]}
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's execution time to metrics and the slow-query log."""
+
+    _slow_entry = None
+
+    def execute(self, sql, parameters=()):
+        self._slow_entry = None
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.observe_query(sql, elapsed)
+            if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+                self._slow_entry = _record_slow_query(self, sql, parameters, elapsed)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._slow_entry = None
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.observe_query(sql, elapsed)
+            if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+                _record_slow_query(self, sql, seq_of_parameters, elapsed, many=True)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if self._slow_entry is not None and row is not None:
+            self._slow_entry["rows"] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        if self._slow_entry is not None:
+            self._slow_entry["rows"] += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if self._slow_entry is not None:
+            self._slow_entry["rows"] += len(rows)
+        return rows
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors, including those made by execute(), are TimedCursors."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
 
 
 class DatabaseConnectionPool:
@@ -35,7 +192,7 @@ class DatabaseConnectionPool:
 
     def _create_connection(self) -> Optional[sqlite3.Connection]:
         try:
-            conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+            conn = sqlite3.connect(DB_PATH, check_same_thread=False, factory=TimedConnection)
             conn.row_factory = sqlite3.Row
             conn.execute("PRAGMA journal_mode=WAL;")
             conn.execute(f"PRAGMA busy_timeout={CONNECTION_TIMEOUT * 1000};")
@@ -85,7 +242,9 @@ class DatabaseConnectionPool:
 @contextmanager
 def get_db_connection():
     pool = DatabaseConnectionPool()
+    started = time.perf_counter()
     connection = pool.get_connection()
+    metrics.observe_pool_wait(time.perf_counter() - started)
 
     if connection is None:
         raise Exception("Could not get database connection")
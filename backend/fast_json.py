@@ -0,0 +1,74 @@
+"""Fast JSON responses for large list endpoints.
+
+Endpoints opt in by returning ``list_response``/``json_response`` instead of
+Pydantic models. Rows that already have the response model's fields are
+projected onto them directly, skipping model construction and FastAPI's
+``jsonable_encoder``, and encoded with orjson when it is installed (stdlib
+json otherwise). Lists longer than STREAM_THRESHOLD are streamed, projected
+and encoded a chunk at a time, so neither the projected rows nor the whole
+body are ever built at once. The decorator's ``response_model`` still
+documents the schema.
+
+The fast path trusts the row types: nothing is validated or coerced, so a
+NULL in a required column or a value of the wrong type goes out as stored
+instead of failing with a 500. Only opt in endpoints whose rows come
+straight from columns matching the model (test-fast-json.py checks the
+converted ones against the model path).
+
+Compare against the default path with ``python benchmark_json.py``.
+"""
+import json
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Sequence, Type
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+STREAM_THRESHOLD = 1000  # items
+_STREAM_CHUNK_SIZE = 500  # items per chunk
+
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(jsonable_encoder(data), separators=(",", ":")).encode()
+
+
+def project(rows: Iterable[Mapping], model: Type[BaseModel]) -> Iterator[dict]:
+    """Keep only the model's fields, lazily; rows must already hold values of the right types."""
+    fields = list(model.model_fields)
+    for row in rows:
+        if not isinstance(row, dict):
+            row = dict(row)  # sqlite3.Row
+        yield {field: row.get(field) for field in fields}
+
+
+def _stream_array(items: Iterable[Any]) -> Iterator[bytes]:
+    items = iter(items)
+    yield b"["
+    first = True
+    while True:
+        chunk = list(islice(items, _STREAM_CHUNK_SIZE))
+        if not chunk:
+            break
+        body = dumps(chunk)[1:-1]
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+
+def json_response(data: Any, status_code: int = 200) -> Response:
+    return Response(content=dumps(data), status_code=status_code, media_type="application/json")
+
+
+def list_response(rows: Sequence[Mapping], model: Optional[Type[BaseModel]] = None) -> Response:
+    items = project(rows, model) if model is not None else rows
+    if len(rows) > STREAM_THRESHOLD:
+        return StreamingResponse(_stream_array(items), media_type="application/json")
+    return json_response(list(items))
@@ -4,6 +4,10 @@ from fastapi import HTTPException
 from typing import Dict, Any, List, Optional
 
 from db_manager import get_db_connection, execute_query, execute_write_query
+import pagination
+
+# Newest first; backed by idx_feedback_date and idx_feedback_user_date
+FEEDBACK_KEYSET = pagination.Keyset("date", "feedbackID")
 
 
 def create_feedback(
@@ -169,9 +173,13 @@ def get_feedback(feedback_id: int) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve feedback: {str(e)}")
 
 
-def get_user_feedback(user_id: int) -> List[Dict[str, Any]]:
+def get_user_feedback(user_id: int, cursor: Optional[str] = None, limit: int = -1) -> List[Dict[str, Any]]:
+    after, params = FEEDBACK_KEYSET.after(cursor)
     try:
-        feedback = execute_query("SELECT * FROM feedback WHERE userID = ? ORDER BY date DESC", (user_id,))
+        feedback = execute_query(
+            f"SELECT * FROM feedback WHERE userID = ? AND {after} ORDER BY {FEEDBACK_KEYSET.order_by()} LIMIT ?",
+            (user_id, *params, limit),
+        )
         return feedback
     except sqlite3.Error as e:
         print(f"Database error in get_user_feedback: {str(e)}")
@@ -183,9 +191,13 @@ def get_user_feedback(user_id: int) -> List[Dict[str, Any]]:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve user feedback: {str(e)}")
 
 
-def get_all_feedback() -> List[Dict[str, Any]]:
+def get_all_feedback(cursor: Optional[str] = None, limit: int = -1) -> List[Dict[str, Any]]:
+    after, params = FEEDBACK_KEYSET.after(cursor)
     try:
-        feedback = execute_query("SELECT * FROM feedback ORDER BY date DESC")
+        feedback = execute_query(
+            f"SELECT * FROM feedback WHERE {after} ORDER BY {FEEDBACK_KEYSET.order_by()} LIMIT ?",
+            (*params, limit),
+        )
         return feedback
     except sqlite3.Error as e:
         print(f"Database error in get_all_feedback: {str(e)}")
@@ -0,0 +1,262 @@
+"""Precomputed forecast snapshot.
+
+A periodic job computes the next-24-hour forecast, best-time recommendation
+and daily patterns for every lot and writes them to the forecast_snapshot
+table. The forecast endpoints serve from the in-memory copy of the latest
+snapshot and only fall back to live computation for horizons or modes the
+snapshot does not cover.
+
+Forecast entries are hourly from when the snapshot was built, so entries
+whose hour has passed are skipped and a request that would run past the
+end of the snapshot is computed live. A reservation change marks its lot
+stale (``invalidate``) in the forecast_invalidations table, so every worker
+computes that lot live until the next snapshot and bookings show up at once.
+
+Run once or on an interval from the command line:
+
+    python forecast_snapshot.py
+    python forecast_snapshot.py --interval 900
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import forecasting
+import metrics
+from db_manager import execute_query, execute_transaction, execute_write_query
+
+SNAPSHOT_HORIZON_HOURS = 24
+SNAPSHOT_INTERVAL = int(os.environ.get("FORECAST_SNAPSHOT_INTERVAL", 900))  # seconds
+_SNAPSHOT_MAX_AGE = timedelta(seconds=2 * SNAPSHOT_INTERVAL)
+_RELOAD_CHECK_INTERVAL = 30  # seconds
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_last_reload_check = 0.0
+
+
+def build_snapshot() -> Dict:
+    generated_at = datetime.now()
+    bulk = forecasting.get_bulk_forecast(hours_ahead=SNAPSHOT_HORIZON_HOURS)
+    forecasts = forecasting.split_bulk_forecast(bulk)
+
+    best_times = {}
+    daily_patterns = {}
+    for lot_id, forecast in forecasts.items():
+        best_times[lot_id] = forecasting.best_time_from_forecast(forecast)
+        daily_patterns[lot_id] = {
+            day: forecasting.get_daily_pattern(lot_id, day_of_week=day, random_mode=False)
+            for day in range(7)
+        }
+
+    return {
+        "generated_at": generated_at,
+        "forecasts": forecasts,
+        "best_times": best_times,
+        "daily_patterns": daily_patterns,
+    }
+
+
+def store_snapshot(snapshot: Dict) -> None:
+    generated_at = snapshot["generated_at"].isoformat()
+    queries = [
+        ("DELETE FROM forecast_snapshot", ()),
+        # Changes made while it was being built still predate nothing in it, so they stay
+        ("DELETE FROM forecast_invalidations WHERE invalidatedAt < ?", (generated_at,)),
+    ]
+    for lot_id, forecast in snapshot["forecasts"].items():
+        payloads = {
+            "forecast": forecast,
+            "best_time": snapshot["best_times"][lot_id],
+            "daily_pattern": snapshot["daily_patterns"][lot_id],
+        }
+        for kind, payload in payloads.items():
+            queries.append((
+                "INSERT INTO forecast_snapshot (parkingLotID, kind, payload, generatedAt) VALUES (?, ?, ?, ?)",
+                (lot_id, kind, json.dumps(payload), generated_at),
+            ))
+    execute_transaction(queries)
+
+
+def _latest_stored_at() -> Optional[datetime]:
+    rows = execute_query("SELECT MAX(generatedAt) AS generatedAt FROM forecast_snapshot")
+    if not rows or rows[0]["generatedAt"] is None:
+        return None
+    return datetime.fromisoformat(rows[0]["generatedAt"])
+
+
+def load_snapshot() -> Optional[Dict]:
+    rows = execute_query("SELECT parkingLotID, kind, payload, generatedAt FROM forecast_snapshot")
+    if not rows:
+        return None
+
+    snapshot = {
+        "generated_at": datetime.fromisoformat(rows[0]["generatedAt"]),
+        "forecasts": {},
+        "best_times": {},
+        "daily_patterns": {},
+    }
+    for row in rows:
+        payload = json.loads(row["payload"])
+        if row["kind"] == "forecast":
+            snapshot["forecasts"][row["parkingLotID"]] = payload
+        elif row["kind"] == "best_time":
+            snapshot["best_times"][row["parkingLotID"]] = payload
+        elif row["kind"] == "daily_pattern":
+            snapshot["daily_patterns"][row["parkingLotID"]] = {int(day): p for day, p in payload.items()}
+    return snapshot
+
+
+def _set_snapshot(snapshot: Optional[Dict]) -> None:
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = snapshot
+
+
+def refresh_snapshot(force: bool = False) -> Dict:
+    """Rebuild and store the snapshot, or adopt a fresh one another worker already stored."""
+    if not force:
+        stored_at = _latest_stored_at()
+        if stored_at is not None and datetime.now() - stored_at < timedelta(seconds=SNAPSHOT_INTERVAL * 0.9):
+            snapshot = load_snapshot()
+            _set_snapshot(snapshot)
+            return snapshot
+
+    snapshot = build_snapshot()
+    store_snapshot(snapshot)
+    _set_snapshot(snapshot)
+    return snapshot
+
+
+def _current_snapshot() -> Optional[Dict]:
+    global _last_reload_check
+
+    snapshot = _snapshot
+    if snapshot is not None and datetime.now() - snapshot["generated_at"] < _SNAPSHOT_MAX_AGE:
+        return snapshot
+
+    now = time.monotonic()
+    if now - _last_reload_check < _RELOAD_CHECK_INTERVAL:
+        return None
+    _last_reload_check = now
+
+    try:
+        snapshot = load_snapshot()
+    except Exception as e:
+        print(f"Error loading forecast snapshot: {e}")
+        return None
+    if snapshot is None or datetime.now() - snapshot["generated_at"] >= _SNAPSHOT_MAX_AGE:
+        return None
+
+    _set_snapshot(snapshot)
+    return snapshot
+
+
+def invalidate(lot_id: int) -> None:
+    """Stop serving the lot from snapshots built before now; they miss its latest reservations."""
+    try:
+        execute_write_query(
+            "INSERT OR REPLACE INTO forecast_invalidations (parkingLotID, invalidatedAt) VALUES (?, ?)",
+            (lot_id, datetime.now().isoformat()),
+        )
+    except Exception as e:
+        print(f"Error invalidating forecast snapshot for lot {lot_id}: {e}")
+
+
+def _invalidated_at(lot_id: int) -> Optional[datetime]:
+    rows = execute_query("SELECT invalidatedAt FROM forecast_invalidations WHERE parkingLotID = ?", (lot_id,))
+    return datetime.fromisoformat(rows[0]["invalidatedAt"]) if rows else None
+
+
+def _snapshot_for(lot_id: int) -> Optional[Dict]:
+    snapshot = _current_snapshot()
+    if snapshot is None:
+        return None
+    try:
+        invalidated_at = _invalidated_at(lot_id)
+    except Exception as e:
+        print(f"Error reading forecast invalidations: {e}")
+        return None
+    if invalidated_at is not None and invalidated_at >= snapshot["generated_at"]:
+        return None
+    return snapshot
+
+
+def _upcoming(snapshot: Dict, lot_id: int, hours: int) -> Optional[List[Dict]]:
+    """The next ``hours`` entries from now, or None if the snapshot does not reach that far."""
+    forecast = snapshot["forecasts"].get(lot_id)
+    if not forecast:
+        return None
+    # Entry i covers the hour from generated_at + i hours
+    elapsed_hours = int((datetime.now() - snapshot["generated_at"]).total_seconds() // 3600)
+    upcoming = forecast[elapsed_hours:elapsed_hours + hours]
+    return upcoming if len(upcoming) == hours else None
+
+
+def _record(result):
+    metrics.forecast_cache("snapshot", hit=result is not None)
+    return result
+
+
+def get_forecast(lot_id: int, hours_ahead: int) -> Optional[List[Dict]]:
+    snapshot = _snapshot_for(lot_id)
+    if snapshot is None:
+        return _record(None)
+    return _record(_upcoming(snapshot, lot_id, hours_ahead))
+
+
+def get_best_time(lot_id: int, time_window_hours: int) -> Optional[Dict]:
+    snapshot = _snapshot_for(lot_id)
+    if snapshot is None:
+        return _record(None)
+    forecast = _upcoming(snapshot, lot_id, time_window_hours)
+    if forecast is None:
+        return _record(None)
+    if time_window_hours == SNAPSHOT_HORIZON_HOURS:
+        # Only reachable while no hour has passed, so the stored pick is still ahead
+        return _record(snapshot["best_times"].get(lot_id))
+    return _record(forecasting.best_time_from_forecast(forecast))
+
+
+def get_daily_pattern(lot_id: int, day_of_week: Optional[int] = None) -> Optional[Dict]:
+    snapshot = _snapshot_for(lot_id)
+    if snapshot is None:
+        return _record(None)
+    if day_of_week is None:
+        day_of_week = int(datetime.now().strftime("%w"))
+    return _record(snapshot["daily_patterns"].get(lot_id, {}).get(day_of_week))
+
+
+async def run_periodically(interval: int = SNAPSHOT_INTERVAL):
+    while True:
+        try:
+            await asyncio.to_thread(refresh_snapshot)
+        except Exception as e:
+            print(f"Error refreshing forecast snapshot: {e}")
+        await asyncio.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the forecast snapshot")
+    parser.add_argument("--interval", type=int, help="Keep running, refreshing every N seconds")
+    args = parser.parse_args()
+
+    while True:
+        started = time.perf_counter()
+        snapshot = refresh_snapshot(force=True)
+        print(
+            f"Forecast snapshot for {len(snapshot['forecasts'])} lots "
+            f"written in {time.perf_counter() - started:.2f}s"
+        )
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
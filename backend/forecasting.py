@@ -1,19 +1,43 @@
+from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
 import sqlite3
 from typing import Dict, List, Optional, Tuple, Any
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import threading
+import time
 import numpy as np
 from pathlib import Path
 import json
 import os
 import pickle
-from statsmodels.tsa.arima.model import ARIMA
-from db_manager import execute_query, execute_write_query, get_db_connection
+from db_manager import DB_PATH, execute_query, execute_write_query, get_db_connection
+import metrics
+import model_store
+
+try:
+    import fcntl
+except ImportError:  # Windows: fitting is only serialized within the process
+    fcntl = None
 
 _forecast_cache = {}
 _last_forecast_update = datetime.now() - timedelta(days=1)
 _FORECAST_CACHE_TTL = 3600
 _arima_models = {}
+_MODEL_MAX_AGE = timedelta(days=1)
+_LEGACY_MODEL_PATH = Path("models") / "arima_models.pkl"
+_BULK_FORECAST_WORKERS = 8
+_SEASONAL_DAYS_BACK = 28
+_SEASONAL_SMOOTHING = 0.3
+_SEASONAL_CURRENT_WEIGHT = 0.3
+_SEASONAL_CURRENT_DECAY = 0.7
+DEFAULT_FORECAST_BACKEND = os.environ.get("FORECAST_BACKEND", "arima")
+FAST_FORECAST_BACKEND = "seasonal"
 RANDOM_MODE = False
+_RANDOM_VARIATION = 0.15
+_random_variation_factors: Dict[int, np.ndarray] = {}
+_FIT_LOCK_PATH = f"{DB_PATH}.fit.lock"
+_fit_thread_lock = threading.Lock()
 
 
 def _get_historical_data(parking_lot_id: int, days_back: int = 30) -> List[Dict]:
@@ -87,36 +111,190 @@ def _get_current_capacity(parking_lot_id: int) -> Dict:
     return {"capacity": 0, "reserved_slots": 0, "available_slots": 0}
 
 
+def _lot_filter(lot_ids: Optional[List[int]], column: str = "parkingLotID") -> Tuple[str, tuple]:
+    if lot_ids is None:
+        return "1 = 1", ()
+    placeholders = ", ".join("?" for _ in lot_ids)
+    return f"{column} IN ({placeholders})", tuple(lot_ids)
+
+
+def _get_bulk_capacity(
+    lot_ids: Optional[List[int]] = None, campus: Optional[str] = None
+) -> Dict[int, Dict]:
+    where, params = _lot_filter(lot_ids)
+    if campus:
+        where += " AND campus = ? COLLATE NOCASE"
+        params += (campus,)
+
+    query = f"""
+    SELECT 
+        parkingLotID,
+        capacity, 
+        reserved_slots,
+        (capacity - reserved_slots) as available_slots
+    FROM 
+        parking_lots
+    WHERE 
+        {where}
+    ORDER BY 
+        parkingLotID
+    """
+
+    return {r["parkingLotID"]: r for r in execute_query(query, params)}
+
+
+def _get_bulk_historical_data(
+    lot_ids: List[int], days_back: int = 30, until: Optional[datetime] = None
+) -> Dict[int, List[Dict]]:
+    cutoff_date = ((until or datetime.now()) - timedelta(days=days_back)).strftime("%Y-%m-%d")
+    where, params = _lot_filter(lot_ids)
+    if until is not None:
+        where += " AND startTime < ?"
+        params += (until.isoformat(),)
+    params += (cutoff_date,)
+
+    query = f"""
+    SELECT 
+        parkingLotID,
+        strftime('%w', startTime) as day_of_week,
+        strftime('%H', startTime) as hour_of_day,
+        COUNT(*) as reservation_count
+    FROM 
+        reservations
+    WHERE 
+        {where} AND 
+        startTime >= ? AND
+        reservationStatus IN ('Completed', 'Pending')
+    GROUP BY 
+        parkingLotID, day_of_week, hour_of_day
+    ORDER BY 
+        parkingLotID, day_of_week, hour_of_day
+    """
+
+    historical = {lot_id: [] for lot_id in lot_ids}
+    for row in execute_query(query, params):
+        historical.setdefault(row.pop("parkingLotID"), []).append(row)
+    return historical
+
+
+def _get_bulk_hourly_data(
+    lot_ids: List[int],
+    capacities: Dict[int, Dict],
+    days_back: int = 30,
+    until: Optional[datetime] = None,
+) -> Dict[int, List[float]]:
+    cutoff_date = ((until or datetime.now()) - timedelta(days=days_back)).strftime("%Y-%m-%d")
+    where, params = _lot_filter(lot_ids)
+    if until is not None:
+        where += " AND startTime < ?"
+        params += (until.isoformat(),)
+    params += (cutoff_date,)
+
+    query = f"""
+    SELECT 
+        parkingLotID,
+        strftime('%Y-%m-%d %H', startTime) as hour,
+        COUNT(*) as reservation_count
+    FROM 
+        reservations
+    WHERE 
+        {where} AND 
+        startTime >= ? AND
+        reservationStatus IN ('Completed', 'Pending')
+    GROUP BY 
+        parkingLotID, hour
+    ORDER BY 
+        parkingLotID, hour
+    """
+
+    hourly = {lot_id: [] for lot_id in lot_ids}
+    for row in execute_query(query, params):
+        lot_id = row["parkingLotID"]
+        capacity = capacities.get(lot_id, {}).get("capacity", 0)
+        hourly.setdefault(lot_id, []).append(row["reservation_count"] / max(1, capacity))
+    return hourly
+
+
 def _get_upcoming_events() -> List[Dict]:
     return []
 
 
-def _fit_arima_model(lot_id: int) -> None:
-    global _arima_models
-    
-    hourly_data = _get_hourly_data(lot_id)
+def _fit_compact_arima(lot_id: int, hourly_data: List[float]) -> Optional[model_store.CompactArimaModel]:
     if len(hourly_data) < 24:
         return None
     
+    # statsmodels takes about a second to import; only fitting needs it
+    from statsmodels.tsa.arima.model import ARIMA
+
     try:
         model = ARIMA(hourly_data, order=(1, 0, 1))
         model_fit = model.fit()
-        _arima_models[lot_id] = model_fit
+        return model_store.CompactArimaModel.from_results(model_fit)
     except Exception as e:
         print(f"Error fitting ARIMA model for lot {lot_id}: {e}")
+        return None
+
+
+@contextmanager
+def _fit_lock():
+    """Held while fitting ARIMA models, across threads and every worker process sharing the database.
+
+    Holders re-read the model store once they have the lock, so models are
+    fitted once however many workers, warm-ups and snapshot jobs need them.
+    """
+    with _fit_thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(_FIT_LOCK_PATH, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _fit_arima_model(lot_id: int, hourly_data: Optional[List[float]] = None) -> None:
+    if hourly_data is None:
+        hourly_data = _get_hourly_data(lot_id)
+    _FORECASTERS["arima"].fit_lot(lot_id, hourly_data)
+
+
+def _is_model_fresh(model: model_store.CompactArimaModel) -> bool:
+    try:
+        return datetime.now() - datetime.fromisoformat(model.fitted_at) < _MODEL_MAX_AGE
+    except (TypeError, ValueError):
+        return False
+
+
+def _get_arima_model(lot_id: int) -> Optional[model_store.CompactArimaModel]:
+    """Return the lot's model, loading it from the model store or fitting it on first use."""
+    model = _arima_models.get(lot_id)
+    if model is not None and _is_model_fresh(model):
+        return model
+
+    model = model_store.load_model(lot_id)
+    if model is not None and _is_model_fresh(model):
+        _arima_models[lot_id] = model
+        return model
+
+    with _fit_lock():
+        model = model_store.load_model(lot_id)
+        if model is not None and _is_model_fresh(model):
+            _arima_models[lot_id] = model
+            return model
+        _fit_arima_model(lot_id)
+    return _arima_models.get(lot_id)
 
 
 def _predict_parking_lot_occupancy(lot_id: int, timestamp: datetime) -> float:
     global _arima_models
     
     current_capacity = _get_current_capacity(lot_id)
+    model_fit = _get_arima_model(lot_id)
     
-    if lot_id not in _arima_models:
-        _fit_arima_model(lot_id)
-    
-    if lot_id in _arima_models:
+    if model_fit is not None:
         try:
-            model_fit = _arima_models[lot_id]
             hours_ahead = int((timestamp - datetime.now()).total_seconds() / 3600)
             forecast = model_fit.forecast(steps=hours_ahead+1)
             predicted_occupancy = forecast[-1]
@@ -125,7 +303,12 @@ def _predict_parking_lot_occupancy(lot_id: int, timestamp: datetime) -> float:
             print(f"Error predicting with ARIMA for lot {lot_id}: {e}")
     
     historical_data = _get_historical_data(lot_id)
-    
+    return _predict_from_history(timestamp, current_capacity, historical_data)
+
+
+def _predict_from_history(
+    timestamp: datetime, current_capacity: Dict, historical_data: List[Dict]
+) -> float:
     if not historical_data:
         if current_capacity["capacity"] > 0:
             return current_capacity["reserved_slots"] / current_capacity["capacity"]
@@ -163,6 +346,296 @@ def _predict_parking_lot_occupancy(lot_id: int, timestamp: datetime) -> float:
     return min(1.0, predicted_occupancy)
 
 
+def _hour_of_week(timestamp: datetime) -> int:
+    # Sunday-based like SQLite's strftime('%w')
+    return int(timestamp.strftime("%w")) * 24 + timestamp.hour
+
+
+class Forecaster(ABC):
+    """Interface for occupancy forecasting backends.
+
+    ``forecast`` returns a lots x hours array of occupancy rates in [0, 1]
+    starting at ``start_time``. ``capacities`` maps each lot to its
+    ``capacity``/``reserved_slots`` row as returned by ``_get_bulk_capacity``.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def fit(self, lot_ids: List[int], capacities: Dict[int, Dict], until: Optional[datetime] = None) -> None:
+        ...
+
+    @abstractmethod
+    def forecast(
+        self, lot_ids: List[int], start_time: datetime, hours_ahead: int, capacities: Dict[int, Dict]
+    ) -> np.ndarray:
+        ...
+
+    def observe(self, lot_id: int, timestamp: datetime, delta: int) -> None:
+        """Update online state after a reservation is created (+1) or cancelled (-1)."""
+        pass
+
+
+class ArimaForecaster(Forecaster):
+    """Per-lot ARIMA(1,0,1) models, falling back to the historical average when a lot cannot be fitted."""
+
+    name = "arima"
+
+    def __init__(self, models: Optional[Dict[int, model_store.CompactArimaModel]] = None, persist: bool = True):
+        self.models = _arima_models if models is None else models
+        self.persist = persist
+        self.history_until: Optional[datetime] = None
+
+    def fit_lot(self, lot_id: int, hourly_data: List[float]) -> None:
+        model = _fit_compact_arima(lot_id, hourly_data)
+        if model is None:
+            return
+        self.models[lot_id] = model
+        if self.persist:
+            model_store.save_model(lot_id, model)
+
+    def fit(self, lot_ids: List[int], capacities: Dict[int, Dict], until: Optional[datetime] = None) -> None:
+        if not lot_ids:
+            return
+        if until is not None:
+            self.history_until = until
+        hourly = _get_bulk_hourly_data(lot_ids, capacities, until=until)
+
+        with ThreadPoolExecutor(max_workers=min(_BULK_FORECAST_WORKERS, len(lot_ids))) as pool:
+            list(pool.map(lambda lot_id: self.fit_lot(lot_id, hourly[lot_id]), lot_ids))
+
+    def _has_fresh_model(self, lot_id: int) -> bool:
+        return lot_id in self.models and _is_model_fresh(self.models[lot_id])
+
+    def _load_stored(self, lot_ids: List[int]) -> List[int]:
+        """Load fresh stored models for lots without one in memory; returns the lots still missing."""
+        unloaded = [lot_id for lot_id in lot_ids if not self._has_fresh_model(lot_id)]
+        if unloaded:
+            for lot_id, model in model_store.load_models(unloaded).items():
+                if _is_model_fresh(model):
+                    self.models[lot_id] = model
+        return [lot_id for lot_id in unloaded if not self._has_fresh_model(lot_id)]
+
+    def forecast(
+        self, lot_ids: List[int], start_time: datetime, hours_ahead: int, capacities: Dict[int, Dict]
+    ) -> np.ndarray:
+        if self.persist and self._load_stored(lot_ids):
+            with _fit_lock():
+                # Whoever held the lock before may have fitted and stored them meanwhile
+                self.fit(self._load_stored(lot_ids), capacities)
+
+        unmodelled = [lot_id for lot_id in lot_ids if lot_id not in self.models]
+        historical = _get_bulk_historical_data(unmodelled, until=self.history_until) if unmodelled else {}
+
+        rates = np.empty((len(lot_ids), hours_ahead))
+        for row, lot_id in enumerate(lot_ids):
+            model = self.models.get(lot_id)
+            if model is not None:
+                try:
+                    rates[row] = model.forecast(steps=hours_ahead)
+                    continue
+                except Exception as e:
+                    print(f"Error predicting with ARIMA for lot {lot_id}: {e}")
+
+            lot_history = historical.get(lot_id, [])
+            rates[row] = [
+                _predict_from_history(start_time + timedelta(hours=hour), capacities[lot_id], lot_history)
+                for hour in range(hours_ahead)
+            ]
+
+        return np.clip(rates, 0.0, 1.0)
+
+
+class SeasonalForecaster(Forecaster):
+    """Hour-of-week seasonal profile blended with current occupancy.
+
+    Each lot keeps a 168-slot profile of reservations per hour of the week
+    relative to capacity, an exponentially smoothed weekly average. New and
+    cancelled reservations update it online, so forecasting is a vectorized
+    lookup with no model fitting.
+    """
+
+    name = "seasonal"
+
+    def __init__(
+        self,
+        days_back: int = _SEASONAL_DAYS_BACK,
+        smoothing: float = _SEASONAL_SMOOTHING,
+        current_weight: float = _SEASONAL_CURRENT_WEIGHT,
+        current_decay: float = _SEASONAL_CURRENT_DECAY,
+    ):
+        self.days_back = days_back
+        self.smoothing = smoothing
+        self.current_weight = current_weight
+        self.current_decay = current_decay
+        self.profiles: Dict[int, np.ndarray] = {}
+        self.profile_weeks: Dict[int, np.ndarray] = {}
+        self.capacities: Dict[int, int] = {}
+        self.fitted_at: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+
+    def fit(self, lot_ids: List[int], capacities: Dict[int, Dict], until: Optional[datetime] = None) -> None:
+        if not lot_ids:
+            return
+        until = until or datetime.now()
+        historical = _get_bulk_historical_data(lot_ids, days_back=self.days_back, until=until)
+        weeks = self.days_back / 7
+
+        for lot_id in lot_ids:
+            capacity = max(1, capacities[lot_id]["capacity"])
+            profile = np.zeros(168)
+            for d in historical.get(lot_id, []):
+                profile[int(d["day_of_week"]) * 24 + int(d["hour_of_day"])] += d["reservation_count"]
+
+            with self._lock:
+                self.profiles[lot_id] = profile / (weeks * capacity)
+                self.profile_weeks[lot_id] = np.full(168, until.toordinal() // 7)
+                self.capacities[lot_id] = capacity
+                self.fitted_at[lot_id] = datetime.now()
+
+    def _is_fresh(self, lot_id: int) -> bool:
+        fitted_at = self.fitted_at.get(lot_id)
+        return fitted_at is not None and datetime.now() - fitted_at < _MODEL_MAX_AGE
+
+    def forecast(
+        self, lot_ids: List[int], start_time: datetime, hours_ahead: int, capacities: Dict[int, Dict]
+    ) -> np.ndarray:
+        self.fit([lot_id for lot_id in lot_ids if not self._is_fresh(lot_id)], capacities)
+
+        slots = (_hour_of_week(start_time) + np.arange(hours_ahead)) % 168
+        with self._lock:
+            seasonal = np.vstack([self.profiles[lot_id] for lot_id in lot_ids])[:, slots]
+
+        current = np.array([
+            capacities[lot_id]["reserved_slots"] / max(1, capacities[lot_id]["capacity"])
+            for lot_id in lot_ids
+        ])[:, None]
+        weight = self.current_weight * self.current_decay ** np.arange(hours_ahead)
+
+        return np.clip((1 - weight) * seasonal + weight * current, 0.0, 1.0)
+
+    def observe(self, lot_id: int, timestamp: datetime, delta: int) -> None:
+        with self._lock:
+            profile = self.profiles.get(lot_id)
+            if profile is None:
+                return
+
+            slot = _hour_of_week(timestamp)
+            week = timestamp.toordinal() // 7
+            weeks_elapsed = week - self.profile_weeks[lot_id][slot]
+            if weeks_elapsed > 0:
+                profile[slot] *= (1 - self.smoothing) ** weeks_elapsed
+                self.profile_weeks[lot_id][slot] = week
+
+            profile[slot] = max(0.0, profile[slot] + self.smoothing * delta / self.capacities[lot_id])
+
+
+FORECASTER_BACKENDS = {
+    ArimaForecaster.name: ArimaForecaster,
+    SeasonalForecaster.name: SeasonalForecaster,
+}
+_FORECASTERS: Dict[str, Forecaster] = {name: backend() for name, backend in FORECASTER_BACKENDS.items()}
+
+
+def _parse_lot_backends(value: str) -> Dict[int, str]:
+    lot_backends = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        lot_id, _, backend = item.partition(":")
+        lot_backends[int(lot_id)] = backend.strip()
+    return lot_backends
+
+
+# FORECAST_LOT_BACKENDS sets per-lot defaults; choices made at runtime are stored in the
+# forecast_backends table, which every worker re-reads every few seconds.
+_env_lot_backends: Dict[int, str] = _parse_lot_backends(os.environ.get("FORECAST_LOT_BACKENDS", ""))
+_lot_backends: Dict[int, str] = dict(_env_lot_backends)
+_BACKEND_SYNC_INTERVAL = 5  # seconds
+_last_backend_sync = 0.0
+
+
+def _sync_lot_backends(force: bool = False) -> None:
+    global _lot_backends, _last_backend_sync
+
+    now = time.time()
+    if not force and now - _last_backend_sync < _BACKEND_SYNC_INTERVAL:
+        return
+    _last_backend_sync = now
+
+    try:
+        rows = execute_query("SELECT parkingLotID, backend FROM forecast_backends")
+    except Exception as e:
+        print(f"Error loading forecast backends: {e}")
+        return
+
+    lot_backends = dict(_env_lot_backends)
+    lot_backends.update({row["parkingLotID"]: row["backend"] for row in rows})
+    if lot_backends != _lot_backends:
+        _lot_backends = lot_backends
+        # Cached forecasts were made with the previous backends
+        _forecast_cache.clear()
+
+
+def get_forecast_backend(lot_id: int) -> str:
+    _sync_lot_backends()
+    return _lot_backends.get(lot_id, DEFAULT_FORECAST_BACKEND)
+
+
+def set_forecast_backend(lot_id: int, backend: Optional[str]) -> None:
+    """Select the forecasting backend for one lot; None restores the default."""
+    if backend is not None and backend not in FORECASTER_BACKENDS:
+        raise ValueError(f"backend must be one of {list(FORECASTER_BACKENDS)}")
+    if backend is None:
+        execute_write_query("DELETE FROM forecast_backends WHERE parkingLotID = ?", (lot_id,))
+    else:
+        execute_write_query(
+            "INSERT OR REPLACE INTO forecast_backends (parkingLotID, backend) VALUES (?, ?)", (lot_id, backend)
+        )
+    _sync_lot_backends(force=True)
+
+
+def observe_reservation(lot_id: int, start_time: datetime, delta: int) -> None:
+    for forecaster in _FORECASTERS.values():
+        try:
+            forecaster.observe(lot_id, start_time, delta)
+        except Exception as e:
+            print(f"Error updating {forecaster.name} forecaster for lot {lot_id}: {e}")
+
+
+def _forecast_rates(
+    lot_ids: List[int],
+    start_time: datetime,
+    hours_ahead: int,
+    capacities: Dict[int, Dict],
+    backend: Optional[str] = None,
+) -> np.ndarray:
+    """Occupancy rates for each lot and hour, grouping lots by their forecasting backend."""
+    rates = np.zeros((len(lot_ids), hours_ahead))
+    groups: Dict[str, List[int]] = {}
+    for row, lot_id in enumerate(lot_ids):
+        groups.setdefault(backend or get_forecast_backend(lot_id), []).append(row)
+
+    for name, rows in groups.items():
+        forecaster = _FORECASTERS.get(name)
+        if forecaster is None:
+            raise ValueError(f"Unknown forecasting backend: {name}")
+        rates[rows] = forecaster.forecast([lot_ids[row] for row in rows], start_time, hours_ahead, capacities)
+
+    return rates
+
+
+def _forecast_entry(forecast_time: datetime, occupancy_rate: float, capacity: int) -> Dict:
+    predicted_occupied = round(occupancy_rate * capacity)
+    predicted_available = max(0, capacity - predicted_occupied)
+
+    return {
+        "timestamp": forecast_time.isoformat(),
+        "occupancy_rate": round(occupancy_rate * 100, 1),
+        "predicted_occupied": predicted_occupied,
+        "predicted_available": predicted_available,
+        "congestion_level": get_congestion_level(occupancy_rate),
+    }
+
+
 def get_parking_lot_forecast(lot_id: int, hours_ahead: int = 12) -> List[Dict]:
     global _forecast_cache, _last_forecast_update
 
@@ -173,27 +646,17 @@ def get_parking_lot_forecast(lot_id: int, hours_ahead: int = 12) -> List[Dict]:
         cache_key in _forecast_cache
         and (current_time - _last_forecast_update).total_seconds() < _FORECAST_CACHE_TTL
     ):
+        metrics.forecast_cache("forecast", hit=True)
         return _forecast_cache[cache_key]
+    metrics.forecast_cache("forecast", hit=False)
 
-    forecast = []
     current_capacity = _get_current_capacity(lot_id)
 
-    for hour in range(hours_ahead):
-        forecast_time = current_time + timedelta(hours=hour)
-        occupancy_rate = _predict_parking_lot_occupancy(lot_id, forecast_time)
-
-        predicted_occupied = round(occupancy_rate * current_capacity["capacity"])
-        predicted_available = max(0, current_capacity["capacity"] - predicted_occupied)
-
-        forecast.append(
-            {
-                "timestamp": forecast_time.isoformat(),
-                "occupancy_rate": round(occupancy_rate * 100, 1),
-                "predicted_occupied": predicted_occupied,
-                "predicted_available": predicted_available,
-                "congestion_level": get_congestion_level(occupancy_rate),
-            }
-        )
+    rates = _forecast_rates([lot_id], current_time, hours_ahead, {lot_id: current_capacity})[0]
+    forecast = [
+        _forecast_entry(current_time + timedelta(hours=hour), float(rate), current_capacity["capacity"])
+        for hour, rate in enumerate(rates)
+    ]
 
     _forecast_cache[cache_key] = forecast
     _last_forecast_update = current_time
@@ -201,6 +664,72 @@ def get_parking_lot_forecast(lot_id: int, hours_ahead: int = 12) -> List[Dict]:
     return forecast
 
 
+def get_bulk_forecast(
+    lot_ids: Optional[List[int]] = None,
+    campus: Optional[str] = None,
+    hours_ahead: int = 12,
+    backend: Optional[str] = None,
+) -> Dict:
+    """Forecast many lots at once as a dense lots x hours matrix.
+
+    History and capacity are read with one query each for the whole set of
+    lots, and missing ARIMA models are fitted in parallel. ``backend``
+    overrides the per-lot forecasting backend selection.
+    """
+    current_time = datetime.now()
+    capacities = _get_bulk_capacity(lot_ids, campus)
+
+    if lot_ids is None:
+        ordered_ids = list(capacities)
+    else:
+        ordered_ids = [lot_id for lot_id in dict.fromkeys(lot_ids) if lot_id in capacities]
+
+    timestamps = [current_time + timedelta(hours=hour) for hour in range(hours_ahead)]
+    result = {
+        "lot_ids": ordered_ids,
+        "timestamps": [t.isoformat() for t in timestamps],
+        "capacity": [capacities[lot_id]["capacity"] for lot_id in ordered_ids],
+        "occupancy_rate": [],
+        "predicted_occupied": [],
+        "predicted_available": [],
+        "congestion_level": [],
+    }
+    if not ordered_ids:
+        return result
+
+    rates = _forecast_rates(ordered_ids, current_time, hours_ahead, capacities, backend)
+
+    capacity = np.array(result["capacity"], dtype=float)[:, None]
+    predicted_occupied = np.round(rates * capacity)
+    predicted_available = np.maximum(0, capacity - predicted_occupied)
+
+    result["occupancy_rate"] = np.round(rates * 100, 1).tolist()
+    result["predicted_occupied"] = predicted_occupied.astype(int).tolist()
+    result["predicted_available"] = predicted_available.astype(int).tolist()
+    result["congestion_level"] = [
+        [get_congestion_level(rate) for rate in row] for row in rates.tolist()
+    ]
+
+    return result
+
+
+def split_bulk_forecast(bulk: Dict) -> Dict[int, List[Dict]]:
+    timestamps = bulk["timestamps"]
+    return {
+        lot_id: [
+            {
+                "timestamp": timestamps[hour],
+                "occupancy_rate": bulk["occupancy_rate"][row][hour],
+                "predicted_occupied": bulk["predicted_occupied"][row][hour],
+                "predicted_available": bulk["predicted_available"][row][hour],
+                "congestion_level": bulk["congestion_level"][row][hour],
+            }
+            for hour in range(len(timestamps))
+        ]
+        for row, lot_id in enumerate(bulk["lot_ids"])
+    }
+
+
 def get_congestion_level(occupancy_rate: float) -> str:
     if occupancy_rate < 0.3:
         return "Low"
@@ -214,7 +743,10 @@ def get_congestion_level(occupancy_rate: float) -> str:
 
 def get_best_parking_time(lot_id: int, time_window_hours: int = 24) -> Dict:
     forecast = get_parking_lot_forecast(lot_id, time_window_hours)
+    return best_time_from_forecast(forecast)
+
 
+def best_time_from_forecast(forecast: List[Dict]) -> Dict:
     if len(forecast) > 1:
         forecast = forecast[1:]
 
@@ -228,10 +760,31 @@ def get_best_parking_time(lot_id: int, time_window_hours: int = 24) -> Dict:
     }
 
 
-def get_daily_pattern(lot_id: int, day_of_week: Optional[int] = None) -> Dict:
+def _get_random_variation_factors(lot_id: int) -> np.ndarray:
+    """Deterministic day-of-week x hour variation factors for a lot's synthetic load.
+
+    Drawn once per lot from its own Generator, so concurrent requests never
+    touch the global NumPy RNG.
+    """
+    factors = _random_variation_factors.get(lot_id)
+    if factors is None:
+        rng = np.random.default_rng(lot_id)
+        factors = 1 + rng.uniform(-_RANDOM_VARIATION, _RANDOM_VARIATION, size=(7, 24))
+        factors.setflags(write=False)
+        _random_variation_factors[lot_id] = factors
+    return factors
+
+
+def get_daily_pattern(
+    lot_id: int, day_of_week: Optional[int] = None, random_mode: Optional[bool] = None
+) -> Dict:
     current_time = datetime.now()
     if day_of_week is None:
         day_of_week = int(current_time.strftime("%w"))
+    if random_mode is None:
+        random_mode = RANDOM_MODE
+    if random_mode:
+        random_factors = _get_random_variation_factors(lot_id)[day_of_week]
     
     historical_data = _get_historical_data(lot_id, days_back=60)
     day_data = [d for d in historical_data if int(d["day_of_week"]) == day_of_week]
@@ -286,13 +839,8 @@ def get_daily_pattern(lot_id: int, day_of_week: Optional[int] = None) -> Dict:
         forecast_time = target_date.replace(hour=hour, minute=0, second=0)
         
         if occupancy_rate > 0.01:
-            if RANDOM_MODE:
-                variation = 0.15
-                seed_val = (lot_id * 1000) + (day_of_week * 100) + hour
-                np.random.seed(seed_val)
-                
-                random_factor = 1 + (np.random.random() * variation * 2 - variation)
-                forecast_rate = min(1.0, max(0.0, occupancy_rate * random_factor))
+            if random_mode:
+                forecast_rate = min(1.0, max(0.0, occupancy_rate * random_factors[hour]))
             else:
                 forecast_rate = min(1.0, occupancy_rate * 1.03)
         else:
@@ -468,23 +1016,32 @@ def save_forecasting_models():
     if not _arima_models:
         return
         
-    model_dir = Path("models")
-    model_dir.mkdir(exist_ok=True)
-    
-    with open(model_dir / "arima_models.pkl", "wb") as f:
-        pickle.dump(_arima_models, f)
+    try:
+        model_store.save_models(_arima_models)
+    except Exception as e:
+        print(f"Error saving forecasting models: {e}")
 
 
 def load_forecasting_models():
+    """Prepare the model store. Models themselves are loaded per lot on first use."""
     global _arima_models
     
-    model_dir = Path("models")
-    model_path = model_dir / "arima_models.pkl"
-    
-    if model_path.exists():
-        try:
-            with open(model_path, "rb") as f:
-                _arima_models = pickle.load(f)
-        except Exception as e:
-            print(f"Error loading ARIMA models: {e}")
-            _arima_models = {}
\ No newline at end of file
+    _arima_models.clear()
+
+    if _LEGACY_MODEL_PATH.exists():
+        _migrate_legacy_models(_LEGACY_MODEL_PATH)
+
+
+def _migrate_legacy_models(model_path: Path):
+    try:
+        with open(model_path, "rb") as f:
+            legacy_models = pickle.load(f)
+
+        model_store.save_models({
+            lot_id: model_store.CompactArimaModel.from_results(model_fit)
+            for lot_id, model_fit in legacy_models.items()
+        })
+        model_path.rename(model_path.with_suffix(".pkl.migrated"))
+        print(f"Migrated {len(legacy_models)} ARIMA models to the model store")
+    except Exception as e:
+        print(f"Error migrating legacy ARIMA models: {e}")
@@ -0,0 +1,185 @@
+"""Road graph and lot index as memory-mapped arrays shared by all workers.
+
+By default every worker builds its own networkx graph and GeoDataFrame in
+pathfinder, so memory grows with the worker count. When GRAPH_STORE_DIR is
+set, the graph is exported once (``python graph_store.py`` or gunicorn's
+``on_starting`` hook, see gunicorn.conf.py) as flat arrays: node IDs and
+coordinates, a CSR adjacency matrix with edge lengths, and the lot polygons'
+names and centroids. Workers open the arrays with ``mmap_mode="r"``, so the
+pages live once in the OS page cache, and route with scipy's C Dijkstra
+instead of networkx. A single search from the start node serves every lot
+that /parking/nearest asks about.
+
+    python graph_store.py --out graph_cache
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+import metrics
+
+GRAPH_STORE_DIR = os.environ.get("GRAPH_STORE_DIR")
+_POLYGON_FILE = Path(__file__).parent / "polygon.parquet"
+_ARRAYS = ("node_ids", "node_x", "node_y", "indptr", "indices", "weights")
+
+
+def export_graph(graph, gdf_polygon, directory: str) -> Dict:
+    """Write the undirected road graph and lot index built by pathfinder to ``directory``."""
+    node_ids = np.array(sorted(graph.nodes), dtype=np.int64)
+    positions = {node: i for i, node in enumerate(node_ids.tolist())}
+    node_x = np.array([graph.nodes[node].get("x", np.nan) for node in node_ids.tolist()], dtype=np.float64)
+    node_y = np.array([graph.nodes[node].get("y", np.nan) for node in node_ids.tolist()], dtype=np.float64)
+
+    # Parallel edges collapse to the shortest, as networkx does for path weights
+    lengths: Dict[Tuple[int, int], float] = {}
+    for u, v, data in graph.edges(data=True):
+        length = float(data.get("length", data.get("weight", 0.001)))
+        for a, b in ((positions[u], positions[v]), (positions[v], positions[u])):
+            if length < lengths.get((a, b), float("inf")):
+                lengths[(a, b)] = length
+
+    rows = np.fromiter((a for a, _ in lengths), dtype=np.int32, count=len(lengths))
+    cols = np.fromiter((b for _, b in lengths), dtype=np.int32, count=len(lengths))
+    weights = np.fromiter(lengths.values(), dtype=np.float64, count=len(lengths))
+    matrix = csr_matrix((weights, (rows, cols)), shape=(len(node_ids), len(node_ids)))
+    matrix.sort_indices()
+
+    lots = [
+        {"index": int(index), "Name": row["Name"], "X": float(row["X"]), "Y": float(row["Y"])}
+        for index, row in gdf_polygon.iterrows()
+    ]
+    meta = {"builtAt": time.time(), "nodes": len(node_ids), "edges": len(lengths) // 2}
+
+    # Written next to the target and swapped in, so readers never see a partial export
+    tmp_directory = f"{directory}.tmp"
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+    arrays = {
+        "node_ids": node_ids,
+        "node_x": node_x,
+        "node_y": node_y,
+        "indptr": matrix.indptr.astype(np.int32),
+        "indices": matrix.indices.astype(np.int32),
+        "weights": matrix.data,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_directory, f"{name}.npy"), array)
+    with open(os.path.join(tmp_directory, "lots.json"), "w") as f:
+        json.dump(lots, f)
+    with open(os.path.join(tmp_directory, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_directory, directory)
+    return meta
+
+
+def is_current(directory: str) -> bool:
+    meta_file = os.path.join(directory, "meta.json")
+    if not os.path.exists(meta_file):
+        return False
+    with open(meta_file) as f:
+        built_at = json.load(f)["builtAt"]
+    return not _POLYGON_FILE.exists() or _POLYGON_FILE.stat().st_mtime <= built_at
+
+
+def build(directory: str, force: bool = False) -> Optional[Dict]:
+    """Build the road graph with pathfinder and export it, unless a current export exists."""
+    import pathfinder
+
+    if not force and is_current(directory):
+        return None
+    graph, gdf_polygon = pathfinder._load_road_graph()
+    meta = export_graph(graph, gdf_polygon, directory)
+    # The exporting process has no further use for the networkx copy
+    pathfinder._graph_cache = None
+    pathfinder._polygon_gdf_cache = None
+    return meta
+
+
+class SharedGraph:
+    """Read-only routing over an exported graph; same interface as pathfinder's networkx router."""
+
+    def __init__(self, directory: str):
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+        self.node_ids = arrays["node_ids"]
+        self.x = arrays["node_x"]
+        self.y = arrays["node_y"]
+        size = len(self.node_ids)
+        self.matrix = csr_matrix((arrays["weights"], arrays["indices"], arrays["indptr"]), shape=(size, size), copy=False)
+        self._cos_lat = np.cos(np.radians(np.nanmean(self.y))) if size else 1.0
+
+        with open(os.path.join(directory, "lots.json")) as f:
+            lots = json.load(f)
+        self.lots = pd.DataFrame(
+            {"Name": [lot["Name"] for lot in lots], "X": [lot["X"] for lot in lots], "Y": [lot["Y"] for lot in lots]},
+            index=[lot["index"] for lot in lots],
+        )
+
+    def _position(self, node) -> int:
+        position = int(np.searchsorted(self.node_ids, node))
+        if position == len(self.node_ids) or self.node_ids[position] != node:
+            # searchsorted only gives the insertion point; raise like nx.astar_path
+            raise nx.NodeNotFound(f"Node {node} is not in the graph")
+        return position
+
+    def nearest_node(self, lng: float, lat: float):
+        # Equirectangular distance is exact enough at campus scale
+        d2 = ((self.x - lng) * self._cos_lat) ** 2 + (self.y - lat) ** 2
+        return int(self.node_ids[int(np.nanargmin(d2))])
+
+    def routes(self, start, ends: Iterable, search: str) -> Dict:
+        """Shortest path and length from ``start`` to each of ``ends``, None where unreachable."""
+        ends = list(ends)
+        origin = self._position(start)
+        distances, predecessors = dijkstra(self.matrix, indices=origin, return_predecessors=True)
+        metrics.observe_search(search, int(np.isfinite(distances).sum()))
+
+        results = {}
+        for end in ends:
+            target = self._position(end)
+            if not np.isfinite(distances[target]):
+                results[end] = None
+                continue
+            path = [target]
+            while path[-1] != origin:
+                path.append(int(predecessors[path[-1]]))
+            path.reverse()
+            results[end] = (path, float(distances[target]))
+        return results
+
+    def route(self, start, end, search: str) -> Optional[Tuple[List[int], float]]:
+        return self.routes(start, [end], search)[end]
+
+    def coords(self, path: List[int]) -> List[Dict]:
+        return [
+            {"lat": float(self.y[position]), "lng": float(self.x[position])}
+            for position in path
+            if not (np.isnan(self.x[position]) or np.isnan(self.y[position]))
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the road graph and lot index for shared use by workers")
+    parser.add_argument("--out", default=GRAPH_STORE_DIR or "graph_cache", help="Directory to write")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the export is current")
+    args = parser.parse_args()
+
+    meta = build(args.out, force=args.force)
+    if meta is None:
+        print(f"{args.out} is current, nothing to do")
+    else:
+        print(f"Exported {meta['nodes']} nodes and {meta['edges']} edges to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Gunicorn settings for multi-worker deployments.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app is imported once in the master (preload_app) and the road graph is
+exported to GRAPH_STORE_DIR before the workers fork, so every worker routes
+over the same memory-mapped arrays instead of building its own networkx
+graph. The modules main defers (geo and statistics stacks) are imported in
+the master too. Everything the master imports is shared copy-on-write with
+the workers; gc.freeze() keeps the collector from touching, and so copying,
+those pages.
+"""
+import gc
+import os
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Must be set before the app is imported, graph_store reads it at import time
+os.environ.setdefault("GRAPH_STORE_DIR", os.path.join(BACKEND_DIR, "graph_cache"))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
+
+
+def on_starting(server):
+    import graph_store
+    import warmup
+
+    # Shared copy-on-write with the workers, whose own warm-up then finds them loaded
+    warmup.import_deferred_modules()
+
+    try:
+        meta = graph_store.build(graph_store.GRAPH_STORE_DIR)
+        if meta is not None:
+            server.log.info("Exported road graph: %d nodes, %d edges", meta["nodes"], meta["edges"])
+    except Exception as e:
+        # Workers inherit this and fall back to a networkx graph each
+        server.log.error("Road graph export failed, workers will build their own graphs: %s", e)
+        graph_store.GRAPH_STORE_DIR = None
+    gc.collect()
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    import metrics
+
+    # Covers workers that were killed before their own shutdown removed it
+    metrics.remove_worker_file(worker.pid)
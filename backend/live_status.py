@@ -0,0 +1,148 @@
+"""In-memory live-status snapshot for the /parking/live-status endpoints.
+
+The snapshot holds every lot's occupancy, pre-serialized to JSON bytes
+together with an ETag, and is rebuilt only after ``invalidate`` is called
+(reservation create/cancel and lot creation do this) or, to pick up changes
+made by other workers, once it is older than LIVE_STATUS_MAX_AGE and the
+underlying rows differ. Campus views, looked up through campus_index, are
+serialized once per snapshot.
+"""
+from datetime import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import campus_index
+from db_manager import execute_query
+
+LIVE_STATUS_MAX_AGE = float(os.environ.get("LIVE_STATUS_MAX_AGE", 5))  # seconds
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_invalidated = True
+
+
+class LiveStatusSnapshot:
+    def __init__(self, rows: List[Dict], fingerprint: str):
+        self.fingerprint = fingerprint
+        self.checked_at = time.monotonic()
+        self.generated_at = datetime.now().isoformat()
+        self.lots = [self._lot_status(row) for row in rows]
+        self.lots_by_id = {lot["parkingLotID"]: lot for lot in self.lots}
+
+        self._payloads: Dict[str, Tuple[bytes, str]] = {}
+        self._payload_lock = threading.Lock()
+
+    def _lot_status(self, lot: Dict) -> Dict:
+        capacity = lot["capacity"]
+        reserved = min(lot["reserved_slots"], capacity)
+        occupancy_percentage = (reserved / capacity * 100) if capacity > 0 else 0
+
+        return {
+            "parkingLotID": lot["parkingLotID"],
+            "name": lot["name"],
+            "location": lot["location"],
+            "totalSpots": capacity,
+            "occupiedSpots": reserved,
+            "availableSpots": max(0, capacity - reserved),
+            "occupancyPercentage": round(occupancy_percentage, 1),
+            "status": _status_for(occupancy_percentage),
+            "lastUpdated": self.generated_at,
+        }
+
+    def _campus_view(self, campus: str) -> Optional[List[Dict]]:
+        lots = [self.lots_by_id[lot_id] for lot_id in campus_index.lot_ids(campus) if lot_id in self.lots_by_id]
+        if not lots:
+            return None
+
+        total_capacity = sum(lot["totalSpots"] for lot in lots)
+        total_reserved = sum(lot["occupiedSpots"] for lot in lots)
+        campus_occupancy = (total_reserved / total_capacity * 100) if total_capacity > 0 else 0
+
+        summary = {
+            "location": campus_index.campus_name(campus),
+            "totalSpots": total_capacity,
+            "occupiedSpots": total_reserved,
+            "availableSpots": total_capacity - total_reserved,
+            "occupancyPercentage": round(campus_occupancy, 1),
+            "status": _status_for(campus_occupancy),
+            "lastUpdated": self.generated_at,
+            "lotCount": len(lots),
+            "busyLots": sum(1 for lot in lots if lot["status"] == "Busy"),
+            "moderateLots": sum(1 for lot in lots if lot["status"] == "Moderate"),
+            "availableLots": sum(1 for lot in lots if lot["status"] == "Available"),
+        }
+        return lots + [summary]
+
+    def _payload(self, key: str, build) -> Optional[Tuple[bytes, str]]:
+        payload = self._payloads.get(key)
+        if payload is not None:
+            return payload
+
+        data = build()
+        if data is None:
+            return None
+        body = json.dumps(data, separators=(",", ":")).encode()
+        payload = (body, f'"{hashlib.sha1(body).hexdigest()[:20]}"')
+        with self._payload_lock:
+            self._payloads[key] = payload
+        return payload
+
+    def all_lots(self) -> Tuple[bytes, str]:
+        return self._payload("all", lambda: self.lots)
+
+    def lot(self, lot_id: int) -> Optional[Tuple[bytes, str]]:
+        return self._payload(f"lot:{lot_id}", lambda: self.lots_by_id.get(lot_id))
+
+    def campus(self, campus: str) -> Optional[Tuple[bytes, str]]:
+        return self._payload(f"campus:{campus.lower()}", lambda: self._campus_view(campus))
+
+
+def _status_for(occupancy_percentage: float) -> str:
+    if occupancy_percentage > 80:
+        return "Busy"
+    if occupancy_percentage > 50:
+        return "Moderate"
+    return "Available"
+
+
+def _load_rows() -> Tuple[List[Dict], str]:
+    rows = execute_query(
+        "SELECT parkingLotID, name, location, capacity, reserved_slots FROM parking_lots ORDER BY parkingLotID"
+    )
+    fingerprint = hashlib.sha1(
+        json.dumps([list(row.values()) for row in rows]).encode()
+    ).hexdigest()
+    return rows, fingerprint
+
+
+def invalidate() -> None:
+    """Mark the snapshot stale; the next read rebuilds it."""
+    global _invalidated
+    _invalidated = True
+
+
+def get_snapshot() -> LiveStatusSnapshot:
+    global _snapshot, _invalidated
+
+    snapshot = _snapshot
+    if snapshot is not None and not _invalidated and time.monotonic() - snapshot.checked_at < LIVE_STATUS_MAX_AGE:
+        return snapshot
+
+    with _snapshot_lock:
+        snapshot = _snapshot
+        if snapshot is not None and not _invalidated and time.monotonic() - snapshot.checked_at < LIVE_STATUS_MAX_AGE:
+            return snapshot
+
+        _invalidated = False
+        rows, fingerprint = _load_rows()
+        if snapshot is not None and snapshot.fingerprint == fingerprint:
+            # Nothing changed, keep the serialized payloads and their ETags
+            snapshot.checked_at = time.monotonic()
+        else:
+            snapshot = LiveStatusSnapshot(rows, fingerprint)
+            _snapshot = snapshot
+        return snapshot
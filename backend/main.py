@@ -1,42 +1,81 @@
-from fastapi import FastAPI, HTTPException, Depends, Request, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Request, BackgroundTasks, Query
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
 from pydantic import BaseModel, EmailStr, constr, validator, Field
 from typing import List, Optional, Union, Dict, Any
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
 import sqlite3
-import uvicorn
+import hmac
 import json
 import jwt
-from passlib.context import CryptContext
-import pathfinder
 import forecasting
-from db_manager import get_db_connection, execute_query, execute_write_query
+from db_manager import DB_PATH, TimedConnection, get_db_connection, execute_query, execute_write_query, slow_query_stats
 import asyncio
 import os
 from contextlib import asynccontextmanager
 import feedback_handler
+import forecast_snapshot
+import auth
+import credentials
+import token_service
+import admission
+import live_status
+import availability_stream
+import campus_index
+import data_export
+import map_payload
+import fast_json
+import metrics
+import pagination
+import profiler
+import warmup
+
+DATABASE = DB_PATH
+SYNTHETIC_LOAD_TENANTS = {
+    tenant.strip()
+    for tenant in os.environ.get("SYNTHETIC_LOAD_TENANTS", "").split(",")
+    if tenant.strip()
+}
 
-DATABASE = "parking.db"
-SECRET_KEY = "SECRET"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
+FORECAST_SNAPSHOT_ENABLED = os.environ.get("FORECAST_SNAPSHOT_ENABLED", "1") == "1"
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    init_db()
+    auth.refresh_admin_ids()
+    campus_index.refresh()
     forecasting.load_forecasting_models()
+    warmup_task = None
+    if warmup.WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(warmup.run())
+    else:
+        warmup.skip()
+    snapshot_task = None
+    if FORECAST_SNAPSHOT_ENABLED:
+        snapshot_task = asyncio.create_task(forecast_snapshot.run_periodically())
+    stream_task = asyncio.create_task(availability_stream.run_broadcaster())
+    metrics_task = asyncio.create_task(metrics.run_flusher()) if metrics.METRICS_DIR else None
     yield
+    stream_task.cancel()
+    if warmup_task is not None:
+        warmup_task.cancel()
+    if metrics_task is not None:
+        metrics_task.cancel()
+        metrics.remove_worker_file()
+    if snapshot_task is not None:
+        snapshot_task.cancel()
     forecasting.save_forecasting_models()
 
 
 # ---------------------- DATABASE SETUP ---------------------- #
 def get_db():
-    conn = sqlite3.connect(DATABASE, check_same_thread=False)
+    conn = sqlite3.connect(DATABASE, check_same_thread=False, factory=TimedConnection)
     conn.row_factory = sqlite3.Row
     try:
         yield conn
@@ -44,24 +83,6 @@ def get_db():
         conn.close()
 
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
-
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (
-        expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    )
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-
 def init_db():
     conn = sqlite3.connect(DATABASE)
     c = conn.cursor()
@@ -74,18 +95,36 @@ def init_db():
                 userType TEXT DEFAULT 'Visitor' CHECK (userType IS NULL OR userType IN ('Faculty member', 'Non-resident student', 'Resident student', 'Visitor')),
                 sbuID INTEGER UNIQUE,
                 phone TEXT,
-                licenseInfo TEXT
+                licenseInfo TEXT,
+                status TEXT DEFAULT 'pending'
             )""")
 
+    # Access tokens carry users.status as a claim; older databases predate the column
+    c.execute("PRAGMA table_info(users)")
+    if "status" not in [column[1] for column in c.fetchall()]:
+        c.execute("ALTER TABLE users ADD COLUMN status TEXT DEFAULT 'pending'")
+
     c.execute("""CREATE TABLE IF NOT EXISTS parking_lots (
                 parkingLotID INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
                 location TEXT NOT NULL,
                 capacity INTEGER NOT NULL CHECK(capacity > 0),
                 evSlots INTEGER DEFAULT 0,
-                reserved_slots INTEGER DEFAULT 0
+                reserved_slots INTEGER DEFAULT 0,
+                campus TEXT
             )""")
 
+    # Older databases predate the campus column; add and backfill it from location
+    c.execute("PRAGMA table_info(parking_lots)")
+    if "campus" not in [column[1] for column in c.fetchall()]:
+        c.execute("ALTER TABLE parking_lots ADD COLUMN campus TEXT")
+    c.execute("""UPDATE parking_lots
+                SET campus = CASE WHEN instr(location, ', ') > 0
+                                  THEN substr(location, instr(location, ', ') + 2)
+                                  ELSE location END
+                WHERE campus IS NULL""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_parking_lots_campus ON parking_lots(campus COLLATE NOCASE)")
+
     c.execute("""CREATE TABLE IF NOT EXISTS reservations (
                 reservationID INTEGER PRIMARY KEY AUTOINCREMENT,
                 parkingLotID INTEGER,
@@ -99,6 +138,12 @@ def init_db():
                 FOREIGN KEY (userID) REFERENCES users(userID) ON DELETE CASCADE
             )""")
 
+    # Keyset pagination order of /user/{id}/reservations; the rowid tail covers reservationID
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reservations_user_start ON reservations(userID, startTime)")
+
+    # Date-range exports (data_export.py)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_reservations_start ON reservations(startTime)")
+
     c.execute("""CREATE TABLE IF NOT EXISTS payments (
                 paymentID INTEGER PRIMARY KEY AUTOINCREMENT,
                 reservationID INTEGER,
@@ -109,6 +154,8 @@ def init_db():
                 FOREIGN KEY (reservationID) REFERENCES reservations(reservationID) ON DELETE CASCADE
             )""")
 
+    c.execute("CREATE INDEX IF NOT EXISTS idx_payments_date ON payments(paymentDate)")
+
     c.execute("""CREATE TABLE IF NOT EXISTS feedback (
                 feedbackID INTEGER PRIMARY KEY AUTOINCREMENT,
                 userID INTEGER,
@@ -120,6 +167,9 @@ def init_db():
                 FOREIGN KEY (userID) REFERENCES users(userID) ON DELETE CASCADE
             )""")
 
+    c.execute("CREATE INDEX IF NOT EXISTS idx_feedback_date ON feedback(date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_feedback_user_date ON feedback(userID, date)")
+
     c.execute("""CREATE TABLE IF NOT EXISTS cars (
                 carID INTEGER PRIMARY KEY AUTOINCREMENT,
                 userID INTEGER,
@@ -135,8 +185,10 @@ def init_db():
                 FOREIGN KEY (userID) REFERENCES users(userID) ON DELETE CASCADE
             )""")
 
-    try:
-        hashed_password = get_password_hash("test1234")
+    # Only hash the seed password when the account is missing, bcrypt is slow
+    c.execute("SELECT 1 FROM users WHERE email = ?", ("test@dev.com",))
+    if c.fetchone() is None:
+        hashed_password = credentials.pwd_context.hash("test1234")
         c.execute(
             "INSERT INTO users (email, userName, password, userType) VALUES (?, ?, ?, ?)",
             ("test@dev.com", "Admin", hashed_password, "Visitor")
@@ -144,9 +196,48 @@ def init_db():
         user_id = c.lastrowid
         c.execute("INSERT INTO administrators (userID) VALUES (?)", (user_id,))
         print("Admin account created: test@dev.com")
-    except sqlite3.IntegrityError:
+    else:
         print("Admin account already exists.")
 
+    c.execute("""CREATE TABLE IF NOT EXISTS user_revocations (
+                userID INTEGER PRIMARY KEY,
+                revokedAt REAL NOT NULL
+            )""")
+
+    c.execute("""CREATE TABLE IF NOT EXISTS used_refresh_tokens (
+                jti TEXT PRIMARY KEY,
+                userID INTEGER NOT NULL,
+                expiresAt REAL NOT NULL
+            )""")
+
+    c.execute("""CREATE TABLE IF NOT EXISTS forecast_models (
+                parkingLotID INTEGER PRIMARY KEY,
+                modelType TEXT NOT NULL,
+                params TEXT NOT NULL,
+                fittedAt DATETIME NOT NULL,
+                FOREIGN KEY (parkingLotID) REFERENCES parking_lots(parkingLotID) ON DELETE CASCADE
+            )""")
+
+    c.execute("""CREATE TABLE IF NOT EXISTS forecast_snapshot (
+                parkingLotID INTEGER NOT NULL,
+                kind TEXT NOT NULL CHECK (kind IN ('forecast', 'best_time', 'daily_pattern')),
+                payload TEXT NOT NULL,
+                generatedAt DATETIME NOT NULL,
+                PRIMARY KEY (parkingLotID, kind)
+            )""")
+
+    c.execute("""CREATE TABLE IF NOT EXISTS forecast_backends (
+                parkingLotID INTEGER PRIMARY KEY,
+                backend TEXT NOT NULL,
+                FOREIGN KEY (parkingLotID) REFERENCES parking_lots(parkingLotID) ON DELETE CASCADE
+            )""")
+
+    # Lots whose reservations changed after the snapshot was built, shared by every worker
+    c.execute("""CREATE TABLE IF NOT EXISTS forecast_invalidations (
+                parkingLotID INTEGER PRIMARY KEY,
+                invalidatedAt DATETIME NOT NULL
+            )""")
+
     c.execute("""CREATE TABLE IF NOT EXISTS analysis_reports (
                 reportID INTEGER PRIMARY KEY AUTOINCREMENT,
                 reportType TEXT CHECK (reportType IN ('Capacity', 'Revenue', 'UserAnalysis')),
@@ -224,6 +315,11 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     userID: int
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 
 class TokenData(BaseModel):
@@ -245,6 +341,7 @@ class ParkingLotOut(BaseModel):
     capacity: int
     evSlots: int
     reserved_slots: int
+    campus: Optional[str] = None
 
 
 class CarCreate(BaseModel):
@@ -295,16 +392,19 @@ class NearestLotsRequest(BaseModel):
     )
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: sqlite3.Connection = Depends(get_db)
-):
+def _create_user_tokens(user):
+    claims = auth.build_claims(user, is_admin=auth.is_admin(user["userID"]))
+    return token_service.create_access_token(claims), token_service.create_refresh_token(claims)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_service.decode_access_token(token)
         email: str = payload.get("sub")
         user_id: int = payload.get("user_id")
         if email is None or user_id is None:
@@ -313,36 +413,56 @@ async def get_current_user(
     except jwt.PyJWTError:
         raise credentials_exception
 
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM users WHERE email = ?", (token_data.email,))
-    user = cursor.fetchone()
-    if user is None:
+    principal = auth.principal_from_claims(payload)
+    if principal is not None:
+        if auth.is_revoked(principal["userID"], payload["iat"]):
+            raise credentials_exception
+        return principal
+
+    # Tokens issued before role claims existed still need the users table
+    users = execute_query("SELECT * FROM users WHERE email = ?", (token_data.email,))
+    if not users:
         raise credentials_exception
+    user = users[0]
+    user["role"] = auth.ROLE_ADMIN if auth.is_admin(user["userID"]) else auth.ROLE_USER
     return user
 
 
+def is_admin(current_user: dict = Depends(get_current_user)) -> bool:
+    return auth.is_admin(current_user["userID"])
+
+
 async def get_current_admin(
-    current_user: dict = Depends(get_current_user),
-    db: sqlite3.Connection = Depends(get_db),
+    current_user: dict = Depends(get_current_user), admin: bool = Depends(is_admin)
 ):
-    cursor = db.cursor()
-    cursor.execute(
-        "SELECT * FROM administrators WHERE userID = ?", (current_user["userID"],)
-    )
-    admin = cursor.fetchone()
-    if admin is None:
+    if not admin:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     return current_user
 
 
+def get_random_mode(request: Request, random_mode: Optional[bool] = None) -> bool:
+    """Synthetic-load mode for this request: explicit query flag, then tenant; real traffic never gets it."""
+    if random_mode is not None:
+        return random_mode
+    return request.headers.get("X-Tenant") in SYNTHETIC_LOAD_TENANTS
+
+
 app = FastAPI(lifespan=lifespan)
 
+# Added before CORS so rejected requests still get CORS headers
+app.add_middleware(BaseHTTPMiddleware, dispatch=admission.admission_middleware)
+# Outside admission control so rejected requests are counted too
+app.add_middleware(BaseHTTPMiddleware, dispatch=metrics.metrics_middleware)
+if profiler.REQUEST_PROFILING_ENABLED:
+    app.add_middleware(BaseHTTPMiddleware, dispatch=profiler.profile_request_middleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://localhost:3001", "https://p4-sbu.vercel.app", "https://cse416-temp-9noc.vercel.app"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination cursors of list endpoints, read by the client to fetch further pages
+    expose_headers=["X-Next-Cursor", "Link"],
 )
 
 
@@ -352,6 +472,17 @@ class ForecastRequest(BaseModel):
     hours_ahead: Optional[int] = 12
 
 
+class BulkForecastRequest(BaseModel):
+    parkingLotIDs: Optional[List[int]] = None
+    campus: Optional[str] = None
+    hours_ahead: Optional[int] = 12
+    backend: Optional[str] = None
+
+
+class ForecastBackendUpdate(BaseModel):
+    backend: Optional[str] = None
+
+
 class BestTimeRequest(BaseModel):
     parkingLotID: int
     time_window_hours: Optional[int] = 24
@@ -435,11 +566,6 @@ class CampusSummaryResponse(BaseModel):
     availableLots: int
 
 
-@app.on_event("startup")
-def on_startup():
-    init_db()
-
-
 @app.get("/")
 def read_root():
     return {
@@ -447,11 +573,16 @@ def read_root():
         "version": "2.0",
         "endpoints": {
             "auth": "/token",
+            "auth_refresh": "/token/refresh",
             "users": "/user/*",
             "parking": "/parking/*",
+            "parking_map": "/parking/map",
+            "parking_map_static": "/parking/map/static",
             "parking_live_status": "/parking/live-status",
             "parking_live_status_campus": "/parking/live-status/campus/{campus}",
+            "parking_live_status_stream": "/parking/live-status/stream",
             "parking_forecast": "/parking/forecast/{parking_lot_id}",
+            "parking_forecast_bulk": "/parking/forecast/bulk",
             "parking_best_time": "/parking/best-time/{parking_lot_id}",
             "parking_daily_pattern": "/parking/daily-pattern/{parking_lot_id}",
             "parking_weekly_pattern": "/parking/weekly-pattern/{parking_lot_id}", 
@@ -469,39 +600,89 @@ async def favicon():
     return FileResponse("favicon.ico")
 
 
+# The credential handlers are async so bcrypt can be awaited on its own pool; their
+# sqlite work still blocks, so it goes to a thread rather than the event loop.
+def _find_user_by_email(db: sqlite3.Connection, email: str):
+    cursor = db.cursor()
+    cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
+    return cursor.fetchone()
+
+
+async def _check_password(user, password: str) -> bool:
+    if user is None:
+        return False
+    verified, new_hash = await credentials.verify_password(password, user["password"])
+    if verified and new_hash is not None:
+        await asyncio.to_thread(
+            execute_write_query,
+            "UPDATE users SET password = ? WHERE userID = ?", (new_hash, user["userID"]),
+        )
+    return verified
+
+
 @app.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: sqlite3.Connection = Depends(get_db),
 ):
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM users WHERE email = ?", (form_data.username,))
-    user = cursor.fetchone()
+    user = await asyncio.to_thread(_find_user_by_email, db, form_data.username)
 
-    if user is None or not verify_password(form_data.password, user["password"]):
+    if not await _check_password(user, form_data.password):
         raise HTTPException(
             status_code=401,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user["email"], "user_id": user["userID"]},
-        expires_delta=access_token_expires,
-    )
+    access_token, refresh_token = _create_user_tokens(user)
 
     return {
         "access_token": access_token,
         "token_type": "bearer",
         "userID": user["userID"],
+        "refresh_token": refresh_token,
+    }
+
+
+@app.post("/token/refresh", response_model=Token)
+def refresh_access_token(request: RefreshRequest):
+    credentials_exception = HTTPException(
+        status_code=401,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = token_service.decode_refresh_token(request.refresh_token)
+    except jwt.PyJWTError:
+        raise credentials_exception
+
+    if auth.is_revoked(payload["user_id"], payload["iat"]):
+        raise credentials_exception
+    if "jti" not in payload or not auth.use_refresh_token(payload["user_id"], payload["jti"], payload["exp"]):
+        raise credentials_exception
+
+    # Role and status may have changed since login, so claims are rebuilt from the users table
+    users = execute_query("SELECT * FROM users WHERE userID = ?", (payload["user_id"],))
+    if not users:
+        raise credentials_exception
+    access_token, refresh_token = _create_user_tokens(users[0])
+
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "userID": users[0]["userID"],
+        "refresh_token": refresh_token,
     }
 
 
+@app.get("/.well-known/jwks.json", include_in_schema=False)
+def get_jwks():
+    return token_service.public_jwks()
+
+
 @app.post("/user/register", response_model=UserOut)
-def register_user(user: UserRegister, db: sqlite3.Connection = Depends(get_db)):
-    cursor = db.cursor()
-    hashed_password = get_password_hash(user.password)
+async def register_user(user: UserRegister, db: sqlite3.Connection = Depends(get_db)):
+    hashed_password = await credentials.hash_password(user.password)
     print("got here")
     userType = (
         user.userType if hasattr(user, "userType") and user.userType else "Visitor"
@@ -514,7 +695,8 @@ def register_user(user: UserRegister, db: sqlite3.Connection = Depends(get_db)):
 
     print(userType, phone, sbuID, licenseInfo)
 
-    try:
+    def insert_user() -> int:
+        cursor = db.cursor()
         cursor.execute(
             "INSERT INTO users (email, userName, phone, password, userType, sbuID, licenseInfo, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
             (
@@ -529,7 +711,10 @@ def register_user(user: UserRegister, db: sqlite3.Connection = Depends(get_db)):
             ),
         )
         db.commit()
-        user_id = cursor.lastrowid
+        return cursor.lastrowid
+
+    try:
+        user_id = await asyncio.to_thread(insert_user)
     except sqlite3.IntegrityError as e:
         print(f"Registration error: {str(e)}")
         raise HTTPException(
@@ -548,21 +733,20 @@ def register_user(user: UserRegister, db: sqlite3.Connection = Depends(get_db)):
 
 @app.post("/user/login", response_model=Token)
 @app.post("/user/login")
-def login_user(user: UserLogin, db: sqlite3.Connection = Depends(get_db)):
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM users WHERE email = ?", (user.email,))
-    row = cursor.fetchone()
+async def login_user(user: UserLogin, db: sqlite3.Connection = Depends(get_db)):
+    row = await asyncio.to_thread(_find_user_by_email, db, user.email)
 
-    if row is None or not verify_password(user.password, row["password"]):
+    if not await _check_password(row, user.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": row["email"], "user_id": row["userID"]},
-        expires_delta=access_token_expires,
-    )
+    access_token, refresh_token = _create_user_tokens(row)
 
-    return {"token": access_token, "userId": row["userID"], "status": row["status"]}
+    return {
+        "token": access_token,
+        "refreshToken": refresh_token,
+        "userId": row["userID"],
+        "status": row["status"],
+    }
 
 
 @app.get("/user/{user_id}", response_model=UserOut)
@@ -659,9 +843,9 @@ def get_parking_lots(db: sqlite3.Connection = Depends(get_db)):
             lot_dict = dict(lot)
             if lot_dict["reserved_slots"] > lot_dict["capacity"]:
                 lot_dict["reserved_slots"] = lot_dict["capacity"]
-            result.append(ParkingLotOut(**lot_dict))
-            
-        return result
+            result.append(lot_dict)
+
+        return fast_json.list_response(result, ParkingLotOut)
     except Exception as e:
         import traceback
 
@@ -671,22 +855,8 @@ def get_parking_lots(db: sqlite3.Connection = Depends(get_db)):
 
 
 @app.get("/parking/campus/list", response_model=List[str])
-def get_campus_list(db: sqlite3.Connection = Depends(get_db)):
-    try:
-        cursor = db.cursor()
-        cursor.execute(
-            "SELECT DISTINCT substr(location, instr(location, ', ') + 2) AS campus FROM parking_lots ORDER BY campus"
-        )
-        results = cursor.fetchall()
-
-        campuses = [row["campus"] for row in results if row["campus"]]
-        return campuses
-    except Exception as e:
-        import traceback
-
-        print(f"ERROR in get_campus_list: {e}")
-        print(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+def get_campus_list():
+    return campus_index.campuses()
 
 
 @app.get("/parking/campus/{campus}", response_model=List[ParkingLotOut])
@@ -694,9 +864,9 @@ def get_parking_lots_by_campus(campus: str, db: sqlite3.Connection = Depends(get
     try:
         cursor = db.cursor()
 
-        search_pattern = f"%{campus}%"
         cursor.execute(
-            "SELECT * FROM parking_lots WHERE location LIKE ?", (search_pattern,)
+            "SELECT * FROM parking_lots WHERE campus = ? COLLATE NOCASE ORDER BY parkingLotID",
+            (campus,),
         )
         lots = cursor.fetchall()
 
@@ -744,19 +914,24 @@ def create_parking_lot(
     db: sqlite3.Connection = Depends(get_db),
     current_user: dict = Depends(get_current_admin),
 ):
+    campus = campus_index.campus_from_location(parking_lot.location)
     cursor = db.cursor()
     cursor.execute(
-        "INSERT INTO parking_lots (name, location, capacity, evSlots, reserved_slots) VALUES (?, ?, ?, ?, ?)",
+        "INSERT INTO parking_lots (name, location, capacity, evSlots, reserved_slots, campus) VALUES (?, ?, ?, ?, ?, ?)",
         (
             parking_lot.name,
             parking_lot.location,
             parking_lot.capacity,
             parking_lot.evSlots,
             0,
+            campus,
         ),
     )
     db.commit()
     lot_id = cursor.lastrowid
+    campus_index.add_lot(lot_id, campus)
+    live_status.invalidate()
+    map_payload.invalidate()
 
     return ParkingLotOut(
         parkingLotID=lot_id,
@@ -765,11 +940,14 @@ def create_parking_lot(
         capacity=parking_lot.capacity,
         evSlots=parking_lot.evSlots,
         reserved_slots=0,
+        campus=campus,
     )
 
 
 @app.post("/parking/path")
 def find_path_to_lot_post(request: PathRequest):
+    import pathfinder
+
     params = {
         "start_lat": request.start_lat,
         "start_lng": request.start_lng,
@@ -788,6 +966,8 @@ def find_path_to_lot_post(request: PathRequest):
 
 @app.get("/parking/path")
 def find_path_to_lot_get(start_lat: float, start_lng: float, end_id: int):
+    import pathfinder
+
     params = {
         "start_lat": float(start_lat),
         "start_lng": float(start_lng),
@@ -806,13 +986,15 @@ def find_path_to_lot_get(start_lat: float, start_lng: float, end_id: int):
 
 @app.post("/parking/nearest")
 def find_nearest_lots_post(request: NearestLotsRequest):
-    return pathfinder.find_nearest_available_lots(
+    import pathfinder
+
+    return fast_json.json_response(pathfinder.find_nearest_available_lots(
         start_lat=request.start_lat,
         start_lng=request.start_lng,
         limit=request.limit,
         min_available=request.min_available,
         prefer_ev=request.prefer_ev,
-    )
+    ))
 
 
 @app.get("/parking/nearest")
@@ -824,29 +1006,91 @@ def find_nearest_lots_get(
     prefer_ev: Optional[bool] = False,
     max_distance: Optional[float] = None,
 ):
-    return pathfinder.find_nearest_available_lots(
+    import pathfinder
+
+    return fast_json.json_response(pathfinder.find_nearest_available_lots(
         start_lat=start_lat,
         start_lng=start_lng,
         limit=limit,
         min_available=min_available,
         prefer_ev=prefer_ev,
         max_distance=max_distance,
-    )
+    ))
+
+
+def _encoded_response(
+    request: Request, payload: map_payload.EncodedPayload, cache_control: str
+) -> Response:
+    headers = {"ETag": payload.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if request.headers.get("If-None-Match") == payload.etag:
+        return Response(status_code=304, headers=headers)
+    if map_payload.accepts_gzip(request.headers.get("Accept-Encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gzip_body, media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
 
 
 @app.get("/parking/map")
-def get_parking_map_data():
-    return pathfinder.get_parking_lot_info()
+def get_parking_map_data(request: Request):
+    return _encoded_response(request, map_payload.get_map_payload(), "no-cache")
+
+
+@app.get("/parking/map/static")
+def get_parking_map_static(request: Request):
+    # Coordinates only change when lots are added, so browsers and CDNs may reuse it for an hour
+    return _encoded_response(request, map_payload.get_static_payload(), "public, max-age=3600")
+
+
+@app.get("/parking/forecast/bulk")
+def get_bulk_parking_forecast(
+    lot_ids: Optional[List[int]] = Query(None),
+    campus: Optional[str] = None,
+    hours_ahead: Optional[int] = 12,
+    backend: Optional[str] = None,
+):
+    """Get occupancy forecasts for many parking lots as a lots x hours matrix."""
+    if backend is not None and backend not in forecasting.FORECASTER_BACKENDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"backend must be one of {list(forecasting.FORECASTER_BACKENDS)}",
+        )
+
+    try:
+        return forecasting.get_bulk_forecast(
+            lot_ids=lot_ids,
+            campus=campus,
+            hours_ahead=min(24, max(1, hours_ahead)),  # Limit to 1-24 hours
+            backend=backend,
+        )
+    except Exception as e:
+        import traceback
+
+        print(f"Error in get_bulk_parking_forecast: {e}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/parking/forecast/bulk")
+def get_bulk_parking_forecast_post(request: BulkForecastRequest):
+    """Get occupancy forecasts for many parking lots (POST endpoint)."""
+    return get_bulk_parking_forecast(
+        lot_ids=request.parkingLotIDs,
+        campus=request.campus,
+        hours_ahead=request.hours_ahead,
+        backend=request.backend,
+    )
 
 
 @app.get("/parking/forecast/{parking_lot_id}")
 def get_parking_forecast(parking_lot_id: int, hours_ahead: Optional[int] = 12):
     """Get parking lot occupancy forecast for the specified hours ahead."""
+    hours_ahead = min(24, max(1, hours_ahead))  # Limit to 1-24 hours
     try:
-        forecast_data = forecasting.get_parking_lot_forecast(
-            lot_id=parking_lot_id,
-            hours_ahead=min(24, max(1, hours_ahead)),  # Limit to 1-24 hours
-        )
+        forecast_data = forecast_snapshot.get_forecast(parking_lot_id, hours_ahead)
+        if forecast_data is None:
+            forecast_data = forecasting.get_parking_lot_forecast(
+                lot_id=parking_lot_id, hours_ahead=hours_ahead
+            )
         return {"forecast": forecast_data}
     except Exception as e:
         import traceback
@@ -867,11 +1111,13 @@ def get_parking_forecast_post(request: ForecastRequest):
 @app.get("/parking/best-time/{parking_lot_id}")
 def get_best_parking_time(parking_lot_id: int, time_window_hours: Optional[int] = 24):
     """Find the best time to park in the given time window."""
+    time_window_hours = min(48, max(3, time_window_hours))  # Limit to 3-48 hours
     try:
-        best_time = forecasting.get_best_parking_time(
-            lot_id=parking_lot_id,
-            time_window_hours=min(48, max(3, time_window_hours)),  # Limit to 3-48 hours
-        )
+        best_time = forecast_snapshot.get_best_time(parking_lot_id, time_window_hours)
+        if best_time is None:
+            best_time = forecasting.get_best_parking_time(
+                lot_id=parking_lot_id, time_window_hours=time_window_hours
+            )
         return best_time
     except Exception as e:
         import traceback
@@ -890,9 +1136,20 @@ def get_best_parking_time_post(request: BestTimeRequest):
 
 
 @app.get("/parking/daily-pattern/{parking_lot_id}")
-def get_daily_occupancy_pattern(parking_lot_id: int, day: Optional[int] = None):
+def get_daily_occupancy_pattern(
+    parking_lot_id: int,
+    day: Optional[int] = None,
+    random_mode: bool = Depends(get_random_mode),
+):
     try:
-        result = forecasting.get_daily_pattern(lot_id=parking_lot_id, day_of_week=day)
+        if not random_mode:
+            result = forecast_snapshot.get_daily_pattern(parking_lot_id, day)
+            if result is not None:
+                return result
+
+        result = forecasting.get_daily_pattern(
+            lot_id=parking_lot_id, day_of_week=day, random_mode=random_mode
+        )
         return result
     except Exception as e:
         import traceback
@@ -937,47 +1194,118 @@ def toggle_random_mode():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/parking/live-status", response_model=List[LiveStatusResponse])
-def get_all_live_status(db: sqlite3.Connection = Depends(get_db)):
+@app.put("/admin/forecast-backend/{parking_lot_id}")
+def set_forecast_backend(
+    parking_lot_id: int,
+    update: ForecastBackendUpdate,
+    current_user: dict = Depends(get_current_admin),
+):
     try:
-        cursor = db.cursor()
-        cursor.execute("""
-            SELECT p.parkingLotID, p.name, p.location, p.capacity, p.reserved_slots
-            FROM parking_lots p
-            ORDER BY p.parkingLotID
-        """)
-        lots = cursor.fetchall()
+        forecasting.set_forecast_backend(parking_lot_id, update.backend)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        current_time = datetime.now().isoformat()
-        result = []
+    return {
+        "parkingLotID": parking_lot_id,
+        "backend": forecasting.get_forecast_backend(parking_lot_id),
+    }
 
-        for lot in lots:
-            capacity = lot["capacity"]
-            reserved = min(lot["reserved_slots"], capacity)
-            available = max(0, capacity - reserved)
-            occupancy_percentage = (reserved / capacity * 100) if capacity > 0 else 0
-
-            status = "Available"
-            if occupancy_percentage > 80:
-                status = "Busy"
-            elif occupancy_percentage > 50:
-                status = "Moderate"
-
-            result.append(
-                LiveStatusResponse(
-                    parkingLotID=lot["parkingLotID"],
-                    name=lot["name"],
-                    location=lot["location"],
-                    totalSpots=capacity,
-                    occupiedSpots=reserved,
-                    availableSpots=available,
-                    occupancyPercentage=round(occupancy_percentage, 1),
-                    status=status,
-                    lastUpdated=current_time,
-                )
-            )
 
-        return result
+@app.get("/healthz", include_in_schema=False)
+def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz", include_in_schema=False)
+def readyz():
+    ready, state = warmup.state()
+    return JSONResponse(status_code=200 if ready else 503, content=state)
+
+
+async def get_metrics_scraper(token: str = Depends(oauth2_scheme)):
+    """Allow the scraper's METRICS_TOKEN, otherwise only admins."""
+    if metrics.METRICS_TOKEN and hmac.compare_digest(token.encode(), metrics.METRICS_TOKEN.encode()):
+        return None
+    current_user = await get_current_user(token)
+    if not auth.is_admin(current_user["userID"]):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return current_user
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics(scraper=Depends(get_metrics_scraper)):
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/admin/admission")
+def get_admission_stats(current_user: dict = Depends(get_current_admin)):
+    return admission.stats()
+
+
+@app.get("/admin/slow-queries")
+def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    order_by: str = Query("totalMs", pattern="^(totalMs|maxMs|count)$"),
+    current_user: dict = Depends(get_current_admin),
+):
+    """Slowest statement fingerprints on this worker, with their latest query plan."""
+    return slow_query_stats(limit=limit, order_by=order_by)
+
+
+@app.get("/admin/export/{table}")
+def export_table(
+    table: str,
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    current_user: dict = Depends(get_current_admin),
+):
+    """Stream reservations, payments or feedback as CSV or Parquet from one database snapshot."""
+    if table not in data_export.TABLES:
+        raise HTTPException(status_code=404, detail=f"table must be one of {list(data_export.TABLES)}")
+    try:
+        start, end = data_export.parse_date(start), data_export.parse_date(end)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be ISO dates or datetimes")
+
+    media_type, extension = data_export.FORMATS[format]
+    return StreamingResponse(
+        data_export.stream_export(table, format, start, end),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table}.{extension}"'},
+    )
+
+
+@app.post("/admin/profile")
+async def profile_worker(
+    seconds: float = Query(10, gt=0, le=profiler.MAX_PROFILE_SECONDS),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    include_idle: bool = False,
+    current_user: dict = Depends(get_current_admin),
+):
+    """Sample this worker's threads and return collapsed stacks for a flamegraph."""
+    stacks, samples = await asyncio.to_thread(
+        profiler.profile, seconds, interval_ms / 1000, include_idle
+    )
+    return Response(content=stacks, media_type=profiler.CONTENT_TYPE, headers={"X-Profile-Samples": str(samples)})
+
+
+@app.get("/admin/credential-pool")
+def get_credential_pool_stats(current_user: dict = Depends(get_current_admin)):
+    return credentials.stats()
+
+
+def _live_status_response(request: Request, payload) -> Response:
+    body, etag = payload
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+@app.get("/parking/live-status", response_model=List[LiveStatusResponse])
+def get_all_live_status(request: Request):
+    try:
+        return _live_status_response(request, live_status.get_snapshot().all_lots())
     except Exception as e:
         import traceback
 
@@ -986,49 +1314,19 @@ def get_all_live_status(db: sqlite3.Connection = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/parking/live-status/stream")
+async def stream_live_status(campus: Optional[str] = None):
+    return StreamingResponse(
+        availability_stream.stream_events(campus),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/parking/live-status/{parking_lot_id}", response_model=LiveStatusResponse)
-def get_parking_lot_live_status(
-    parking_lot_id: int, db: sqlite3.Connection = Depends(get_db)
-):
+def get_parking_lot_live_status(parking_lot_id: int, request: Request):
     try:
-        cursor = db.cursor()
-        cursor.execute(
-            """
-            SELECT p.parkingLotID, p.name, p.location, p.capacity, p.reserved_slots
-            FROM parking_lots p
-            WHERE p.parkingLotID = ?
-        """,
-            (parking_lot_id,),
-        )
-        lot = cursor.fetchone()
-
-        if not lot:
-            raise HTTPException(status_code=404, detail="Parking lot not found")
-
-        capacity = lot["capacity"]
-        reserved = lot["reserved_slots"]
-        available = capacity - reserved
-        occupancy_percentage = (reserved / capacity * 100) if capacity > 0 else 0
-
-        status = "Available"
-        if occupancy_percentage > 80:
-            status = "Busy"
-        elif occupancy_percentage > 50:
-            status = "Moderate"
-
-        current_time = datetime.now().isoformat()
-
-        return LiveStatusResponse(
-            parkingLotID=lot["parkingLotID"],
-            name=lot["name"],
-            location=lot["location"],
-            totalSpots=capacity,
-            occupiedSpots=reserved,
-            availableSpots=available,
-            occupancyPercentage=round(occupancy_percentage, 1),
-            status=status,
-            lastUpdated=current_time,
-        )
+        payload = live_status.get_snapshot().lot(parking_lot_id)
     except Exception as e:
         import traceback
 
@@ -1036,106 +1334,18 @@ def get_parking_lot_live_status(
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Parking lot not found")
+    return _live_status_response(request, payload)
+
 
 @app.get(
     "/parking/live-status/campus/{campus}",
     response_model=List[Union[LiveStatusResponse, CampusSummaryResponse]],
 )
-def get_campus_live_status(campus: str, db: sqlite3.Connection = Depends(get_db)):
+def get_campus_live_status(campus: str, request: Request):
     try:
-        cursor = db.cursor()
-        search_pattern = f"%{campus}%"
-        cursor.execute(
-            """
-            SELECT p.parkingLotID, p.name, p.location, p.capacity, p.reserved_slots
-            FROM parking_lots p
-            WHERE p.location LIKE ?
-            ORDER BY p.parkingLotID
-        """,
-            (search_pattern,),
-        )
-        lots = cursor.fetchall()
-
-        if not lots:
-            raise HTTPException(
-                status_code=404, detail=f"No parking lots found for campus: {campus}"
-            )
-
-        current_time = datetime.now().isoformat()
-        result = []
-
-        total_capacity = 0
-        total_reserved = 0
-        busy_lots = 0
-        moderate_lots = 0
-        available_lots = 0
-        campus_location = campus
-
-        for lot in lots:
-            capacity = lot["capacity"]
-            reserved = min(lot["reserved_slots"], capacity)
-            available = max(0, capacity - reserved)
-            occupancy_percentage = (reserved / capacity * 100) if capacity > 0 else 0
-
-            status = "Available"
-            if occupancy_percentage > 80:
-                status = "Busy"
-                busy_lots += 1
-            elif occupancy_percentage > 50:
-                status = "Moderate"
-                moderate_lots += 1
-            else:
-                available_lots += 1
-
-            total_capacity += capacity
-            total_reserved += reserved
-
-            if result == []:
-                location_parts = lot["location"].split(", ")
-                if len(location_parts) > 1:
-                    campus_location = location_parts[-1]
-
-            result.append(
-                LiveStatusResponse(
-                    parkingLotID=lot["parkingLotID"],
-                    name=lot["name"],
-                    location=lot["location"],
-                    totalSpots=capacity,
-                    occupiedSpots=reserved,
-                    availableSpots=available,
-                    occupancyPercentage=round(occupancy_percentage, 1),
-                    status=status,
-                    lastUpdated=current_time,
-                )
-            )
-
-        total_available = total_capacity - total_reserved
-        campus_occupancy = (
-            (total_reserved / total_capacity * 100) if total_capacity > 0 else 0
-        )
-        campus_status = "Available"
-        if campus_occupancy > 80:
-            campus_status = "Busy"
-        elif campus_occupancy > 50:
-            campus_status = "Moderate"
-
-        summary = CampusSummaryResponse(
-            location=f"{campus_location}",
-            totalSpots=total_capacity,
-            occupiedSpots=total_reserved,
-            availableSpots=total_available,
-            occupancyPercentage=round(campus_occupancy, 1),
-            status=campus_status,
-            lastUpdated=current_time,
-            lotCount=len(lots),
-            busyLots=busy_lots,
-            moderateLots=moderate_lots,
-            availableLots=available_lots,
-        )
-
-        result.append(summary)
-
-        return result
+        payload = live_status.get_snapshot().campus(campus)
     except Exception as e:
         import traceback
 
@@ -1143,6 +1353,12 @@ def get_campus_live_status(campus: str, db: sqlite3.Connection = Depends(get_db)
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
+    if payload is None:
+        raise HTTPException(
+            status_code=404, detail=f"No parking lots found for campus: {campus}"
+        )
+    return _live_status_response(request, payload)
+
 
 @app.post("/reservation", response_model=ReservationOut)
 async def create_reservation(
@@ -1184,6 +1400,7 @@ def get_reservation(
     reservation_id: int,
     db: sqlite3.Connection = Depends(get_db),
     current_user: dict = Depends(get_current_user),
+    admin: bool = Depends(is_admin),
 ):
     cursor = db.cursor()
     cursor.execute(
@@ -1194,81 +1411,101 @@ def get_reservation(
     if res is None:
         raise HTTPException(status_code=404, detail="Reservation not found")
 
-    if res["userID"] != current_user["userID"]:
-        cursor.execute(
-            "SELECT * FROM administrators WHERE userID = ?", (current_user["userID"],)
+    if res["userID"] != current_user["userID"] and not admin:
+        raise HTTPException(
+            status_code=403, detail="Not authorized to view this reservation"
         )
-        admin = cursor.fetchone()
-        if admin is None:
-            raise HTTPException(
-                status_code=403, detail="Not authorized to view this reservation"
-            )
 
     return ReservationOut(**dict(res))
 
 
+_RESERVATION_KEYSET = pagination.Keyset("startTime", "reservationID")
+
+
+def _user_reservations_page(user_id: int, cursor: Optional[str], limit: int) -> List[Dict]:
+    after, params = _RESERVATION_KEYSET.after(cursor)
+    return execute_query(
+        f"SELECT * FROM reservations WHERE userID = ? AND {after} "
+        f"ORDER BY {_RESERVATION_KEYSET.order_by()} LIMIT ?",
+        (user_id, *params, limit),
+    )
+
+
+def _check_reservations_access(user_id: int, current_user: dict, admin: bool):
+    if current_user["userID"] != user_id and not admin:
+        raise HTTPException(
+            status_code=403,
+            detail="Not authorized to view reservations for this user",
+        )
+
+
 @app.get("/user/{user_id}/reservations", response_model=List[ReservationOut])
 def get_user_reservations(
     user_id: int,
-    db: sqlite3.Connection = Depends(get_db),
+    request: Request,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
+    admin: bool = Depends(is_admin),
 ):
-    if current_user["userID"] != user_id:
-        cursor = db.cursor()
-        cursor.execute(
-            "SELECT * FROM administrators WHERE userID = ?", (current_user["userID"],)
-        )
-        admin = cursor.fetchone()
-        if admin is None:
-            raise HTTPException(
-                status_code=403,
-                detail="Not authorized to view reservations for this user",
-            )
+    _check_reservations_access(user_id, current_user, admin)
+    reservations = _user_reservations_page(user_id, cursor, limit + 1)
+    return pagination.page_response(request, reservations, _RESERVATION_KEYSET, limit, ReservationOut)
 
-    cursor = db.cursor()
-    cursor.execute(
-        "SELECT * FROM reservations WHERE userID = ? ORDER BY startTime DESC",
-        (user_id,),
-    )
-    reservations = cursor.fetchall()
 
-    return [ReservationOut(**dict(res)) for res in reservations]
+@app.get("/user/{user_id}/reservations/export", response_model=List[ReservationOut])
+def export_user_reservations(
+    user_id: int,
+    current_user: dict = Depends(get_current_user),
+    admin: bool = Depends(is_admin),
+):
+    _check_reservations_access(user_id, current_user, admin)
+    return pagination.stream_all(
+        lambda cursor, limit: _user_reservations_page(user_id, cursor, limit), _RESERVATION_KEYSET, ReservationOut
+    )
 
 
 @app.delete("/reservation/{reservation_id}")
 def cancel_reservation(
     reservation_id: int,
-    db: sqlite3.Connection = Depends(get_db),
     current_user: dict = Depends(get_current_user),
+    admin: bool = Depends(is_admin),
 ):
-    cursor = db.cursor()
-    is_admin = False
-
-    cursor.execute(
-        "SELECT * FROM administrators WHERE userID = ?", (current_user["userID"],)
-    )
-    admin = cursor.fetchone()
-    if admin is not None:
-        is_admin = True
-
     import reservation_handler
 
     result = reservation_handler.cancel_reservation(
-        reservation_id=reservation_id, user_id=current_user["userID"], is_admin=is_admin
+        reservation_id=reservation_id, user_id=current_user["userID"], is_admin=admin
     )
 
     return result
 
 
+_USER_KEYSET = pagination.Keyset("userID", descending=False)
+
+
+def _users_page(cursor: Optional[str], limit: int) -> List[Dict]:
+    after, params = _USER_KEYSET.after(cursor)
+    return execute_query(
+        f"SELECT userID, userName, email, phone, userType, status FROM users WHERE {after} "
+        f"ORDER BY {_USER_KEYSET.order_by()} LIMIT ?",
+        (*params, limit),
+    )
+
+
 @app.get("/admin/users", response_model=List[UserOut])
 def get_all_users(
-    db: sqlite3.Connection = Depends(get_db),
+    request: Request,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
 #     current_user: dict = Depends(get_current_admin),
 ):
-    cursor = db.cursor()
-    cursor.execute("SELECT userID, userName, email, phone, userType, status FROM users")
-    rows = cursor.fetchall()
-    return [UserOut(**dict(row)) for row in rows]
+    rows = _users_page(cursor, limit + 1)
+    return pagination.page_response(request, rows, _USER_KEYSET, limit, UserOut)
+
+
+@app.get("/admin/users/export", response_model=List[UserOut])
+def export_all_users(current_user: dict = Depends(get_current_admin)):
+    return pagination.stream_all(_users_page, _USER_KEYSET, UserOut)
 
 
 class UserUpdate(BaseModel):
@@ -1324,6 +1561,7 @@ def update_user(
             tuple(values),
         )
         db.commit()
+        auth.revoke_user(user_id)
     except sqlite3.IntegrityError as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Update failed: {str(e)}")
@@ -1352,6 +1590,8 @@ def delete_user(
     try:
         cursor.execute("DELETE FROM users WHERE userID = ?", (user_id,))
         db.commit()
+        auth.revoke_user(user_id)
+        auth.refresh_admin_ids()
         return {"status": "success", "message": f"User {user_id} has been deleted"}
     except sqlite3.Error as e:
         db.rollback()
@@ -1396,19 +1636,11 @@ def create_user_feedback(
 def get_feedback_by_id(
     feedback_id: int,
     current_user: dict = Depends(get_current_user),
+    admin: bool = Depends(is_admin),
 ):
     result = feedback_handler.get_feedback(feedback_id)
-    
-    is_admin = False
-    cursor = sqlite3.connect(DATABASE).cursor()
-    cursor.execute(
-        "SELECT * FROM administrators WHERE userID = ?", (current_user["userID"],)
-    )
-    admin = cursor.fetchone()
-    if admin is not None:
-        is_admin = True
-        
-    if not is_admin and result["userID"] != current_user["userID"]:
+
+    if not admin and result["userID"] != current_user["userID"]:
         raise HTTPException(
             status_code=403, detail="Not authorized to view this feedback"
         )
@@ -1416,27 +1648,39 @@ def get_feedback_by_id(
     return FeedbackResponse(**result)
 
 
+def _check_feedback_access(user_id: int, current_user: dict, admin: bool):
+    if not admin and user_id != current_user["userID"]:
+        raise HTTPException(
+            status_code=403, detail="Not authorized to view feedback for this user"
+        )
+
+
 @app.get("/user/{user_id}/feedback", response_model=List[FeedbackResponse])
 def get_user_feedback_list(
     user_id: int,
+    request: Request,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
+    admin: bool = Depends(is_admin),
 ):
-    is_admin = False
-    cursor = sqlite3.connect(DATABASE).cursor()
-    cursor.execute(
-        "SELECT * FROM administrators WHERE userID = ?", (current_user["userID"],)
+    _check_feedback_access(user_id, current_user, admin)
+    results = feedback_handler.get_user_feedback(user_id, cursor=cursor, limit=limit + 1)
+    return pagination.page_response(request, results, feedback_handler.FEEDBACK_KEYSET, limit, FeedbackResponse)
+
+
+@app.get("/user/{user_id}/feedback/export", response_model=List[FeedbackResponse])
+def export_user_feedback(
+    user_id: int,
+    current_user: dict = Depends(get_current_user),
+    admin: bool = Depends(is_admin),
+):
+    _check_feedback_access(user_id, current_user, admin)
+    return pagination.stream_all(
+        lambda cursor, limit: feedback_handler.get_user_feedback(user_id, cursor=cursor, limit=limit),
+        feedback_handler.FEEDBACK_KEYSET,
+        FeedbackResponse,
     )
-    admin = cursor.fetchone()
-    if admin is not None:
-        is_admin = True
-        
-    if not is_admin and user_id != current_user["userID"]:
-        raise HTTPException(
-            status_code=403, detail="Not authorized to view feedback for this user"
-        )
-        
-    results = feedback_handler.get_user_feedback(user_id)
-    return [FeedbackResponse(**result) for result in results]
 
 
 @app.put("/feedback/{feedback_id}", response_model=FeedbackResponse)
@@ -1444,20 +1688,12 @@ def update_feedback_by_id(
     feedback_id: int,
     feedback: FeedbackUpdate,
     current_user: dict = Depends(get_current_user),
+    admin: bool = Depends(is_admin),
 ):
-    is_admin = False
-    cursor = sqlite3.connect(DATABASE).cursor()
-    cursor.execute(
-        "SELECT * FROM administrators WHERE userID = ?", (current_user["userID"],)
-    )
-    admin = cursor.fetchone()
-    if admin is not None:
-        is_admin = True
-        
     result = feedback_handler.update_feedback(
         feedback_id=feedback_id,
         user_id=current_user["userID"],
-        is_admin=is_admin,
+        is_admin=admin,
         message=feedback.message,
         rating=feedback.rating,
         reply=feedback.reply,
@@ -1471,20 +1707,12 @@ def update_feedback_by_id(
 def delete_feedback_by_id(
     feedback_id: int,
     current_user: dict = Depends(get_current_user),
+    admin: bool = Depends(is_admin),
 ):
-    is_admin = False
-    cursor = sqlite3.connect(DATABASE).cursor()
-    cursor.execute(
-        "SELECT * FROM administrators WHERE userID = ?", (current_user["userID"],)
-    )
-    admin = cursor.fetchone()
-    if admin is not None:
-        is_admin = True
-        
     result = feedback_handler.delete_feedback(
         feedback_id=feedback_id,
         user_id=current_user["userID"],
-        is_admin=is_admin
+        is_admin=admin
     )
     
     return result
@@ -1492,14 +1720,28 @@ def delete_feedback_by_id(
 
 @app.get("/admin/feedback", response_model=List[FeedbackResponse])
 def get_all_feedback(
+    request: Request,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_admin),
 ):
-    results = feedback_handler.get_all_feedback()
-    return [FeedbackResponse(**result) for result in results]
+    results = feedback_handler.get_all_feedback(cursor=cursor, limit=limit + 1)
+    return pagination.page_response(request, results, feedback_handler.FEEDBACK_KEYSET, limit, FeedbackResponse)
+
+
+@app.get("/admin/feedback/export", response_model=List[FeedbackResponse])
+def export_all_feedback(current_user: dict = Depends(get_current_admin)):
+    return pagination.stream_all(
+        lambda cursor, limit: feedback_handler.get_all_feedback(cursor=cursor, limit=limit),
+        feedback_handler.FEEDBACK_KEYSET,
+        FeedbackResponse,
+    )
 
 
 # ---------------------- RUN APP ---------------------- #
 if __name__ == "__main__":
+    import uvicorn
+
     init_db()
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
     # uvicorn.run("main:app", host="100.122.181.52", port=8000, reload=True)  # for tailscale
@@ -0,0 +1,115 @@
+"""Precomputed payloads for /parking/map.
+
+Matching lots to their polygons means loading the GeoDataFrame and
+fuzzy-matching every lot name, yet the result (IDs, names, coordinates)
+only changes when lots are added. That static part is built once, serialized
+and gzip-compressed, and given a content-hash ETag. Availability is merged
+in from the live-status snapshot, once per snapshot.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from typing import Dict, List
+
+import live_status
+
+_static = None
+_merged = None
+_lock = threading.Lock()
+_invalidated = False
+
+
+class EncodedPayload:
+    def __init__(self, data):
+        self.body = json.dumps(data, separators=(",", ":")).encode()
+        self.gzip_body = gzip.compress(self.body, compresslevel=9)
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()[:20]}"'
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip, honouring q-values."""
+    explicit, wildcard = None, None
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name in ("gzip", "x-gzip"):
+            explicit = q
+        elif name == "*":
+            wildcard = q
+    # An explicit gzip entry wins over "*", including gzip;q=0
+    q = explicit if explicit is not None else wildcard
+    return q is not None and q > 0
+
+
+class StaticMap:
+    def __init__(self, entries: List[Dict], known_lot_ids):
+        self.entries = entries
+        self.known_lot_ids = frozenset(known_lot_ids)
+        self.payload = EncodedPayload(entries)
+
+
+def _build_static(snapshot) -> StaticMap:
+    import pathfinder
+
+    entries = [
+        {key: value for key, value in entry.items() if key != "available"}
+        for entry in pathfinder.get_parking_lot_info()
+    ]
+    # Lots without a polygon are remembered too, so they don't trigger a rebuild on every request
+    return StaticMap(entries, snapshot.lots_by_id)
+
+
+def invalidate() -> None:
+    """Rebuild the static payload on next use, e.g. after a lot is created."""
+    global _invalidated
+    _invalidated = True
+
+
+def _current_static(snapshot) -> StaticMap:
+    global _static, _invalidated
+
+    static = _static
+    # Lots created by another worker show up in the live snapshot first
+    if static is not None and not _invalidated and static.known_lot_ids.issuperset(snapshot.lots_by_id):
+        return static
+
+    with _lock:
+        static = _static
+        if static is None or _invalidated or not static.known_lot_ids.issuperset(snapshot.lots_by_id):
+            _invalidated = False
+            static = _build_static(snapshot)
+            _static = static
+        return static
+
+
+def get_static_payload() -> EncodedPayload:
+    return _current_static(live_status.get_snapshot()).payload
+
+
+def get_map_payload() -> EncodedPayload:
+    """Static map entries with current availability."""
+    global _merged
+
+    snapshot = live_status.get_snapshot()
+    static = _current_static(snapshot)
+
+    merged = _merged
+    if merged is not None and merged[0] is static and merged[1] is snapshot:
+        return merged[2]
+
+    entries = []
+    for entry in static.entries:
+        lot = snapshot.lots_by_id.get(entry["id"])
+        entries.append(dict(entry, available=lot["availableSpots"] if lot else 0))
+    payload = EncodedPayload(entries)
+    _merged = (static, snapshot, payload)
+    return payload
@@ -0,0 +1,330 @@
+"""Prometheus metrics for requests, database queries, path finding and forecast caches.
+
+Collected in-process with counters and fixed-bucket histograms, and exposed
+at ``/metrics`` in the Prometheus text format (0.0.4):
+
+- ``http_request_duration_seconds`` per method, route template and status,
+  recorded by ``metrics_middleware`` (time until the response starts),
+- ``db_query_duration_seconds`` per statement fingerprint, recorded by
+  db_manager for every statement run on its connections,
+- ``db_pool_wait_seconds`` for time spent waiting on the connection pool,
+- ``pathfinder_nodes_explored`` per search (nodes A* put on its frontier),
+- ``forecast_cache_requests_total`` per cache and hit/miss.
+
+With several uvicorn/gunicorn workers each process only sees its own
+requests. Set METRICS_DIR to a directory shared by the workers: each one
+writes its values there every METRICS_FLUSH_INTERVAL seconds, and
+``/metrics`` merges the files of every live worker, so any worker can be
+scraped. A worker's file is removed when it shuts down (and by gunicorn's
+child_exit hook if it dies), and files of dead pids are skipped.
+
+Statement fingerprints and route traffic are not public: ``/metrics`` needs
+``Authorization: Bearer <METRICS_TOKEN>`` (Prometheus ``bearer_token``) or
+an admin's access token.
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Request
+from starlette.routing import Match
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+METRICS_DIR = os.environ.get("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))  # seconds
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_MAX_SERIES = 500  # label sets per metric; later ones are folded into "other"
+_MAX_FINGERPRINT_LENGTH = 160
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)
+_NODE_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        key = tuple(str(label) for label in labels)
+        if key not in self._series and len(self._series) >= _MAX_SERIES:
+            return ("other",) * len(self.labelnames)
+        return key
+
+    def state(self) -> Dict[Tuple[str, ...], list]:
+        with self._lock:
+            return {key: list(values) for key, values in self._series.items()}
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            key = self._key(labels)
+            series = self._series.setdefault(key, [0.0])
+            series[0] += amount
+
+    def render(self, series: Dict[Tuple[str, ...], list]) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(values[0])}"
+                for key, values in sorted(series.items())]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets=_LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            key = self._key(labels)
+            # Per-bucket counts, then sum and count; cumulated when rendered
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self, series: Dict[Tuple[str, ...], list]) -> List[str]:
+        lines = []
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + (_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + ('+Inf',))} {values[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(values[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {values[-1]}")
+        return lines
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in values
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time until the response starts, by route template.",
+    ("method", "route", "status"),
+)
+QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "SQLite statement execution time, by statement fingerprint.",
+    ("statement",), _QUERY_BUCKETS,
+)
+POOL_WAIT = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled database connection.",
+    (), _QUERY_BUCKETS,
+)
+NODES_EXPLORED = Histogram(
+    "pathfinder_nodes_explored", "Nodes added to the A* frontier per path search.",
+    ("search",), _NODE_BUCKETS,
+)
+FORECAST_CACHE = Counter(
+    "forecast_cache_requests_total", "Forecast cache lookups by cache and result.",
+    ("cache", "result"),
+)
+
+_METRICS = [REQUEST_DURATION, QUERY_DURATION, POOL_WAIT, NODES_EXPLORED, FORECAST_CACHE]
+
+
+# ---------------------- Recording ---------------------- #
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_fingerprints: Dict[str, str] = {}
+
+
+def fingerprint(sql: str) -> str:
+    """Statement text with literals replaced by ? and IN lists collapsed."""
+    cached = _fingerprints.get(sql)
+    if cached is not None:
+        return cached
+    normalized = _WHITESPACE.sub(" ", sql).strip()
+    normalized = _LITERALS.sub("?", normalized)
+    normalized = _IN_LISTS.sub("(?...)", normalized)[:_MAX_FINGERPRINT_LENGTH]
+    if len(_fingerprints) < 10000:
+        _fingerprints[sql] = normalized
+    return normalized
+
+
+def observe_query(sql: str, seconds: float) -> None:
+    QUERY_DURATION.observe(seconds, fingerprint(sql))
+
+
+def observe_pool_wait(seconds: float) -> None:
+    POOL_WAIT.observe(seconds)
+
+
+def observe_search(search: str, nodes: int) -> None:
+    NODES_EXPLORED.observe(nodes, search)
+
+
+def forecast_cache(cache: str, hit: bool) -> None:
+    FORECAST_CACHE.inc(cache, "hit" if hit else "miss")
+
+
+def counting_heuristic(heuristic=None):
+    """Wrap an A* heuristic so the nodes it is asked about can be counted.
+
+    networkx calls the heuristic once per node it adds to the frontier.
+    Returns the wrapped heuristic and a one-item list holding the count.
+    """
+    explored = [0]
+
+    def wrapped(u, v):
+        explored[0] += 1
+        return heuristic(u, v) if heuristic is not None else 0
+
+    return wrapped, explored
+
+
+def _route_template(request: Request) -> str:
+    route = request.scope.get("route")
+    if route is None:
+        # Requests rejected before routing, e.g. by admission control
+        for candidate in request.app.router.routes:
+            match, _ = candidate.matches(request.scope)
+            if match == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def metrics_middleware(request: Request, call_next):
+    if not METRICS_ENABLED:
+        return await call_next(request)
+
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUEST_DURATION.observe(
+            time.perf_counter() - started, request.method, _route_template(request), str(status)
+        )
+
+
+# ---------------------- Export ---------------------- #
+def _snapshot() -> Dict[str, Dict[Tuple[str, ...], list]]:
+    return {metric.name: metric.state() for metric in _METRICS}
+
+
+def _worker_file(pid: int) -> str:
+    return os.path.join(METRICS_DIR, f"metrics-{pid}.json")
+
+
+def flush() -> None:
+    """Write this worker's values to METRICS_DIR for the others to merge."""
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    data = {name: [[list(key), values] for key, values in series.items()]
+            for name, series in _snapshot().items()}
+    path = _worker_file(os.getpid())
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def remove_worker_file(pid: Optional[int] = None) -> None:
+    """Drop a worker's file so its values stop being merged; defaults to this worker."""
+    if not METRICS_DIR:
+        return
+    try:
+        os.remove(_worker_file(os.getpid() if pid is None else pid))
+    except FileNotFoundError:
+        pass
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but owned by another user
+        return True
+    return True
+
+
+def _merge(total: Dict[Tuple[str, ...], list], series: Dict[Tuple[str, ...], list]) -> None:
+    for key, values in series.items():
+        current = total.get(key)
+        if current is None or len(current) != len(values):
+            total[key] = list(values)
+        else:
+            total[key] = [a + b for a, b in zip(current, values)]
+
+
+def _collect() -> Dict[str, Dict[Tuple[str, ...], list]]:
+    merged = _snapshot()
+    if not METRICS_DIR or not os.path.isdir(METRICS_DIR):
+        return merged
+
+    own_file = os.path.basename(_worker_file(os.getpid()))
+    for filename in os.listdir(METRICS_DIR):
+        if not filename.startswith("metrics-") or not filename.endswith(".json") or filename == own_file:
+            continue
+        pid = filename[len("metrics-"):-len(".json")]
+        # Left behind by a worker that was killed before it could clean up
+        if not pid.isdigit() or not _pid_alive(int(pid)):
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, filename)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, series in data.items():
+            if name in merged:
+                _merge(merged[name], {tuple(key): values for key, values in series})
+    return merged
+
+
+def render() -> str:
+    """All metrics, merged across workers when METRICS_DIR is set."""
+    collected = _collect()
+    lines = []
+    for metric in _METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.render(collected.get(metric.name, {})))
+    return "\n".join(lines) + "\n"
+
+
+async def run_flusher(interval: float = METRICS_FLUSH_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(flush)
+        except Exception as e:
+            print(f"Error writing metrics to {METRICS_DIR}: {e}")
@@ -0,0 +1,150 @@
+from datetime import datetime
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from db_manager import execute_query, execute_write_query, execute_transaction
+
+MODEL_TYPE_ARIMA = "arima"
+
+
+class CompactArimaModel:
+    """Fitted ARMA(p, q) parameters plus the recent state needed to forecast.
+
+    Replaces a statsmodels results object, which carries the full training
+    series, with a few floats per lot. ``forecast`` continues the ARMA
+    recursion from the last observations and residuals and matches
+    ``ARIMAResults.forecast`` for ``order=(p, 0, q)`` models with a constant.
+    """
+
+    def __init__(
+        self,
+        mean: float,
+        ar: List[float],
+        ma: List[float],
+        sigma2: float,
+        last_obs: List[float],
+        last_resid: List[float],
+        n_obs: int,
+        fitted_at: Optional[str] = None,
+    ):
+        self.mean = float(mean)
+        self.ar = [float(v) for v in ar]
+        self.ma = [float(v) for v in ma]
+        self.sigma2 = float(sigma2)
+        self.last_obs = [float(v) for v in last_obs]
+        self.last_resid = [float(v) for v in last_resid]
+        self.n_obs = int(n_obs)
+        self.fitted_at = fitted_at or datetime.now().isoformat()
+
+    @classmethod
+    def from_results(cls, results) -> "CompactArimaModel":
+        params = dict(zip(results.model.param_names, np.asarray(results.params)))
+        ar = [params[f"ar.L{i}"] for i in range(1, results.model.k_ar_params + 1)]
+        ma = [params[f"ma.L{i}"] for i in range(1, results.model.k_ma_params + 1)]
+        endog = np.asarray(results.model.endog).ravel()
+        resid = np.asarray(results.resid).ravel()
+
+        return cls(
+            mean=params.get("const", 0.0),
+            ar=ar,
+            ma=ma,
+            sigma2=params.get("sigma2", 0.0),
+            last_obs=endog[len(endog) - len(ar):].tolist() if ar else [],
+            last_resid=resid[len(resid) - len(ma):].tolist() if ma else [],
+            n_obs=len(endog),
+        )
+
+    def forecast(self, steps: int = 1) -> np.ndarray:
+        history = [y - self.mean for y in self.last_obs]
+        residuals = list(self.last_resid)
+        predictions = np.empty(steps)
+
+        for step in range(steps):
+            value = sum(phi * history[-i] for i, phi in enumerate(self.ar, 1))
+            value += sum(theta * residuals[-i] for i, theta in enumerate(self.ma, 1))
+            predictions[step] = self.mean + value
+
+            if self.ar:
+                history = history[1:] + [value]
+            if self.ma:
+                residuals = residuals[1:] + [0.0]
+
+        return predictions
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mean": self.mean,
+            "ar": self.ar,
+            "ma": self.ma,
+            "sigma2": self.sigma2,
+            "last_obs": self.last_obs,
+            "last_resid": self.last_resid,
+            "n_obs": self.n_obs,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], fitted_at: Optional[str] = None) -> "CompactArimaModel":
+        return cls(fitted_at=fitted_at, **data)
+
+
+def _row_to_model(row: Dict) -> Optional[CompactArimaModel]:
+    if row["modelType"] != MODEL_TYPE_ARIMA:
+        return None
+    return CompactArimaModel.from_dict(json.loads(row["params"]), fitted_at=row["fittedAt"])
+
+
+def save_model(lot_id: int, model: CompactArimaModel) -> None:
+    execute_write_query(
+        "INSERT OR REPLACE INTO forecast_models (parkingLotID, modelType, params, fittedAt) VALUES (?, ?, ?, ?)",
+        (lot_id, MODEL_TYPE_ARIMA, json.dumps(model.to_dict()), model.fitted_at),
+    )
+
+
+def save_models(models: Dict[int, CompactArimaModel]) -> None:
+    if not models:
+        return
+    execute_transaction([
+        (
+            "INSERT OR REPLACE INTO forecast_models (parkingLotID, modelType, params, fittedAt) VALUES (?, ?, ?, ?)",
+            (lot_id, MODEL_TYPE_ARIMA, json.dumps(model.to_dict()), model.fitted_at),
+        )
+        for lot_id, model in models.items()
+    ])
+
+
+def load_model(lot_id: int) -> Optional[CompactArimaModel]:
+    try:
+        rows = execute_query(
+            "SELECT modelType, params, fittedAt FROM forecast_models WHERE parkingLotID = ?",
+            (lot_id,),
+        )
+    except sqlite3.Error as e:
+        print(f"Error loading forecast model for lot {lot_id}: {e}")
+        return None
+    return _row_to_model(rows[0]) if rows else None
+
+
+def load_models(lot_ids: Iterable[int]) -> Dict[int, CompactArimaModel]:
+    lot_ids = list(lot_ids)
+    if not lot_ids:
+        return {}
+
+    placeholders = ", ".join("?" for _ in lot_ids)
+    try:
+        rows = execute_query(
+            f"SELECT parkingLotID, modelType, params, fittedAt FROM forecast_models WHERE parkingLotID IN ({placeholders})",
+            tuple(lot_ids),
+        )
+    except sqlite3.Error as e:
+        print(f"Error loading forecast models: {e}")
+        return {}
+
+    models = {}
+    for row in rows:
+        model = _row_to_model(row)
+        if model is not None:
+            models[row["parkingLotID"]] = model
+    return models
@@ -0,0 +1,110 @@
+"""Keyset pagination for list endpoints.
+
+A page is the rows strictly after the last row of the previous page in the
+endpoint's sort order, e.g. ``(startTime, reservationID) < (?, ?)`` for
+newest-first reservations. Backed by an index on the sort columns, each page
+costs the same however deep the client has paged, and rows inserted
+meanwhile do not shift later pages the way OFFSET does.
+
+The response body stays a plain JSON array. When more rows follow, the
+opaque cursor for the next page is returned in ``X-Next-Cursor`` and a
+``Link: <...>; rel="next"`` header holds the full URL of the next page.
+``stream_all`` walks every page for the admin export endpoints, holding one
+page in memory at a time.
+"""
+import base64
+import binascii
+import json
+from typing import Any, Callable, Iterator, List, Mapping, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+
+import fast_json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+EXPORT_PAGE_SIZE = 1000
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values), separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> Tuple[Any, ...]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return tuple(values)
+
+
+class Keyset:
+    """Sort columns of a list endpoint, most significant first; the last must be unique."""
+
+    def __init__(self, *columns: str, descending: bool = True):
+        self.columns = columns
+        self.descending = descending
+
+    def after(self, cursor: Optional[str]) -> Tuple[str, tuple]:
+        """SQL condition selecting the rows after ``cursor``, and its parameters."""
+        if cursor is None:
+            return "1 = 1", ()
+        values = decode_cursor(cursor, len(self.columns))
+        placeholders = ", ".join("?" * len(self.columns))
+        return f"({', '.join(self.columns)}) {'<' if self.descending else '>'} ({placeholders})", values
+
+    def order_by(self) -> str:
+        direction = " DESC" if self.descending else ""
+        return ", ".join(f"{column}{direction}" for column in self.columns)
+
+    def cursor_for(self, row: Mapping) -> str:
+        return encode_cursor([row[column] for column in self.columns])
+
+
+def page_response(
+    request: Request,
+    rows: List[Mapping],
+    keyset: Keyset,
+    limit: int,
+    model: Optional[Type[BaseModel]] = None,
+) -> Response:
+    """List response for rows fetched with ``LIMIT limit + 1``; the extra row only signals a next page."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = keyset.cursor_for(rows[-1])
+
+    response = fast_json.list_response(rows, model)
+    if next_cursor is not None:
+        next_url = request.url.include_query_params(cursor=next_cursor, limit=limit)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return response
+
+
+def stream_all(
+    fetch_page: Callable[[Optional[str], int], List[Mapping]],
+    keyset: Keyset,
+    model: Optional[Type[BaseModel]] = None,
+) -> StreamingResponse:
+    """Every row as one JSON array, fetched page by page with ``fetch_page(cursor, limit)``."""
+
+    def body() -> Iterator[bytes]:
+        yield b"["
+        cursor, first = None, True
+        while True:
+            rows = fetch_page(cursor, EXPORT_PAGE_SIZE)
+            if rows:
+                chunk = fast_json.dumps(list(fast_json.project(rows, model)) if model is not None else rows)[1:-1]
+                yield chunk if first else b"," + chunk
+                first = False
+            if len(rows) < EXPORT_PAGE_SIZE:
+                break
+            cursor = keyset.cursor_for(rows[-1])
+        yield b"]"
+
+    return StreamingResponse(body(), media_type="application/json")
@@ -12,11 +12,17 @@ from pathlib import Path
 import time
 import sqlite3
 import json
+import re
+
+from db_manager import DB_PATH, TimedConnection
+import graph_store
+import metrics
 
 _graph_cache = None
 _polygon_gdf_cache = None
 _last_cache_time = 0
 _CACHE_DURATION = 3600
+_shared_graph = None
 
 
 def _load_polygon_data():
@@ -97,11 +103,117 @@ def _load_road_graph():
     return G_undirected, gdf_polygon
 
 
+def euclidean_distance(point1, point2):
+    lat1, lng1 = point1
+    lat2, lng2 = point2
+    return ((lat1 - lat2) ** 2 + (lng1 - lng2) ** 2) ** 0.5
+
+
+def a_star_heuristic(graph, current, target):
+    if 'y' in graph.nodes[current] and 'x' in graph.nodes[current] and 'y' in graph.nodes[target] and 'x' in \
+            graph.nodes[target]:
+        point1 = (graph.nodes[current]['y'], graph.nodes[current]['x'])
+        point2 = (graph.nodes[target]['y'], graph.nodes[target]['x'])
+        return euclidean_distance(point1, point2)
+    return 0
+
+
+class _NetworkxRouter:
+    """A* over the networkx graph built in this process."""
+
+    def __init__(self, graph, lots):
+        self.graph = graph
+        self.lots = lots
+
+    def nearest_node(self, lng: float, lat: float):
+        return ox.distance.nearest_nodes(self.graph, lng, lat)
+
+    def route(self, start, end, search: str, heuristic=None) -> Optional[Tuple[List, float]]:
+        """Path and its length, or None if unreachable; no heuristic means plain Dijkstra order."""
+        counting, explored = metrics.counting_heuristic(heuristic)
+        try:
+            try:
+                path = nx.astar_path(self.graph, start, end, weight="length", heuristic=counting)
+            except KeyError:
+                path = nx.astar_path(self.graph, start, end, weight="weight", heuristic=counting)
+        except nx.NetworkXNoPath:
+            return None
+        metrics.observe_search(search, explored[0])
+
+        try:
+            distance = nx.path_weight(self.graph, path, weight="length")
+        except KeyError:
+            distance = 0
+            for i in range(len(path) - 1):
+                edge_data = self.graph.get_edge_data(path[i], path[i + 1])
+                edge_length = min(d.get('length', d.get('weight', 0.001))
+                                  for d in edge_data.values())
+                distance += edge_length
+        return path, distance
+
+    def routes(self, start, ends, search: str) -> Dict:
+        heuristic = lambda u, v: a_star_heuristic(self.graph, u, v)
+        return {end: self.route(start, end, search, heuristic) for end in ends}
+
+    def coords(self, path: List) -> List[Dict]:
+        path_coords = []
+        for node in path:
+            y_coord = self.graph.nodes[node].get("y")
+            x_coord = self.graph.nodes[node].get("x")
+
+            if y_coord is not None and x_coord is not None:
+                path_coords.append({
+                    "lat": float(y_coord),
+                    "lng": float(x_coord)
+                })
+        return path_coords
+
+
+def _get_router():
+    """The shared memory-mapped graph when GRAPH_STORE_DIR is set, else this process's networkx graph."""
+    global _shared_graph
+
+    if graph_store.GRAPH_STORE_DIR:
+        if _shared_graph is None:
+            _shared_graph = graph_store.SharedGraph(graph_store.GRAPH_STORE_DIR)
+        return _shared_graph
+
+    G_undirected, gdf_polygon = _load_road_graph()
+    return _NetworkxRouter(G_undirected, gdf_polygon)
+
+
+def _lot_index():
+    if graph_store.GRAPH_STORE_DIR:
+        return _get_router().lots
+    return _load_polygon_data()
+
+
+def _match_lot(lots, name: str):
+    """Polygon rows matching a parking lot name, best match first; empty if none match."""
+    lot_number_match = re.search(r'(?:Lot\s+)?(\d+[A-Za-z]?)', name)
+
+    if lot_number_match:
+        lot_number = lot_number_match.group(1)
+        lot_match = lots[lots['Name'].str.contains(f"LOT {lot_number}", case=False, na=False)]
+
+        if lot_match.empty:
+            lot_match = lots[lots['Name'].str.contains(f"{lot_number}$", na=False)]
+    else:
+        lot_match = lots[lots['Name'].str.contains(name, case=False, na=False)]
+
+    if lot_match.empty:
+        simplified_name = re.sub(r'[^A-Za-z0-9]', '', name).lower()
+        lot_match = lots[lots['Name'].apply(
+            lambda x: bool(re.sub(r'[^A-Za-z0-9]', '', str(x)).lower() in simplified_name)
+        )]
+    return lot_match
+
+
 def get_parking_lot_info() -> List[Dict]:
-    gdf_polygon = _load_polygon_data()
+    gdf_polygon = _lot_index()
 
-    db_path = Path(__file__).parent / "parking.db"
-    conn = sqlite3.connect(str(db_path))
+    db_path = DB_PATH
+    conn = sqlite3.connect(str(db_path), factory=TimedConnection)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
@@ -112,24 +224,7 @@ def get_parking_lot_info() -> List[Dict]:
         result = []
         for lot in parking_lots:
             name = lot["name"]
-
-            import re
-            lot_number_match = re.search(r'(?:Lot\s+)?(\d+[A-Za-z]?)', name)
-
-            if lot_number_match:
-                lot_number = lot_number_match.group(1)
-                lot_match = gdf_polygon[gdf_polygon['Name'].str.contains(f"LOT {lot_number}", case=False, na=False)]
-
-                if lot_match.empty:
-                    lot_match = gdf_polygon[gdf_polygon['Name'].str.contains(f"{lot_number}$", na=False)]
-            else:
-                lot_match = gdf_polygon[gdf_polygon['Name'].str.contains(name, case=False, na=False)]
-
-            if lot_match.empty:
-                simplified_name = re.sub(r'[^A-Za-z0-9]', '', name).lower()
-                lot_match = gdf_polygon[gdf_polygon['Name'].apply(
-                    lambda x: bool(re.sub(r'[^A-Za-z0-9]', '', str(x)).lower() in simplified_name)
-                )]
+            lot_match = _match_lot(gdf_polygon, name)
 
             if not lot_match.empty:
                 match = lot_match.iloc[0]
@@ -155,14 +250,13 @@ def get_parking_lot_info() -> List[Dict]:
 
 
 def find_path(start_lat: float, start_lng: float, end_id: int) -> Dict:
-    G_undirected, gdf_polygon = _load_road_graph()
-
-    start_point = (start_lng, start_lat)
+    router = _get_router()
+    gdf_polygon = router.lots
 
-    start_node = ox.distance.nearest_nodes(G_undirected, *start_point)
+    start_node = router.nearest_node(start_lng, start_lat)
 
-    db_path = Path(__file__).parent / "parking.db"
-    conn = sqlite3.connect(str(db_path))
+    db_path = DB_PATH
+    conn = sqlite3.connect(str(db_path), factory=TimedConnection)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
@@ -174,114 +268,57 @@ def find_path(start_lat: float, start_lng: float, end_id: int) -> Dict:
             raise HTTPException(status_code=404, detail="Parking lot not found")
 
         name = parking_lot["name"]
-
-        import re
-        lot_number_match = re.search(r'(?:Lot\s+)?(\d+[A-Za-z]?)', name)
-
-        if lot_number_match:
-            lot_number = lot_number_match.group(1)
-            lot_match = gdf_polygon[gdf_polygon['Name'].str.contains(f"LOT {lot_number}", case=False, na=False)]
-
-            if lot_match.empty:
-                lot_match = gdf_polygon[gdf_polygon['Name'].str.contains(f"{lot_number}$", na=False)]
-        else:
-            lot_match = gdf_polygon[gdf_polygon['Name'].str.contains(name, case=False, na=False)]
+        lot_match = _match_lot(gdf_polygon, name)
 
         if lot_match.empty:
-            simplified_name = re.sub(r'[^A-Za-z0-9]', '', name).lower()
-            lot_match = gdf_polygon[gdf_polygon['Name'].apply(
-                lambda x: bool(re.sub(r'[^A-Za-z0-9]', '', str(x)).lower() in simplified_name)
-            )]
-
+            print(f"WARNING: Could not find lot '{name}' in map data, using first lot as fallback")
+            lot_match = gdf_polygon.head(1)
             if lot_match.empty:
-                print(f"WARNING: Could not find lot '{name}' in map data, using first lot as fallback")
-                lot_match = gdf_polygon.head(1)
-                if lot_match.empty:
-                    raise HTTPException(status_code=404,
-                                        detail=f"Parking lot '{name}' not found in map data and no fallback available")
+                raise HTTPException(status_code=404,
+                                    detail=f"Parking lot '{name}' not found in map data and no fallback available")
 
         match = lot_match.iloc[0]
 
         end_node = match.name
 
-        try:
-            try:
-                path = nx.astar_path(G_undirected, start_node, end_node, weight="length")
-            except KeyError:
-                path = nx.astar_path(G_undirected, start_node, end_node, weight="weight")
-
-            path_coords = []
-            for node in path:
-                y_coord = G_undirected.nodes[node].get("y")
-                x_coord = G_undirected.nodes[node].get("x")
-
-                if y_coord is not None and x_coord is not None:
-                    path_coords.append({
-                        "lat": float(y_coord),
-                        "lng": float(x_coord)
-                    })
-
-            try:
-                distance = nx.path_weight(G_undirected, path, weight="length")
-            except KeyError:
-                distance = 0
-                for i in range(len(path) - 1):
-                    edge_data = G_undirected.get_edge_data(path[i], path[i + 1])
-                    edge_length = min(d.get('length', d.get('weight', 0.001))
-                                      for d in edge_data.values())
-                    distance += edge_length
-
-            return {
-                "path": path_coords,
-                "distance": round(distance, 2),
-                "destination": {
-                    "id": parking_lot["parkingLotID"],
-                    "name": parking_lot["name"],
-                    "location": parking_lot["location"],
-                    "available": parking_lot["capacity"] - parking_lot["reserved_slots"]
-                }
-            }
-        except nx.NetworkXNoPath:
+        route = router.route(start_node, end_node, "path")
+        if route is None:
             raise HTTPException(status_code=404, detail="No path found between the given locations")
+        path, distance = route
+
+        return {
+            "path": router.coords(path),
+            "distance": round(distance, 2),
+            "destination": {
+                "id": parking_lot["parkingLotID"],
+                "name": parking_lot["name"],
+                "location": parking_lot["location"],
+                "available": parking_lot["capacity"] - parking_lot["reserved_slots"]
+            }
+        }
 
     finally:
         conn.close()
 
 
-def euclidean_distance(point1, point2):
-    lat1, lng1 = point1
-    lat2, lng2 = point2
-    return ((lat1 - lat2) ** 2 + (lng1 - lng2) ** 2) ** 0.5
-
-
-def a_star_heuristic(graph, current, target):
-    if 'y' in graph.nodes[current] and 'x' in graph.nodes[current] and 'y' in graph.nodes[target] and 'x' in \
-            graph.nodes[target]:
-        point1 = (graph.nodes[current]['y'], graph.nodes[current]['x'])
-        point2 = (graph.nodes[target]['y'], graph.nodes[target]['x'])
-        return euclidean_distance(point1, point2)
-    return 0
-
-
 def find_nearest_available_lots(start_lat: float, start_lng: float,
                                 limit: int = 5,
                                 min_available: int = 1,
                                 prefer_ev: bool = False,
                                 max_distance: Optional[float] = None) -> List[Dict]:
 
-    G_undirected, gdf_polygon = _load_road_graph()
-
-    start_point = (start_lng, start_lat)
+    router = _get_router()
+    gdf_polygon = router.lots
 
-    start_node = ox.distance.nearest_nodes(G_undirected, *start_point)
+    start_node = router.nearest_node(start_lng, start_lat)
 
     try:
         from db_manager import execute_query
         lots_query = "SELECT * FROM parking_lots WHERE (capacity - reserved_slots) >= ?"
         available_lots = execute_query(lots_query, (min_available,))
     except ImportError:
-        db_path = Path(__file__).parent / "parking.db"
-        conn = sqlite3.connect(str(db_path))
+        db_path = DB_PATH
+        conn = sqlite3.connect(str(db_path), factory=TimedConnection)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
@@ -303,112 +340,70 @@ def find_nearest_available_lots(start_lat: float, start_lng: float,
     except ImportError:
         use_forecasting = False
 
-    lots_with_paths = []
-    import re
+    lot_forecasts = {}
+    if use_forecasting:
+        try:
+            bulk = forecasting.get_bulk_forecast(
+                lot_ids=[lot["parkingLotID"] for lot in available_lots],
+                hours_ahead=24,
+                backend=forecasting.FAST_FORECAST_BACKEND,
+            )
+            lot_forecasts = forecasting.split_bulk_forecast(bulk)
+        except Exception as e:
+            print(f"Error getting forecasting data: {e}")
 
+    matched_lots = []
     for lot in available_lots:
         name = lot["name"]
-
-        lot_number_match = re.search(r'(?:Lot\s+)?(\d+[A-Za-z]?)', name)
-
-        if lot_number_match:
-            lot_number = lot_number_match.group(1)
-            lot_match = gdf_polygon[gdf_polygon['Name'].str.contains(f"LOT {lot_number}", case=False, na=False)]
-
-            if lot_match.empty:
-                lot_match = gdf_polygon[gdf_polygon['Name'].str.contains(f"{lot_number}$", na=False)]
-        else:
-            lot_match = gdf_polygon[gdf_polygon['Name'].str.contains(name, case=False, na=False)]
+        lot_match = _match_lot(gdf_polygon, name)
 
         if lot_match.empty:
-            simplified_name = re.sub(r'[^A-Za-z0-9]', '', name).lower()
-            lot_match = gdf_polygon[gdf_polygon['Name'].apply(
-                lambda x: bool(re.sub(r'[^A-Za-z0-9]', '', str(x)).lower() in simplified_name)
-            )]
+            print(f"Skipping lot '{name}' - no match found in map data")
+            continue
 
-            if lot_match.empty:
-                print(f"Skipping lot '{name}' - no match found in map data")
-                continue
+        matched_lots.append((lot, lot_match.iloc[0]))
 
-        match = lot_match.iloc[0]
-        lot_node = match.name
+    # Searched together, so the shared graph answers every lot from one Dijkstra run
+    routes = router.routes(start_node, {match.name for _, match in matched_lots}, "nearest")
 
-        try:
-            try:
-                path = nx.astar_path(
-                    G_undirected,
-                    start_node,
-                    lot_node,
-                    weight="length",
-                    heuristic=lambda u, v: a_star_heuristic(G_undirected, u, v)
-                )
-            except KeyError:
-                path = nx.astar_path(
-                    G_undirected,
-                    start_node,
-                    lot_node,
-                    weight="weight",
-                    heuristic=lambda u, v: a_star_heuristic(G_undirected, u, v)
-                )
-
-            try:
-                distance = nx.path_weight(G_undirected, path, weight="length")
-            except KeyError:
-                distance = 0
-                for i in range(len(path) - 1):
-                    edge_data = G_undirected.get_edge_data(path[i], path[i + 1])
-                    edge_length = min(d.get('length', d.get('weight', 0.001))
-                                      for d in edge_data.values())
-                    distance += edge_length
-
-            if max_distance and distance > max_distance:
-                continue
-
-            path_coords = []
-            for node in path:
-                y_coord = G_undirected.nodes[node].get("y")
-                x_coord = G_undirected.nodes[node].get("x")
-
-                if y_coord is not None and x_coord is not None:
-                    path_coords.append({
-                        "lat": float(y_coord),
-                        "lng": float(x_coord)
-                    })
-
-            lot_details = {
-                "id": lot["parkingLotID"],
-                "name": lot["name"],
-                "location": lot["location"],
-                "distance": round(distance, 2),
-                "available": lot["capacity"] - lot["reserved_slots"],
-                "capacity": lot["capacity"],
-                "evSlots": lot["evSlots"],
-                "coords": {
-                    "lat": float(match["Y"]),
-                    "lng": float(match["X"])
-                },
-                "path": path_coords,
-                "estimated_time_minutes": round(distance * 3)
-            }
+    lots_with_paths = []
+    for lot, match in matched_lots:
+        route = routes[match.name]
+        if route is None:
+            continue
+        path, distance = route
 
-            if use_forecasting:
-                try:
-                    current_congestion = forecasting.get_parking_lot_forecast(lot["parkingLotID"], 1)[0]
-                    lot_details["congestion"] = {
-                        "level": current_congestion["congestion_level"],
-                        "occupancy_rate": current_congestion["occupancy_rate"],
-                        "predicted_available": current_congestion["predicted_available"]
-                    }
+        if max_distance and distance > max_distance:
+            continue
 
-                    best_time = forecasting.get_best_parking_time(lot["parkingLotID"])
-                    lot_details["best_parking_time"] = best_time
-                except Exception as e:
-                    print(f"Error getting forecasting data: {e}")
+        lot_details = {
+            "id": lot["parkingLotID"],
+            "name": lot["name"],
+            "location": lot["location"],
+            "distance": round(distance, 2),
+            "available": lot["capacity"] - lot["reserved_slots"],
+            "capacity": lot["capacity"],
+            "evSlots": lot["evSlots"],
+            "coords": {
+                "lat": float(match["Y"]),
+                "lng": float(match["X"])
+            },
+            "path": router.coords(path),
+            "estimated_time_minutes": round(distance * 3)
+        }
+
+        forecast = lot_forecasts.get(lot["parkingLotID"])
+        if forecast:
+            current_congestion = forecast[0]
+            lot_details["congestion"] = {
+                "level": current_congestion["congestion_level"],
+                "occupancy_rate": current_congestion["occupancy_rate"],
+                "predicted_available": current_congestion["predicted_available"]
+            }
 
-            lots_with_paths.append(lot_details)
+            lot_details["best_parking_time"] = forecasting.best_time_from_forecast(forecast)
 
-        except nx.NetworkXNoPath:
-            continue
+        lots_with_paths.append(lot_details)
 
     if prefer_ev:
         lots_with_paths.sort(key=lambda x: (
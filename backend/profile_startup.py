@@ -0,0 +1,142 @@
+"""Startup profile: what importing the app costs and how soon it answers.
+
+Imports ``main`` in a fresh interpreter with ``-X importtime`` and reports
+the total, the slowest top-level packages (self time summed over their
+submodules) and the slowest individual imports. With ``--serve`` it also
+starts uvicorn against a temporary database and times the first successful
+``GET /`` and ``POST /token`` attempt.
+
+The geo (osmnx, geopandas, shapely, networkx) and statistics (statsmodels)
+stacks are meant to load on first use or in the background warm-up, never
+while the app starts; ``--forbid`` fails the run if any of them is imported.
+
+    python profile_startup.py --top 15
+    python profile_startup.py --serve --budget 1.5
+"""
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import httpx
+import tabulate as tabulate_module
+
+BACKEND_DIR = Path(__file__).parent
+DEFAULT_FORBIDDEN = "osmnx,geopandas,shapely,networkx,statsmodels,sklearn,scipy,pandas"
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile_imports(module: str, env: Dict[str, str]) -> List[Tuple[str, int, int, int]]:
+    """(name, self µs, cumulative µs, depth) for every module imported by ``module``."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return imports
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_response(env: Dict[str, str], timeout: float = 60) -> Dict[str, float]:
+    """Seconds from launching uvicorn until / and /token first answer."""
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    timings = {}
+    try:
+        with httpx.Client(base_url=base_url, timeout=5) as client:
+            while len(timings) < 2 and time.perf_counter() - started < timeout:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+                try:
+                    if "root" not in timings and client.get("/").status_code == 200:
+                        timings["root"] = time.perf_counter() - started
+                    # Unknown account, but a 401 means the route and password check are up
+                    if "token" not in timings and client.post(
+                        "/token", data={"username": "nobody@stonybrook.edu", "password": "x"}
+                    ).status_code in (200, 401):
+                        timings["token"] = time.perf_counter() - started
+                except httpx.TransportError:
+                    time.sleep(0.02)
+    finally:
+        process.terminate()
+        process.wait()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile app import time and time to first response")
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--top", type=int, default=20, help="Rows in each table")
+    parser.add_argument("--forbid", default=DEFAULT_FORBIDDEN,
+                        help="Comma-separated packages that must not be imported at startup ('' to allow all)")
+    parser.add_argument("--serve", action="store_true", help="Also time the first / and /token responses")
+    parser.add_argument("--budget", type=float, help="Fail if importing the app takes longer (seconds)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="startup-") as tmp:
+        env = dict(os.environ, DATABASE=os.path.join(tmp, "parking.db"), WARMUP_ENABLED="0")
+        imports = profile_imports(args.module, env)
+        served = time_to_first_response(env) if args.serve else {}
+
+    total = next((cumulative for name, _, cumulative, depth in imports if name == args.module and depth == 0), 0)
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in imports:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"import {args.module}: {total / 1e6:.3f}s, {len(imports)} modules\n")
+    print(tabulate_module.tabulate(
+        [[package, round(us / 1000, 1)] for package, us in sorted(by_package.items(), key=lambda x: -x[1])[:args.top]],
+        headers=["Package", "Self time (ms)"],
+    ))
+    print()
+    print(tabulate_module.tabulate(
+        [[name, depth, round(self_us / 1000, 1), round(cumulative_us / 1000, 1)]
+         for name, self_us, cumulative_us, depth in sorted(imports, key=lambda x: -x[2])[:args.top]],
+        headers=["Module", "Depth", "Self (ms)", "Cumulative (ms)"],
+    ))
+    if served:
+        print()
+        for route, seconds in served.items():
+            print(f"First {route} response after {seconds:.3f}s")
+
+    failed = False
+    forbidden = {package for package in args.forbid.split(",") if package}
+    loaded = sorted(forbidden & set(by_package))
+    if loaded:
+        print(f"\nImported at startup but should be deferred: {', '.join(loaded)}")
+        failed = True
+    if args.budget is not None and total / 1e6 > args.budget:
+        print(f"\nImport took {total / 1e6:.3f}s, over the {args.budget}s budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
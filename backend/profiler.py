@@ -0,0 +1,157 @@
+"""On-demand sampling CPU profiler.
+
+A background thread reads every thread's stack with ``sys._current_frames``
+at a fixed interval and counts identical stacks. Output is in the collapsed
+format (``thread;outer;...;inner count`` per line) that flamegraph.pl,
+speedscope and inferno read directly. Busy threads hold the GIL for up to
+the interpreter's switch interval (5 ms), so that bounds the effective
+sampling rate.
+
+Nothing runs until a profile is requested, either for a fixed time through
+``POST /admin/profile`` or, when REQUEST_PROFILING_ENABLED=1, for a single
+request that an admin sends with an ``X-Profile: 1`` header. Without that
+setting the per-request middleware is not installed at all.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+import auth
+import token_service
+
+REQUEST_PROFILING_ENABLED = os.environ.get("REQUEST_PROFILING_ENABLED", "0") == "1"
+MAX_PROFILE_SECONDS = 60
+DEFAULT_INTERVAL = 0.005  # seconds
+CONTENT_TYPE = "text/plain; charset=utf-8"
+
+# Leaf frames of threads parked waiting for work; dropped unless idle stacks are requested
+_IDLE_FUNCTIONS = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+_profile_lock = threading.Lock()
+
+
+class Sampler:
+    def __init__(self, interval: float = DEFAULT_INTERVAL, include_idle: bool = False, exclude=()):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.exclude = set(exclude)
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._labels: Dict[object, str] = {}
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            location = "/".join(code.co_filename.replace("\\", "/").split("/")[-2:])
+            label = self._labels[code] = f"{code.co_name} ({location}:{code.co_firstlineno})"
+        return label
+
+    def _is_idle(self, frame) -> bool:
+        filename = os.path.basename(frame.f_code.co_filename)
+        return (filename, frame.f_code.co_name) in _IDLE_FUNCTIONS
+
+    def _run(self) -> None:
+        self.exclude.add(threading.get_ident())
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in self.exclude or (not self.include_idle and self._is_idle(frame)):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _start_sampler(interval: float, include_idle: bool, exclude=()) -> Sampler:
+    # One profile at a time; overlapping samplers would skew each other
+    if not _profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    sampler = Sampler(interval, include_idle, exclude)
+    sampler.start()
+    return sampler
+
+
+def _stop_sampler(sampler: Sampler) -> None:
+    try:
+        sampler.stop()
+    finally:
+        _profile_lock.release()
+
+
+def profile(seconds: float, interval: float = DEFAULT_INTERVAL, include_idle: bool = False) -> Tuple[str, int]:
+    """Sample every thread for ``seconds``; returns collapsed stacks and the sample count."""
+    # The calling thread only sleeps, leave it out
+    sampler = _start_sampler(interval, include_idle, exclude=[threading.get_ident()])
+    try:
+        time.sleep(min(seconds, MAX_PROFILE_SECONDS))
+    finally:
+        _stop_sampler(sampler)
+    return sampler.collapsed(), sampler.samples
+
+
+def _is_admin_request(request: Request) -> bool:
+    authorization = request.headers.get("Authorization", "")
+    if not authorization.startswith("Bearer "):
+        return False
+    try:
+        claims = token_service.decode_access_token(authorization[7:])
+    except Exception:
+        return False
+    return not auth.is_revoked(claims["user_id"], claims["iat"]) and auth.is_admin(claims["user_id"])
+
+
+async def profile_request_middleware(request: Request, call_next):
+    """Profile one request sent with X-Profile: 1 by an admin, returning the stacks instead of its body."""
+    if request.headers.get("X-Profile") != "1" or not _is_admin_request(request):
+        return await call_next(request)
+
+    try:
+        sampler = _start_sampler(DEFAULT_INTERVAL / 5, include_idle=False)
+    except HTTPException as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.detail})
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+        # Streaming bodies are produced while being sent, so drain it inside the profile
+        if not response.headers.get("content-type", "").startswith("text/event-stream"):
+            async for _ in response.body_iterator:
+                pass
+    finally:
+        _stop_sampler(sampler)
+
+    return Response(
+        content=sampler.collapsed(),
+        media_type=CONTENT_TYPE,
+        headers={
+            "X-Profile-Status": str(response.status_code),
+            "X-Profile-Duration-Ms": f"{(time.perf_counter() - started) * 1000:.1f}",
+            "X-Profile-Samples": str(sampler.samples),
+        },
+    )
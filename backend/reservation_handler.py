@@ -6,6 +6,10 @@ from fastapi import HTTPException
 from typing import Dict, Any, List, Optional, Tuple
 
 from db_manager import get_db_connection, execute_query
+import availability_stream
+import forecast_snapshot
+import forecasting
+import live_status
 
 MAX_RETRIES = 3
 RETRY_BACKOFF_BASE = 0.1  # seconds
@@ -135,6 +139,10 @@ def create_reservation(
             )
 
             conn.commit()
+            forecasting.observe_reservation(parking_lot_id, start_time, 1)
+            forecast_snapshot.invalidate(parking_lot_id)
+            live_status.invalidate()
+            availability_stream.publish(parking_lot_id)
 
             return {
                 "reservationID": reservation_id,
@@ -229,6 +237,10 @@ def cancel_reservation(
                 )
 
             conn.commit()
+            forecasting.observe_reservation(res["parkingLotID"], start_time, -1)
+            forecast_snapshot.invalidate(res["parkingLotID"])
+            live_status.invalidate()
+            availability_stream.publish(res["parkingLotID"])
             return {"message": refund_message}
 
         except sqlite3.Error as e:
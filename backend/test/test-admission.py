@@ -0,0 +1,87 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.middleware.base import BaseHTTPMiddleware
+import admission
+
+
+def _create_app():
+    app = FastAPI()
+    app.add_middleware(BaseHTTPMiddleware, dispatch=admission.admission_middleware)
+
+    @app.get("/parking/nearest")
+    def slow_endpoint():
+        time.sleep(0.3)
+        return {}
+
+    @app.get("/parking/lots")
+    def cheap_endpoint():
+        return {}
+
+    return app
+
+# Test the token bucket rejects a client once its burst is spent
+def test_rate_limit_per_client():
+    policy = admission.EndpointPolicy("test", ["/test"], rate=1, burst=3, max_concurrency=1, max_queue=1, queue_timeout=1)
+
+    assert [policy.take_token("ip:a") == 0 for _ in range(4)] == [True, True, True, False]
+    assert policy.take_token("ip:b") == 0
+
+# Test requests beyond the concurrency cap are shed once they wait past the target
+def test_load_shedding(monkeypatch):
+    policy = admission.EndpointPolicy(
+        "nearest", ["/parking/nearest"], rate=1000, burst=1000, max_concurrency=2, max_queue=8, queue_timeout=0.1
+    )
+    monkeypatch.setattr(admission, "POLICIES", [policy])
+
+    with TestClient(_create_app()) as client:
+        with ThreadPoolExecutor(6) as executor:
+            codes = list(executor.map(lambda _: client.get("/parking/nearest").status_code, range(6)))
+        assert client.get("/parking/lots").status_code == 200
+
+    assert sorted(codes) == [200, 200, 503, 503, 503, 503]
+    assert policy.stats()["shed"] == 4
+    assert policy.stats()["in_flight"] == 0
+    # Shed requests hand back no permits they did not take, and keep none
+    assert policy._semaphore._value == policy.max_concurrency
+
+# Test anonymous clients behind a trusted proxy get their own buckets, keyed on X-Forwarded-For
+def test_rate_limit_by_forwarded_client_ip(monkeypatch):
+    policy = admission.EndpointPolicy(
+        "nearest", ["/parking/nearest"], rate=0.01, burst=2, max_concurrency=8, max_queue=8, queue_timeout=1
+    )
+    monkeypatch.setattr(admission, "POLICIES", [policy])
+    monkeypatch.setattr(admission, "TRUSTED_PROXY_HOPS", 1)
+    monkeypatch.setattr(time, "sleep", lambda _: None)
+
+    with TestClient(_create_app()) as client:
+        def get(forwarded_for):
+            return client.get("/parking/nearest", headers={"X-Forwarded-For": forwarded_for}).status_code
+
+        assert [get("10.0.0.1") for _ in range(3)] == [200, 200, 429]
+        assert [get("10.0.0.2") for _ in range(2)] == [200, 200]
+        # A forged leftmost address does not buy a fresh bucket
+        assert get("1.2.3.4, 10.0.0.1") == 429
+
+# Test anonymous requests are not rate limited when the client IP cannot be trusted, but users still are
+def test_no_rate_limit_for_anonymous_without_trusted_proxy(monkeypatch):
+    import token_service
+
+    policy = admission.EndpointPolicy(
+        "nearest", ["/parking/nearest"], rate=0.01, burst=2, max_concurrency=8, max_queue=8, queue_timeout=1
+    )
+    monkeypatch.setattr(admission, "POLICIES", [policy])
+    monkeypatch.setattr(admission, "TRUSTED_PROXY_HOPS", None)
+    monkeypatch.setattr(time, "sleep", lambda _: None)
+    token = token_service.create_access_token({"sub": "a@stonybrook.edu", "user_id": 1})
+
+    with TestClient(_create_app()) as client:
+        assert [client.get("/parking/nearest").status_code for _ in range(5)] == [200] * 5
+        authorized = {"Authorization": f"Bearer {token}"}
+        assert [client.get("/parking/nearest", headers=authorized).status_code for _ in range(3)] == [200, 200, 429]
+
+    assert policy.stats()["rate_limited"] == 1
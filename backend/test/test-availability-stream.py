@@ -0,0 +1,58 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import threading
+import availability_stream
+import live_status
+
+
+class _Snapshot:
+    def __init__(self, reserved):
+        self.lots = [
+            {"parkingLotID": lot_id, "totalSpots": 10, "occupiedSpots": count,
+             "availableSpots": 10 - count, "status": "Available"}
+            for lot_id, count in reserved.items()
+        ]
+        self.lots_by_id = {lot["parkingLotID"]: lot for lot in self.lots}
+
+
+# Test published lots reach subscribers long before the next tick
+def test_publish_wakes_broadcaster(monkeypatch):
+    state = {"snapshot": _Snapshot({1: 0, 2: 0})}
+    monkeypatch.setattr(live_status, "get_snapshot", lambda: state["snapshot"])
+    monkeypatch.setattr(availability_stream, "_last_sent", {})
+    monkeypatch.setattr(availability_stream, "_last_snapshot", None)
+    monkeypatch.setattr(availability_stream, "_loop", None)
+    monkeypatch.setattr(availability_stream, "_wakeup", None)
+
+    async def scenario():
+        subscriber = availability_stream.Subscriber()
+        availability_stream._subscribers.add(subscriber)
+        broadcaster = asyncio.create_task(availability_stream.run_broadcaster(tick=0.05))
+        try:
+            await asyncio.sleep(0.2)
+            # The tick is now far away; only publish can deliver the change in time
+            broadcaster.cancel()
+            broadcaster = asyncio.create_task(availability_stream.run_broadcaster(tick=60))
+            await asyncio.sleep(0)
+
+            state["snapshot"] = _Snapshot({1: 3, 2: 0})
+            thread = threading.Thread(target=availability_stream.publish, args=(1,))
+            thread.start()
+            thread.join()
+            return await asyncio.wait_for(subscriber.queue.get(), timeout=1)
+        finally:
+            broadcaster.cancel()
+            availability_stream._subscribers.discard(subscriber)
+
+    event, lots = asyncio.run(scenario())
+    assert event == "update"
+    assert [lot["parkingLotID"] for lot in lots] == [1]
+    assert lots[0]["occupiedSpots"] == 3
+
+
+# Test publish is a no-op before the broadcaster has started
+def test_publish_without_broadcaster(monkeypatch):
+    monkeypatch.setattr(availability_stream, "_loop", None)
+    availability_stream.publish(1)
@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import csv
+import io
+import sqlite3
+import pyarrow.parquet as pq
+import data_export
+
+
+def _payments_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""CREATE TABLE payments (paymentID INTEGER PRIMARY KEY AUTOINCREMENT, reservationID INTEGER,
+                    amount REAL NOT NULL, paymentMethod TEXT, paymentStatus TEXT, paymentDate DATETIME NOT NULL)""")
+    conn.executemany(
+        "INSERT INTO payments (reservationID, amount, paymentMethod, paymentStatus, paymentDate) VALUES (?, ?, ?, ?, ?)",
+        [(i, 2.5 * i, "CreditCard", "Completed", f"2025-01-{i:02d}T09:00:00") for i in range(1, 11)],
+    )
+    conn.commit()
+    return conn
+
+# Test CSV and Parquet exports stream in chunks and honour the date range
+def test_export_formats_and_date_range(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_export, "EXPORT_CHUNK_ROWS", 3)
+    _payments_db(str(tmp_path / "parking.db")).close()
+
+    with data_export.snapshot(str(tmp_path / "parking.db")) as conn:
+        chunks = list(data_export.export_table(conn, "payments", "csv", start="2025-01-03", end="2025-01-09"))
+        rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+        parquet = b"".join(data_export.export_table(conn, "payments", "parquet"))
+
+    assert len(chunks) == 2
+    assert [row["reservationID"] for row in rows] == ["3", "4", "5", "6", "7", "8"]
+    parquet_file = pq.ParquetFile(io.BytesIO(parquet))
+    assert parquet_file.metadata.num_row_groups == 4
+    table = parquet_file.read()
+    assert table.column("amount").to_pylist() == [2.5 * i for i in range(1, 11)]
+    assert str(table.schema.field("paymentID").type) == "int64"
+
+# Test an export keeps reading its snapshot while a writer commits
+def test_export_reads_one_snapshot_without_blocking_writers(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_export, "EXPORT_CHUNK_ROWS", 4)
+    writer = _payments_db(str(tmp_path / "parking.db"))
+
+    with data_export.snapshot(str(tmp_path / "parking.db")) as conn:
+        stream = data_export.export_table(conn, "payments", "csv")
+        first = next(stream)
+        writer.execute("INSERT INTO payments (amount, paymentDate) VALUES (1, '2025-01-20T09:00:00')")
+        writer.execute("DELETE FROM payments WHERE paymentID = 9")
+        writer.commit()
+        body = first + b"".join(stream)
+
+    assert len(list(csv.DictReader(io.StringIO(body.decode())))) == 10
+    assert writer.execute("SELECT COUNT(*) FROM payments").fetchone()[0] == 10
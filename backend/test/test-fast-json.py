@@ -0,0 +1,87 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from typing import List
+import pytest
+from pydantic import TypeAdapter
+import fast_json
+import main
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("fast-json") / "parking.db")
+    original = main.DATABASE
+    main.DATABASE = path
+    try:
+        main.init_db()
+    finally:
+        main.DATABASE = original
+
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    now = datetime(2025, 3, 26, 15, 0)
+    for i in range(1, 6):
+        conn.execute(
+            "INSERT INTO users (email, userName, phone, password, userType, status) VALUES (?, ?, ?, ?, ?, ?)",
+            (f"user{i}@stonybrook.edu", f"User {i}", None if i % 2 else "631-555-0100", "x", "Visitor", "approved"),
+        )
+        conn.execute(
+            "INSERT INTO parking_lots (name, location, capacity, evSlots, reserved_slots, campus) VALUES (?, ?, ?, ?, ?, ?)",
+            (f"Lot {i}", f"Lot {i}, West Campus", 100 * i, i, 10 * i, None if i == 1 else "West Campus"),
+        )
+        start = now + timedelta(days=i)
+        conn.execute(
+            "INSERT INTO reservations (parkingLotID, userID, startTime, endTime, price, reservationStatus, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (i, i, start.isoformat(), (start + timedelta(hours=2)).isoformat(), round(2 * i * 1.5, 2), "Completed", now.isoformat()),
+        )
+        conn.execute(
+            "INSERT INTO feedback (userID, date, message, rating, reply, type) VALUES (?, ?, ?, ?, ?, ?)",
+            (i, now.isoformat(), f"Message {i}", None if i == 2 else i, None if i % 2 else "Thanks", "general"),
+        )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _model_path(rows, model):
+    """What FastAPI sends for a response_model: every row validated, then serialized."""
+    adapter = TypeAdapter(List[model])
+    return adapter.dump_python(adapter.validate_python([dict(row) for row in rows]), mode="json")
+
+
+def _assert_same(actual, expected):
+    assert actual == expected
+    # == alone treats 2 and 2.0 as equal
+    for actual_row, expected_row in zip(actual, expected):
+        assert {k: type(v) for k, v in actual_row.items()} == {k: type(v) for k, v in expected_row.items()}
+
+
+ENDPOINTS = [
+    ("/parking/lots", "SELECT * FROM parking_lots", main.ParkingLotOut),
+    ("/user/{user_id}/reservations", "SELECT * FROM reservations", main.ReservationOut),
+    ("/admin/users", "SELECT userID, userName, email, phone, userType, status FROM users", main.UserOut),
+    ("/admin/feedback", "SELECT * FROM feedback", main.FeedbackResponse),
+]
+
+# Test each converted endpoint's fast path sends what its response_model would have
+@pytest.mark.parametrize("endpoint, query, model", ENDPOINTS, ids=[e[0] for e in ENDPOINTS])
+def test_list_response_matches_response_model(db, endpoint, query, model):
+    rows = db.execute(query).fetchall()
+
+    _assert_same(json.loads(fast_json.list_response(rows, model).body), _model_path(rows, model))
+
+# Test the streamed path projects lazily and produces the same array
+@pytest.mark.parametrize("endpoint, query, model", ENDPOINTS, ids=[e[0] for e in ENDPOINTS])
+def test_streamed_list_matches_response_model(db, monkeypatch, endpoint, query, model):
+    monkeypatch.setattr(fast_json, "_STREAM_CHUNK_SIZE", 2)
+    rows = db.execute(query).fetchall()
+
+    projected = fast_json.project(rows, model)
+    assert not isinstance(projected, list)
+    body = b"".join(fast_json._stream_array(projected))
+    _assert_same(json.loads(body), _model_path(rows, model))
@@ -0,0 +1,82 @@
+from fastapi.testclient import TestClient
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sqlite3
+from datetime import datetime, timedelta
+import db_manager
+import forecasting
+import main
+from main import app
+import pytest
+
+client = TestClient(app)
+SEEDED_LOTS = [1, 2, 3]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seeded_db(tmp_path_factory):
+    """A fresh database with three lots and a week of reservations, instead of the local parking.db."""
+    path = str(tmp_path_factory.mktemp("forecast-bulk") / "parking.db")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(main, "DATABASE", path)
+        patch.setattr(db_manager, "DB_PATH", path)
+        patch.setattr(db_manager.DatabaseConnectionPool, "_instance", None)
+        patch.setattr(forecasting, "_arima_models", {})
+        patch.setattr(forecasting, "_forecast_cache", {})
+        patch.setattr(forecasting, "_FORECASTERS", {name: backend() for name, backend in forecasting.FORECASTER_BACKENDS.items()})
+        main.init_db()
+
+        conn = sqlite3.connect(path)
+        start = datetime.now() - timedelta(days=7)
+        for lot_id in SEEDED_LOTS:
+            conn.execute(
+                "INSERT INTO parking_lots (parkingLotID, name, location, capacity, evSlots, reserved_slots, campus) "
+                "VALUES (?, ?, ?, ?, 0, ?, 'West Campus')",
+                (lot_id, f"Lot {lot_id}", f"Lot {lot_id}, West Campus", 50 * lot_id, lot_id),
+            )
+            for hour in range(0, 7 * 24, 3):
+                begin = start + timedelta(hours=hour)
+                conn.execute(
+                    "INSERT INTO reservations (parkingLotID, userID, startTime, endTime, price, reservationStatus, created_at) "
+                    "VALUES (?, 1, ?, ?, 2.0, 'Completed', ?)",
+                    (lot_id, begin.isoformat(), (begin + timedelta(hours=2)).isoformat(), begin.isoformat()),
+                )
+        conn.commit()
+        conn.close()
+        yield path
+        db_manager.DatabaseConnectionPool().close_all()
+
+# Test bulk forecast returns a dense lots x hours matrix
+@pytest.mark.parametrize("hours_ahead", [1, 6, 24])
+def test_bulk_forecast_matrix_shape(hours_ahead):
+    response = client.get("/parking/forecast/bulk", params={
+        "lot_ids": [1, 2, 3],
+        "hours_ahead": hours_ahead
+    })
+
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["lot_ids"] == SEEDED_LOTS
+    assert len(data["timestamps"]) == hours_ahead
+    assert len(data["occupancy_rate"]) == len(data["lot_ids"])
+    for row in data["occupancy_rate"] + data["predicted_available"] + data["congestion_level"]:
+        assert len(row) == hours_ahead
+
+# Test POST variant covering all lots
+def test_bulk_forecast_post():
+    response = client.post("/parking/forecast/bulk", json={"hours_ahead": 3})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["lot_ids"] == SEEDED_LOTS
+    assert data["capacity"] == [50, 100, 150]
+    assert all(len(row) == 3 for row in data["occupancy_rate"])
+
+# Test unknown lots are dropped instead of failing the whole request
+def test_bulk_forecast_unknown_lot():
+    response = client.get("/parking/forecast/bulk", params={"lot_ids": [999999]})
+
+    assert response.status_code == 200
+    assert response.json()["lot_ids"] == []
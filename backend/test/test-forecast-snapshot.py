@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sqlite3
+from datetime import datetime, timedelta
+import forecast_snapshot
+
+
+def _snapshot(generated_at):
+    forecast = [
+        {
+            "timestamp": (generated_at + timedelta(hours=hour)).isoformat(),
+            "occupancy_rate": 0.5 - hour / 100,
+            "predicted_available": hour,
+            "congestion_level": "Moderate",
+        }
+        for hour in range(forecast_snapshot.SNAPSHOT_HORIZON_HOURS)
+    ]
+    return {
+        "generated_at": generated_at,
+        "forecasts": {1: forecast, 2: forecast},
+        "best_times": {1: {"best_time": forecast[-1]["timestamp"]}, 2: {"best_time": forecast[-1]["timestamp"]}},
+        "daily_patterns": {1: {}, 2: {}},
+    }
+
+
+def _use(monkeypatch, snapshot):
+    monkeypatch.setattr(forecast_snapshot, "_current_snapshot", lambda: snapshot)
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE forecast_invalidations (parkingLotID INTEGER PRIMARY KEY, invalidatedAt DATETIME NOT NULL)")
+
+    def write(sql, params=()):
+        conn.execute(sql, params)
+        conn.commit()
+
+    monkeypatch.setattr(forecast_snapshot, "execute_query", lambda sql, params=(): [dict(r) for r in conn.execute(sql, params)])
+    monkeypatch.setattr(forecast_snapshot, "execute_write_query", write)
+    return conn
+
+# Test hours that have passed since the snapshot was built are skipped, and the tail falls back to live
+def test_forecast_skips_elapsed_hours(monkeypatch):
+    generated_at = datetime.now() - timedelta(hours=2, minutes=10)
+    _use(monkeypatch, _snapshot(generated_at))
+
+    forecast = forecast_snapshot.get_forecast(1, 3)
+    assert [entry["predicted_available"] for entry in forecast] == [2, 3, 4]
+    assert forecast_snapshot.get_forecast(1, forecast_snapshot.SNAPSHOT_HORIZON_HOURS) is None
+    assert forecast_snapshot.get_best_time(1, forecast_snapshot.SNAPSHOT_HORIZON_HOURS) is None
+
+    best = forecast_snapshot.get_best_time(1, 6)
+    assert datetime.fromisoformat(best["best_time"]) > datetime.now()
+
+# Test a reservation change stops the lot, and only that lot, being served from older snapshots
+def test_invalidate_lot(monkeypatch):
+    conn = _use(monkeypatch, _snapshot(datetime.now() - timedelta(minutes=1)))
+
+    forecast_snapshot.invalidate(1)
+    assert forecast_snapshot.get_forecast(1, 3) is None
+    assert forecast_snapshot.get_forecast(2, 3) is not None
+    # Stored in the database, so the other workers see it too
+    assert [row[0] for row in conn.execute("SELECT parkingLotID FROM forecast_invalidations")] == [1]
+
+    snapshot = _snapshot(datetime.now())
+    monkeypatch.setattr(forecast_snapshot, "_current_snapshot", lambda: snapshot)
+    assert forecast_snapshot.get_forecast(1, 3) is not None
@@ -0,0 +1,89 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from datetime import datetime
+import numpy as np
+from statsmodels.tsa.arima.model import ARIMA
+import forecasting
+import model_store
+import pytest
+
+# Test the compact ARIMA artifact reproduces statsmodels forecasts
+def test_compact_arima_matches_statsmodels():
+    rng = np.random.default_rng(7)
+    noise = rng.normal(scale=0.05, size=200)
+    series = [0.3]
+    for t in range(1, 200):
+        series.append(0.3 + 0.6 * (series[-1] - 0.3) + noise[t] + 0.3 * noise[t - 1])
+
+    results = ARIMA(series, order=(1, 0, 1)).fit()
+    compact = model_store.CompactArimaModel.from_results(results)
+
+    assert np.allclose(compact.forecast(12), results.forecast(12))
+
+# Test the compact artifact round-trips through its stored form
+def test_compact_arima_round_trip():
+    model = model_store.CompactArimaModel(0.2, [0.5], [0.1], 0.01, [0.4], [0.05], 48)
+    restored = model_store.CompactArimaModel.from_dict(model.to_dict(), fitted_at=model.fitted_at)
+
+    assert np.allclose(model.forecast(6), restored.forecast(6))
+
+# Test the seasonal forecaster blends its profile with current occupancy and updates online
+@pytest.mark.parametrize("delta", [1, -1])
+def test_seasonal_forecaster_observe(delta):
+    forecaster = forecasting.SeasonalForecaster()
+    start = datetime(2025, 3, 26, 15)
+    slot = forecasting._hour_of_week(start)
+    capacities = {1: {"capacity": 10, "reserved_slots": 5}}
+
+    forecaster.profiles[1] = np.full(168, 0.2)
+    forecaster.profile_weeks[1] = np.full(168, start.toordinal() // 7)
+    forecaster.capacities[1] = 10
+    forecaster.fitted_at[1] = datetime.now()
+
+    before = forecaster.forecast([1], start, 3, capacities)
+    forecaster.observe(1, start, delta)
+    after = forecaster.forecast([1], start, 3, capacities)
+
+    assert before.shape == (1, 3)
+    assert np.sign(after[0, 0] - before[0, 0]) == delta
+    assert forecaster.profiles[1][slot] == pytest.approx(0.2 + forecaster.smoothing * delta / 10)
+
+# Test a lot's backend choice is stored, so another worker picks it up on its next sync
+def test_forecast_backend_shared_between_workers(monkeypatch):
+    import sqlite3
+
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE forecast_backends (parkingLotID INTEGER PRIMARY KEY, backend TEXT NOT NULL)")
+
+    def write(sql, params=()):
+        conn.execute(sql, params)
+        conn.commit()
+
+    monkeypatch.setattr(forecasting, "execute_query", lambda sql, params=(): [dict(r) for r in conn.execute(sql, params)])
+    monkeypatch.setattr(forecasting, "execute_write_query", write)
+    monkeypatch.setattr(forecasting, "_env_lot_backends", {})
+    monkeypatch.setattr(forecasting, "_lot_backends", {})
+
+    forecasting.set_forecast_backend(5, "seasonal")
+    assert forecasting.get_forecast_backend(5) == "seasonal"
+
+    # Another worker: its own copy is empty until the sync interval has passed
+    monkeypatch.setattr(forecasting, "_lot_backends", {})
+    monkeypatch.setattr(forecasting, "_last_backend_sync", 0.0)
+    assert forecasting.get_forecast_backend(5) == "seasonal"
+
+    forecasting.set_forecast_backend(5, None)
+    assert forecasting.get_forecast_backend(5) == forecasting.DEFAULT_FORECAST_BACKEND
+    with pytest.raises(ValueError):
+        forecasting.set_forecast_backend(5, "prophet")
+
+# Test a backend must implement fit and forecast
+def test_forecaster_is_abstract():
+    class Incomplete(forecasting.Forecaster):
+        def fit(self, lot_ids, capacities, until=None):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
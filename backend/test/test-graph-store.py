@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import networkx as nx
+import pytest
+import pandas as pd
+import graph_store
+
+# Test the exported graph routes like networkx, keeping the shortest parallel edge
+def test_shared_graph_matches_networkx(tmp_path):
+    graph = nx.MultiGraph()
+    for node, (x, y) in {0: (0.0, 0.0), 10: (1.0, 0.0), 20: (1.0, 1.0), 30: (5.0, 5.0)}.items():
+        graph.add_node(node, x=x, y=y)
+    graph.add_edge(0, 10, length=4.0)
+    graph.add_edge(0, 10, length=1.0)
+    graph.add_edge(10, 20, length=1.0)
+    graph.add_edge(0, 20, length=3.0)
+    lots = pd.DataFrame({"Name": ["LOT 1"], "X": [1.0], "Y": [1.0]}, index=[20])
+
+    graph_store.export_graph(graph, lots, str(tmp_path / "store"))
+    shared = graph_store.SharedGraph(str(tmp_path / "store"))
+
+    path, distance = shared.route(0, 20, "path")
+    assert distance == nx.shortest_path_length(graph, 0, 20, weight="length") == 2.0
+    assert [point["lng"] for point in shared.coords(path)] == [0.0, 1.0, 1.0]
+    assert shared.routes(0, [20, 30], "nearest")[30] is None
+    assert shared.nearest_node(0.9, 0.1) == 10
+    assert shared.lots.loc[20, "Name"] == "LOT 1"
+
+
+# Test unknown nodes raise NodeNotFound instead of routing from a neighbouring position
+def test_shared_graph_unknown_node(tmp_path):
+    graph = nx.MultiGraph()
+    for node, x in {0: 0.0, 10: 1.0}.items():
+        graph.add_node(node, x=x, y=0.0)
+    graph.add_edge(0, 10, length=1.0)
+    lots = pd.DataFrame({"Name": ["LOT 1"], "X": [1.0], "Y": [0.0]}, index=[10])
+
+    graph_store.export_graph(graph, lots, str(tmp_path / "store"))
+    shared = graph_store.SharedGraph(str(tmp_path / "store"))
+
+    for start, end in ((5, 10), (0, 5), (0, 99), (-1, 10)):
+        with pytest.raises(nx.NodeNotFound):
+            shared.route(start, end, "path")
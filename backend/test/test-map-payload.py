@@ -0,0 +1,20 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import map_payload
+
+# Test gzip is only chosen when Accept-Encoding gives it (or "*") a non-zero q-value
+def test_accepts_gzip():
+    assert map_payload.accepts_gzip("gzip, deflate, br")
+    assert map_payload.accepts_gzip("br;q=1.0, GZIP;q=0.5")
+    assert map_payload.accepts_gzip("*")
+    assert map_payload.accepts_gzip("x-gzip")
+
+    assert not map_payload.accepts_gzip("")
+    assert not map_payload.accepts_gzip("identity")
+    assert not map_payload.accepts_gzip("gzip;q=0")
+    assert not map_payload.accepts_gzip("gzip;q=0.000, deflate")
+    assert not map_payload.accepts_gzip("*;q=1, gzip;q=0")
+    assert not map_payload.accepts_gzip("*;q=0")
+    assert not map_payload.accepts_gzip("gzip;q=abc")
+    assert not map_payload.accepts_gzip("notgzip, gzipped")
@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json
+import metrics
+
+# Test statement fingerprints drop literals and collapse IN lists
+def test_fingerprint():
+    sql = """SELECT * FROM reservations
+             WHERE parkingLotID IN (?, ?, ?) AND reservationStatus = 'Completed' LIMIT 10"""
+
+    assert metrics.fingerprint(sql) == (
+        "SELECT * FROM reservations WHERE parkingLotID IN (?...) AND reservationStatus = ? LIMIT ?"
+    )
+
+# Test histograms render cumulative buckets and merge with other workers' files
+def test_histogram_merges_worker_files(tmp_path, monkeypatch):
+    histogram = metrics.Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1))
+    monkeypatch.setattr(metrics, "_METRICS", [histogram])
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    other_worker = {"test_seconds": [[["/a"], [1, 0, 0.02, 1]], [["/b"], [0, 0, 3.0, 1]]]}
+    (tmp_path / "metrics-1.json").write_text(json.dumps(other_worker))
+
+    lines = metrics.render().splitlines()
+
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{route="/a",le="1"} 3' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{route="/a"} 3' in lines
+    assert 'test_seconds_bucket{route="/b",le="1"} 0' in lines
+    assert 'test_seconds_count{route="/b"} 1' in lines
+
+# Test /metrics is only served to the scrape token or an admin
+def test_metrics_requires_scrape_token_or_admin(monkeypatch):
+    from fastapi.testclient import TestClient
+    import auth
+    import main
+    import token_service
+
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "scrape-secret")
+    monkeypatch.setattr(auth, "is_admin", lambda user_id: user_id == 1)
+    monkeypatch.setattr(auth, "is_revoked", lambda user_id, issued_at: False)
+
+    def bearer(user_id):
+        claims = {"sub": f"user{user_id}@stonybrook.edu", "user_id": user_id, "role": "user", "iat": 0}
+        return {"Authorization": f"Bearer {token_service.create_access_token(claims)}"}
+
+    client = TestClient(main.app)
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers=bearer(2)).status_code == 403
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    assert client.get("/metrics", headers=bearer(1)).status_code == 200
+
+# Test files left by dead workers are skipped and a worker's own file is removed on shutdown
+def test_dead_worker_files_are_skipped(tmp_path, monkeypatch):
+    counter = metrics.Counter("test_total", "Test.", ("route",))
+    monkeypatch.setattr(metrics, "_METRICS", [counter])
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "_pid_alive", lambda pid: pid == 1)
+
+    (tmp_path / "metrics-1.json").write_text(json.dumps({"test_total": [[["/a"], [2]]]}))
+    (tmp_path / "metrics-2.json").write_text(json.dumps({"test_total": [[["/a"], [5]]]}))
+    assert 'test_total{route="/a"} 2' in metrics.render().splitlines()
+
+    metrics.flush()
+    assert (tmp_path / f"metrics-{os.getpid()}.json").exists()
+    metrics.remove_worker_file()
+    assert not (tmp_path / f"metrics-{os.getpid()}.json").exists()
@@ -0,0 +1,37 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sqlite3
+import pytest
+from fastapi import HTTPException
+import pagination
+
+# Test pages follow the keyset order without gaps or repeats when sort values tie
+def test_keyset_pages_cover_rows_once():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE feedback (feedbackID INTEGER PRIMARY KEY, date TEXT)")
+    conn.executemany("INSERT INTO feedback (date) VALUES (?)", [(f"2025-01-{1 + i // 4:02d}",) for i in range(30)])
+    keyset = pagination.Keyset("date", "feedbackID")
+
+    seen, cursor = [], None
+    while True:
+        after, params = keyset.after(cursor)
+        rows = conn.execute(
+            f"SELECT * FROM feedback WHERE {after} ORDER BY {keyset.order_by()} LIMIT ?", (*params, 7)
+        ).fetchall()
+        seen.extend(row["feedbackID"] for row in rows)
+        if len(rows) < 7:
+            break
+        cursor = keyset.cursor_for(rows[-1])
+
+    expected = [row[0] for row in conn.execute("SELECT feedbackID FROM feedback ORDER BY date DESC, feedbackID DESC")]
+    assert seen == expected
+
+# Test malformed cursors are rejected with 400
+def test_invalid_cursor():
+    keyset = pagination.Keyset("date", "feedbackID")
+    for cursor in ("not base64!", pagination.encode_cursor([1])):
+        with pytest.raises(HTTPException) as error:
+            keyset.after(cursor)
+        assert error.value.status_code == 400
@@ -0,0 +1,26 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
+import profiler
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+# Test the sampler attributes samples to the busy thread's stack and skips idle threads
+def test_sampler_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        stacks, samples = profiler.profile(0.3, interval=0.001)
+    finally:
+        stop.set()
+        worker.join()
+
+    lines = stacks.splitlines()
+    assert samples > 0
+    assert any(line.startswith("busy;") and "_busy_loop (test/test-profiler.py:" in line for line in lines)
+    assert not any("profile (backend/profiler.py:" in line for line in lines)
@@ -0,0 +1,24 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sqlite3
+import db_manager
+
+# Test statements over the threshold are logged with parameter types, rows and query plan
+def test_slow_query_log(monkeypatch):
+    monkeypatch.setattr(db_manager, "SLOW_QUERY_MS", 1e-9)
+    monkeypatch.setattr(db_manager, "_slow_queries", {})
+    conn = sqlite3.connect(":memory:", factory=db_manager.TimedConnection)
+    conn.execute("CREATE TABLE reservations (reservationID INTEGER PRIMARY KEY, parkingLotID INTEGER)")
+    conn.executemany("INSERT INTO reservations (parkingLotID) VALUES (?)", [(i % 3,) for i in range(30)])
+
+    rows = conn.execute("SELECT * FROM reservations WHERE parkingLotID = ?", (1,)).fetchall()
+
+    stats = db_manager.slow_query_stats(limit=10)
+    select = next(s for s in stats["statements"] if s["statement"].startswith("SELECT"))
+    assert select["statement"] == "SELECT * FROM reservations WHERE parkingLotID = ?"
+    assert select["last"]["params"] == "(int)"
+    assert select["last"]["rows"] == len(rows) == 10
+    assert "SCAN reservations" in select["plan"]
+    insert = next(s for s in stats["statements"] if s["statement"].startswith("INSERT"))
+    assert insert["last"]["params"] == "many x (int)"
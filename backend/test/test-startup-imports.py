@@ -0,0 +1,16 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ("osmnx", "geopandas", "shapely", "networkx", "statsmodels", "sklearn", "scipy", "pandas")
+
+# Test importing the app leaves the geo and statistics stacks for first use
+def test_main_defers_heavy_imports(tmp_path):
+    code = f"import sys, main; print('loaded=' + ','.join(m for m in {DEFERRED!r} if m in sys.modules))"
+    env = dict(os.environ, DATABASE=str(tmp_path / "parking.db"))
+    completed = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                               capture_output=True, text=True, check=True)
+
+    assert completed.stdout.splitlines()[-1] == "loaded="
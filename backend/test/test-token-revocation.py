@@ -0,0 +1,24 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+import auth
+import token_service
+
+# Test a revocation still blocks refresh tokens issued before it after access tokens would have expired
+def test_revocation_outlives_refresh_tokens(monkeypatch):
+    stored = {}
+    monkeypatch.setattr(auth, "execute_write_query", lambda sql, params: stored.__setitem__(params[0], params[1]))
+    monkeypatch.setattr(auth, "execute_query", lambda sql, params: [
+        {"userID": user_id, "revokedAt": revoked_at} for user_id, revoked_at in stored.items() if revoked_at > params[0]
+    ])
+    monkeypatch.setattr(auth, "_revoked_at", {})
+    monkeypatch.setattr(auth, "_last_revocation_sync", 0.0)
+
+    issued_at = time.time() - 1
+    auth.revoke_user(7)
+    monkeypatch.setattr(auth.time, "time", lambda: issued_at + 2 * 86400)
+
+    assert token_service.MAX_TOKEN_LIFETIME >= token_service.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+    assert auth.is_revoked(7, issued_at)
+    assert not auth.is_revoked(7, issued_at + 86400)
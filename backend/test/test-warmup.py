@@ -0,0 +1,32 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import threading
+import warmup
+
+
+def _fail():
+    raise RuntimeError("no network")
+
+# Test readiness waits for every component and reports failures as degraded
+def test_readiness_follows_components(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(warmup, "COMPONENTS", [("fast", lambda: None), ("slow", release.wait), ("broken", _fail)])
+
+    async def scenario():
+        task = asyncio.create_task(warmup.run())
+        while warmup.state()[1]["components"].get("broken", {}).get("status") != "failed":
+            await asyncio.sleep(0.01)
+        during = warmup.state()
+        release.set()
+        await task
+        return during, warmup.state()
+
+    (ready_during, during), (ready_after, after) = asyncio.run(scenario())
+
+    assert not ready_during and during["status"] == "warming"
+    assert during["components"]["slow"]["status"] == "running"
+    assert ready_after and after["status"] == "degraded"
+    assert after["components"]["fast"]["status"] == "ready"
+    assert after["components"]["broken"]["error"] == "no network"
@@ -0,0 +1,517 @@
+"""Reproducible load benchmark for the backend.
+
+Seeds a temporary SQLite database (lots named after the polygons in
+polygon.parquet, approved user accounts, a few weeks of reservation history),
+starts the app against it and drives a weighted scenario mix at a fixed
+concurrency. The report is JSON with p50/p95/p99 latency, throughput and an
+error breakdown per scenario, and can be compared against a stored baseline.
+
+    # in-process (ASGI transport, no sockets)
+    python tests_reservation/load_benchmark.py --requests 2000 -c 32 --output before.json
+
+    # local uvicorn, compared against the earlier run
+    python tests_reservation/load_benchmark.py --mode uvicorn --workers 2 --duration 30 \\
+        --baseline before.json --fail-on-regression
+
+    # an already running server (no seeding; log in with an existing account)
+    python tests_reservation/load_benchmark.py --url http://localhost:8000 \\
+        --email test@dev.com --password test1234 --mix live_status=5,forecast=2
+
+The path and nearest scenarios build the road graph from OpenStreetMap on
+first use and fail without network access; drop them with ``--mix``.
+
+Every scenario is sent with its virtual user's bearer token. The seeded app
+runs with admission control off, so the report measures the endpoints rather
+than the rate limiter (``--admission`` keeps it on), and timing starts only
+once ``/readyz`` reports the warm-up finished.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import tabulate as tabulate_module
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_MIX = {
+    "login": 1,
+    "booking": 3,
+    "path": 1,
+    "nearest": 1,
+    "forecast": 2,
+    "live_status": 4,
+}
+SEED_PASSWORD = "loadtest123"
+CAMPUSES = ["West Campus", "East Campus", "South P", "Research and Development Park"]
+
+# Campus bounding box used for random start points
+_LAT_RANGE = (40.900, 40.920)
+_LNG_RANGE = (-73.135, -73.110)
+
+
+# ---------------------- Seeding ---------------------- #
+def _polygon_lot_names() -> List[str]:
+    import pandas as pd
+
+    names = pd.read_parquet(BACKEND_DIR / "polygon.parquet", columns=["Name"])["Name"]
+    lot_names = []
+    for name in names.dropna().unique():
+        # "LOT 3" -> "Lot 3" so pathfinder's name matching finds the polygon
+        lot_names.append(name.title() if name.upper().startswith("LOT ") else name)
+    return lot_names
+
+
+def seed_database(db_path: str, users: int = 50, history_days: int = 28, seed: int = 416) -> Dict:
+    """Create a fresh database at db_path; returns what was seeded."""
+    os.environ["DATABASE"] = db_path
+    sys.path.insert(0, str(BACKEND_DIR))
+    import credentials
+    import main
+
+    if main.DATABASE != db_path:
+        raise RuntimeError("main was imported before DATABASE was set; run the seeding first")
+
+    rng = random.Random(seed)
+    main.init_db()
+
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+
+    lots = []
+    for i, name in enumerate(_polygon_lot_names()):
+        campus = CAMPUSES[i % len(CAMPUSES)]
+        capacity = rng.choice([150, 250, 400, 600])
+        lots.append((name, f"{i + 1} Circle Road, {campus}", capacity, rng.randint(0, 12), 0, campus))
+    c.executemany(
+        "INSERT INTO parking_lots (name, location, capacity, evSlots, reserved_slots, campus) VALUES (?, ?, ?, ?, ?, ?)",
+        lots,
+    )
+    lot_ids = [row[0] for row in c.execute("SELECT parkingLotID FROM parking_lots ORDER BY parkingLotID")]
+
+    # One hash shared by every account; bcrypt would otherwise dominate seeding
+    hashed_password = credentials.pwd_context.hash(SEED_PASSWORD)
+    c.executemany(
+        "INSERT INTO users (email, userName, password, userType, status) VALUES (?, ?, ?, ?, ?)",
+        [(f"load{i}@stonybrook.edu", f"Load User {i}", hashed_password, "Visitor", "approved")
+         for i in range(users)],
+    )
+    user_ids = [row[0] for row in c.execute("SELECT userID FROM users WHERE email LIKE 'load%' ORDER BY userID")]
+
+    history = []
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    for day in range(history_days, 0, -1):
+        for lot_id in lot_ids:
+            for _ in range(rng.randint(2, 10)):
+                start = now - timedelta(days=day, hours=-rng.randint(7, 19))
+                hours = rng.randint(1, 4)
+                history.append((
+                    lot_id, rng.choice(user_ids), start.isoformat(),
+                    (start + timedelta(hours=hours)).isoformat(), 2.0 * hours,
+                    "Completed", (start - timedelta(days=1)).isoformat(),
+                ))
+    c.executemany(
+        """INSERT INTO reservations
+           (parkingLotID, userID, startTime, endTime, price, reservationStatus, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        history,
+    )
+    conn.commit()
+    conn.close()
+
+    return {
+        "lots": len(lot_ids),
+        "users": len(user_ids),
+        "reservations": len(history),
+        "lot_ids": lot_ids,
+        "accounts": [f"load{i}@stonybrook.edu" for i in range(users)],
+    }
+
+
+# ---------------------- Statistics ---------------------- #
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear interpolation between closest ranks."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+
+    def record(self, scenario: str, latency_ms: float, error: Optional[str] = None) -> None:
+        self.latencies.setdefault(scenario, []).append(latency_ms)
+        errors = self.errors.setdefault(scenario, {})
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict:
+        scenarios = {}
+        for scenario in sorted(self.latencies):
+            values = sorted(self.latencies[scenario])
+            failed = sum(self.errors[scenario].values())
+            scenarios[scenario] = {
+                "requests": len(values),
+                "ok": len(values) - failed,
+                "errors": dict(sorted(self.errors[scenario].items())),
+                "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+                "latency_ms": {
+                    "mean": round(sum(values) / len(values), 2),
+                    "p50": round(percentile(values, 50), 2),
+                    "p95": round(percentile(values, 95), 2),
+                    "p99": round(percentile(values, 99), 2),
+                    "max": round(values[-1], 2),
+                },
+            }
+
+        all_values = sorted(v for values in self.latencies.values() for v in values)
+        total_errors = sum(sum(errors.values()) for errors in self.errors.values())
+        total = {
+            "requests": len(all_values),
+            "ok": len(all_values) - total_errors,
+            "errors": total_errors,
+            "throughput_rps": round(len(all_values) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(all_values, 50), 2),
+                "p95": round(percentile(all_values, 95), 2),
+                "p99": round(percentile(all_values, 99), 2),
+            },
+        }
+        return {"elapsed_s": round(elapsed, 3), "total": total, "scenarios": scenarios}
+
+
+# ---------------------- Scenarios ---------------------- #
+class Session:
+    """A logged-in virtual user."""
+
+    def __init__(self, email: str, password: str, user_id: int, token: str):
+        self.email = email
+        self.password = password
+        self.user_id = user_id
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+
+async def _timed(recorder: Recorder, scenario: str, request) -> Optional[httpx.Response]:
+    started = time.perf_counter()
+    try:
+        response = await request
+    except Exception as e:
+        recorder.record(scenario, (time.perf_counter() - started) * 1000, type(e).__name__)
+        return None
+    error = None if response.status_code < 400 else f"HTTP {response.status_code}"
+    recorder.record(scenario, (time.perf_counter() - started) * 1000, error)
+    return response
+
+
+async def run_scenario(name: str, client: httpx.AsyncClient, session: Session,
+                       lot_ids: List[int], rng: random.Random, recorder: Recorder) -> None:
+    if name == "login":
+        await _timed(recorder, name, client.post(
+            "/user/login", json={"email": session.email, "password": session.password}
+        ))
+    elif name == "booking":
+        start = datetime.now() + timedelta(days=rng.randint(4, 30), hours=rng.randint(0, 12))
+        response = await _timed(recorder, name, client.post("/reservation", headers=session.headers, json={
+            "userID": session.user_id,
+            "parkingLotID": rng.choice(lot_ids),
+            "startTime": start.isoformat(),
+            "endTime": (start + timedelta(hours=rng.randint(1, 4))).isoformat(),
+        }))
+        # Cancel again so lots don't fill up over a long run
+        if response is not None and response.status_code == 200:
+            reservation_id = response.json()["reservationID"]
+            await _timed(recorder, "booking_cancel", client.delete(
+                f"/reservation/{reservation_id}", headers=session.headers
+            ))
+    elif name == "path":
+        await _timed(recorder, name, client.get("/parking/path", headers=session.headers, params={
+            "start_lat": rng.uniform(*_LAT_RANGE),
+            "start_lng": rng.uniform(*_LNG_RANGE),
+            "end_id": rng.choice(lot_ids),
+        }))
+    elif name == "nearest":
+        await _timed(recorder, name, client.get("/parking/nearest", headers=session.headers, params={
+            "start_lat": rng.uniform(*_LAT_RANGE),
+            "start_lng": rng.uniform(*_LNG_RANGE),
+            "limit": 5,
+        }))
+    elif name == "forecast":
+        await _timed(recorder, name, client.get(
+            f"/parking/forecast/{rng.choice(lot_ids)}", headers=session.headers, params={"hours_ahead": 12}
+        ))
+    elif name == "live_status":
+        await _timed(recorder, name, client.get("/parking/live-status", headers=session.headers))
+    else:
+        raise ValueError(f"Unknown scenario: {name}")
+
+
+async def _login(client: httpx.AsyncClient, email: str, password: str) -> Session:
+    response = await client.post("/token", data={"username": email, "password": password})
+    if response.status_code != 200:
+        raise RuntimeError(f"Setup login for {email} failed: HTTP {response.status_code} {response.text}")
+    data = response.json()
+    return Session(email, password, data["userID"], data["access_token"])
+
+
+async def run_load(client: httpx.AsyncClient, accounts: List[Tuple[str, str]], lot_ids: List[int],
+                   mix: Dict[str, float], concurrency: int, requests: Optional[int],
+                   duration: Optional[float], seed: int) -> Dict:
+    # Logins during setup are not measured
+    sessions = []
+    for email, password in accounts[:concurrency]:
+        sessions.append(await _login(client, email, password))
+
+    if not lot_ids:
+        lots = (await client.get("/parking/lots")).json()
+        lot_ids = [lot["parkingLotID"] for lot in lots]
+
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    recorder = Recorder()
+    remaining = [requests]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def take() -> bool:
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        if remaining[0] is not None:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+        return True
+
+    async def worker(index: int):
+        rng = random.Random(seed * 1000 + index)
+        session = sessions[index % len(sessions)]
+        while take():
+            name = rng.choices(names, weights)[0]
+            await run_scenario(name, client, session, lot_ids, rng, recorder)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return recorder.summary(time.perf_counter() - started)
+
+
+# ---------------------- Targets ---------------------- #
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_ready(client: httpx.AsyncClient, timeout: float, process: Optional[subprocess.Popen] = None,
+                            workers: int = 1) -> None:
+    """Poll /readyz until the warm-up is done, so model fitting and graph loading are not timed."""
+    deadline = time.monotonic() + timeout
+    # Each worker warms up on its own; consecutive 200s make it likely they all have
+    ready_streak = 0
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            response = await client.get("/readyz")
+        except httpx.TransportError:
+            response = None
+        # Servers from before /readyz existed answer 404
+        if response is not None and response.status_code != 503:
+            ready_streak += 1
+            if ready_streak >= workers:
+                return
+            continue
+        ready_streak = 0
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server not ready after {timeout:.0f}s")
+
+
+async def benchmark(args, mix: Dict[str, float]) -> Dict:
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    meta = {
+        "mode": "url" if args.url else args.mode,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "duration_s": args.duration,
+        "seed": args.seed,
+        "mix": mix,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started_at": datetime.now().isoformat(),
+    }
+
+    if args.url:
+        accounts = [(args.email, args.password)]
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+            await _wait_until_ready(client, args.ready_timeout)
+            results = await run_load(client, accounts, [], mix, args.concurrency,
+                                     args.requests, args.duration, args.seed)
+        return {"meta": meta, **results}
+
+    meta["admission_control"] = args.admission
+    if not args.admission:
+        # Read when main is imported, by the seeding below or the uvicorn workers
+        os.environ["ADMISSION_CONTROL_ENABLED"] = "0"
+
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as tmp:
+        db_path = os.path.join(tmp, "parking.db")
+        seeded = seed_database(db_path, users=max(args.concurrency, 1), seed=args.seed)
+        meta["seeded"] = {key: seeded[key] for key in ("lots", "users", "reservations")}
+        accounts = [(email, SEED_PASSWORD) for email in seeded["accounts"]]
+
+        if args.mode == "inprocess":
+            import main
+
+            transport = httpx.ASGITransport(app=main.app)
+            async with main.app.router.lifespan_context(main.app):
+                async with httpx.AsyncClient(transport=transport, base_url="http://loadtest",
+                                             timeout=timeout, limits=limits) as client:
+                    await _wait_until_ready(client, args.ready_timeout)
+                    results = await run_load(client, accounts, seeded["lot_ids"], mix, args.concurrency,
+                                             args.requests, args.duration, args.seed)
+            return {"meta": meta, **results}
+
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        meta["workers"] = args.workers
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=dict(os.environ, DATABASE=db_path),
+            stdout=None if args.verbose else subprocess.DEVNULL,
+        )
+        try:
+            async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+                await _wait_until_ready(client, args.ready_timeout, process, args.workers)
+                results = await run_load(client, accounts, seeded["lot_ids"], mix, args.concurrency,
+                                         args.requests, args.duration, args.seed)
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        return {"meta": meta, **results}
+
+
+# ---------------------- Reporting ---------------------- #
+def compare(report: Dict, baseline: Dict, threshold_pct: float) -> Tuple[List[List], bool]:
+    """Rows comparing p95 latency and throughput; flags changes worse than threshold_pct."""
+    rows = []
+    regressed = False
+    for scenario, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if previous is None:
+            rows.append([scenario, None, current["latency_ms"]["p95"], None, None, current["throughput_rps"], None, "new"])
+            continue
+
+        p95_before, p95_now = previous["latency_ms"]["p95"], current["latency_ms"]["p95"]
+        rps_before, rps_now = previous["throughput_rps"], current["throughput_rps"]
+        p95_change = (p95_now - p95_before) / p95_before * 100 if p95_before else 0.0
+        rps_change = (rps_now - rps_before) / rps_before * 100 if rps_before else 0.0
+        verdict = "ok"
+        if p95_change > threshold_pct or rps_change < -threshold_pct:
+            verdict = "REGRESSION"
+            regressed = True
+        elif p95_change < -threshold_pct or rps_change > threshold_pct:
+            verdict = "improved"
+        rows.append([scenario, p95_before, p95_now, round(p95_change, 1),
+                     rps_before, rps_now, round(rps_change, 1), verdict])
+    return rows, regressed
+
+
+def print_report(report: Dict) -> None:
+    rows = []
+    for scenario, stats in report["scenarios"].items():
+        latency = stats["latency_ms"]
+        errors = ", ".join(f"{key}: {count}" for key, count in stats["errors"].items()) or "-"
+        rows.append([scenario, stats["requests"], stats["throughput_rps"], latency["mean"],
+                     latency["p50"], latency["p95"], latency["p99"], latency["max"], errors])
+    print(tabulate_module.tabulate(rows, headers=[
+        "Scenario", "Requests", "RPS", "Mean (ms)", "p50", "p95", "p99", "Max", "Errors"
+    ]))
+    total = report["total"]
+    print(f"\nTotal: {total['requests']} requests, {total['errors']} errors, "
+          f"{total['throughput_rps']} req/s over {report['elapsed_s']}s")
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}', expected one of {list(DEFAULT_MIX)}")
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark against a seeded local database")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess",
+                        help="Run the app in this process or on a local uvicorn")
+    parser.add_argument("--url", help="Benchmark an already running server instead (no seeding)")
+    parser.add_argument("--email", default="test@dev.com", help="Account used with --url")
+    parser.add_argument("--password", default="test1234", help="Password used with --url")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="Concurrent virtual users")
+    parser.add_argument("-n", "--requests", type=int, help="Total scenarios to run (default 1000)")
+    parser.add_argument("-d", "--duration", type=float, help="Run for this many seconds instead")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Scenario weights, e.g. login=1,booking=3,live_status=4")
+    parser.add_argument("--seed", type=int, default=416, help="Seed for data and request randomness")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--ready-timeout", type=float, default=600,
+                        help="Seconds to wait for /readyz before giving up")
+    parser.add_argument("--admission", action="store_true",
+                        help="Keep admission control on for the seeded app (rate limits count as errors)")
+    parser.add_argument("-o", "--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Compare against an earlier JSON report")
+    parser.add_argument("--threshold", type=float, default=10,
+                        help="Percent change in p95 or throughput counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if any scenario regressed against the baseline")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show server output")
+    args = parser.parse_args()
+
+    if args.requests is None and args.duration is None:
+        args.requests = 1000
+
+    report = asyncio.run(benchmark(args, args.mix))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows, regressed = compare(report, baseline, args.threshold)
+        print("\nCompared with", args.baseline)
+        print(tabulate_module.tabulate(rows, headers=[
+            "Scenario", "p95 before", "p95 now", "p95 %", "RPS before", "RPS now", "RPS %", "Verdict"
+        ]))
+        if regressed and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,14 @@ import random
 import time
 import aiohttp
 import json
+import os
 from datetime import datetime, timedelta
 import statistics
 import sys
 import asyncio.exceptions
 
 NUM_USERS = 1000
-BASE_URL = "https://p4sbu-yu75.onrender.com"
+BASE_URL = os.environ.get("LOADTEST_URL", "http://localhost:8000")
 USER_ID = 6
 PARKING_LOT_IDS = [1, 2, 3, 4, 5]
 
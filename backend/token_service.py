@@ -0,0 +1,156 @@
+"""Signing and verification of access and refresh tokens.
+
+Keys are loaded once per process. JWT_ALGORITHM selects HS256 (shared
+secret, the default) or an asymmetric mode, ES256 or EdDSA, in which tokens
+are signed with JWT_PRIVATE_KEY_FILE and anyone holding the public key from
+/.well-known/jwks.json can verify them without calling the backend.
+Asymmetric modes need the ``cryptography`` package (``pip install
+pyjwt[crypto]``).
+
+Clients trade a refresh token for a new access token at /token/refresh.
+Refresh tokens are single-use: each carries a ``jti`` that is spent on
+refresh, and a new refresh token is issued alongside the access token.
+Verified access tokens are cached by hash until they expire so repeat
+requests skip the signature check.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+import jwt
+
+JWT_ALGORITHM = os.environ.get("JWT_ALGORITHM", "HS256")
+SECRET_KEY = os.environ.get("SECRET_KEY", "SECRET")
+PRIVATE_KEY_FILE = os.environ.get("JWT_PRIVATE_KEY_FILE")
+PUBLIC_KEY_FILE = os.environ.get("JWT_PUBLIC_KEY_FILE")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", 7))
+# Longest any token stays valid, so a revocation must be remembered at least this long
+MAX_TOKEN_LIFETIME = max(ACCESS_TOKEN_EXPIRE_MINUTES * 60, REFRESH_TOKEN_EXPIRE_DAYS * 86400)  # seconds
+
+ASYMMETRIC_ALGORITHMS = ("ES256", "EdDSA")
+TOKEN_TYPE_ACCESS = "access"
+TOKEN_TYPE_REFRESH = "refresh"
+
+_VERIFY_CACHE_SIZE = 10000
+
+_keys = None
+_keys_lock = threading.Lock()
+_verified: Dict[str, Dict[str, Any]] = {}
+_verified_lock = threading.Lock()
+
+
+def _read_key(path: Optional[str], name: str) -> bytes:
+    if not path:
+        raise RuntimeError(f"{name} must be set when JWT_ALGORITHM is {JWT_ALGORITHM}")
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _load_keys():
+    """Return (signing key, verification key), loading them on first use."""
+    global _keys
+
+    if _keys is not None:
+        return _keys
+    with _keys_lock:
+        if _keys is None:
+            if JWT_ALGORITHM in ASYMMETRIC_ALGORITHMS:
+                from cryptography.hazmat.primitives import serialization
+
+                private_key = serialization.load_pem_private_key(
+                    _read_key(PRIVATE_KEY_FILE, "JWT_PRIVATE_KEY_FILE"), password=None
+                )
+                if PUBLIC_KEY_FILE:
+                    public_key = serialization.load_pem_public_key(
+                        _read_key(PUBLIC_KEY_FILE, "JWT_PUBLIC_KEY_FILE")
+                    )
+                else:
+                    public_key = private_key.public_key()
+                _keys = (private_key, public_key)
+            else:
+                _keys = (SECRET_KEY, SECRET_KEY)
+    return _keys
+
+
+def _encode(claims: Dict[str, Any], token_type: str, expires_delta: timedelta) -> str:
+    signing_key, _ = _load_keys()
+    to_encode = dict(claims)
+    to_encode.update({"type": token_type, "exp": datetime.now(timezone.utc) + expires_delta})
+    return jwt.encode(to_encode, signing_key, algorithm=JWT_ALGORITHM)
+
+
+def create_access_token(claims: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+    return _encode(
+        claims, TOKEN_TYPE_ACCESS, expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
+
+def create_refresh_token(claims: Dict[str, Any]) -> str:
+    refresh_claims = {
+        "sub": claims["sub"],
+        "user_id": claims["user_id"],
+        "iat": claims.get("iat", time.time()),
+        "jti": uuid.uuid4().hex,
+    }
+    return _encode(refresh_claims, TOKEN_TYPE_REFRESH, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+
+
+def _decode(token: str) -> Dict[str, Any]:
+    _, verification_key = _load_keys()
+    return jwt.decode(token, verification_key, algorithms=[JWT_ALGORITHM])
+
+
+def _cache_verified(token_hash: str, payload: Dict[str, Any]) -> None:
+    with _verified_lock:
+        if len(_verified) >= _VERIFY_CACHE_SIZE:
+            now = time.time()
+            for key in [k for k, p in _verified.items() if p["exp"] <= now]:
+                del _verified[key]
+            if len(_verified) >= _VERIFY_CACHE_SIZE:
+                _verified.clear()
+        _verified[token_hash] = payload
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """Verify an access token, raising jwt.PyJWTError if it is invalid or expired."""
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    payload = _verified.get(token_hash)
+    if payload is not None:
+        if payload["exp"] > time.time():
+            return payload
+        with _verified_lock:
+            _verified.pop(token_hash, None)
+        raise jwt.ExpiredSignatureError("Signature has expired")
+
+    payload = _decode(token)
+    # Tokens issued before the type claim existed are access tokens
+    if payload.get("type", TOKEN_TYPE_ACCESS) != TOKEN_TYPE_ACCESS:
+        raise jwt.InvalidTokenError("Not an access token")
+    if "exp" in payload:
+        _cache_verified(token_hash, payload)
+    return payload
+
+
+def decode_refresh_token(token: str) -> Dict[str, Any]:
+    payload = _decode(token)
+    if payload.get("type") != TOKEN_TYPE_REFRESH:
+        raise jwt.InvalidTokenError("Not a refresh token")
+    return payload
+
+
+def public_jwks() -> Dict[str, Any]:
+    """Public verification keys as a JWK set; empty for the shared-secret mode."""
+    if JWT_ALGORITHM not in ASYMMETRIC_ALGORITHMS:
+        return {"keys": []}
+
+    _, public_key = _load_keys()
+    algorithm = jwt.get_algorithm_by_name(JWT_ALGORITHM)
+    jwk = json.loads(algorithm.to_jwk(public_key))
+    jwk.update({"alg": JWT_ALGORITHM, "use": "sig"})
+    return {"keys": [jwk]}
@@ -0,0 +1,150 @@
+"""Startup warm-up and readiness.
+
+Without a warm-up the first path request after boot loads the polygons,
+downloads and builds the road graph and wires lots into it, and the first
+forecast fits ARIMA models. ``run`` does that work right after startup
+instead, one thread per component so they overlap:
+
+- ``graph``: the road graph (or, with GRAPH_STORE_DIR, the shared arrays),
+- ``lot_index``: lots matched to their polygons for /parking/map,
+- ``forecast_models``: stored ARIMA models loaded, missing ones fitted, and
+  the seasonal profiles built. Fitting holds a lock shared by every worker
+  and the snapshot job, so the first to get it fits and stores the models
+  and the rest only load them,
+- ``live_status``: the live-status snapshot,
+- ``imports``: the remaining modules main defers importing.
+
+``/healthz`` answers as soon as the process serves requests (liveness).
+``/readyz`` returns 503 with per-component progress until every component
+has finished, so a load balancer only routes to warm workers. A component
+that fails or runs past WARMUP_TIMEOUT does not hold readiness back: its
+work is retried on first use as before, and it is reported as such.
+"""
+import asyncio
+import importlib
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "1") == "1"
+WARMUP_TIMEOUT = float(os.environ.get("WARMUP_TIMEOUT", 300))  # seconds
+
+# Geo and statistics stacks, several seconds of imports between them
+DEFERRED_MODULES = ("pathfinder", "map_payload", "reservation_handler", "statsmodels.tsa.arima.model")
+
+_started_at = time.time()
+_state: Dict[str, Dict] = {}
+_lock = threading.Lock()
+
+
+def import_deferred_modules() -> None:
+    for name in DEFERRED_MODULES:
+        importlib.import_module(name)
+
+
+def _warm_graph() -> None:
+    import graph_store
+    import pathfinder
+
+    if graph_store.GRAPH_STORE_DIR:
+        router = pathfinder._get_router()
+        # Fault the mapped pages in now rather than during the first search
+        router.matrix.data.sum()
+        router.matrix.indices.sum()
+    else:
+        pathfinder._load_road_graph()
+
+
+def _warm_lot_index() -> None:
+    import map_payload
+
+    map_payload.get_static_payload()
+
+
+def _warm_forecast_models() -> None:
+    import forecasting
+
+    forecasting.get_bulk_forecast(hours_ahead=1)
+    forecasting.get_bulk_forecast(hours_ahead=1, backend=forecasting.FAST_FORECAST_BACKEND)
+
+
+def _warm_live_status() -> None:
+    import live_status
+
+    live_status.get_snapshot()
+
+
+COMPONENTS: List[Tuple[str, Callable[[], None]]] = [
+    ("graph", _warm_graph),
+    ("lot_index", _warm_lot_index),
+    ("forecast_models", _warm_forecast_models),
+    ("live_status", _warm_live_status),
+    ("imports", import_deferred_modules),
+]
+
+
+def _set(name: str, **fields) -> None:
+    with _lock:
+        _state.setdefault(name, {"status": "pending"}).update(fields)
+
+
+def _run_component(name: str, func: Callable[[], None]) -> None:
+    started = time.perf_counter()
+    _set(name, status="running", startedAt=time.time())
+    try:
+        func()
+    except Exception as e:
+        print(f"Warm-up of {name} failed: {e}")
+        _set(name, status="failed", error=str(e), durationMs=round((time.perf_counter() - started) * 1000, 1))
+        return
+    duration = time.perf_counter() - started
+    print(f"Warmed up {name} in {duration:.2f}s")
+    _set(name, status="ready", durationMs=round(duration * 1000, 1))
+
+
+def reset() -> None:
+    with _lock:
+        _state.clear()
+        for name, _ in COMPONENTS:
+            _state[name] = {"status": "pending"}
+
+
+def skip() -> None:
+    """Mark every component ready without warming it, when WARMUP_ENABLED=0."""
+    with _lock:
+        for name, _ in COMPONENTS:
+            _state[name] = {"status": "skipped"}
+
+
+async def run() -> None:
+    reset()
+    await asyncio.gather(*(asyncio.to_thread(_run_component, name, func) for name, func in COMPONENTS))
+
+
+def _is_done(component: Dict, now: float) -> bool:
+    if component["status"] in ("ready", "failed", "skipped"):
+        return True
+    return component["status"] == "running" and now - component["startedAt"] > WARMUP_TIMEOUT
+
+
+def state() -> Tuple[bool, Dict]:
+    """Whether the worker is ready, and the per-component progress behind it."""
+    now = time.time()
+    with _lock:
+        components = {name: dict(component) for name, component in _state.items()}
+
+    ready = bool(components) and all(_is_done(component, now) for component in components.values())
+    for component in components.values():
+        started_at = component.pop("startedAt", None)
+        if component["status"] == "running":
+            component["elapsedMs"] = round((now - started_at) * 1000, 1)
+            if now - started_at > WARMUP_TIMEOUT:
+                component["timedOut"] = True
+
+    degraded = any(c["status"] == "failed" or c.get("timedOut") for c in components.values())
+    return ready, {
+        "status": ("degraded" if degraded else "ready") if ready else "warming",
+        "uptimeSeconds": round(now - _started_at, 1),
+        "components": components,
+    }
@@ -7,6 +7,7 @@ import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@
 import { Badge } from "@/components/ui/badge"
 import { Textarea } from "@/components/ui/textarea"
 import { useToast } from "@/components/ui/use-toast"
+import { fetchAllPages } from "@/lib/utils"
 import { Skeleton } from "@/components/ui/skeleton"
 import { StarFilledIcon, StarIcon } from "@radix-ui/react-icons"
 import { ChevronLeft, ChevronRight, Send } from "lucide-react"
@@ -68,18 +69,12 @@ export default function AdminFeedbackPage() {
         throw new Error("Authentication token not found. Please log in again.")
       }
 
-      const response = await fetch("https://p4sbu-yu75.onrender.com/admin/feedback", {
+      const data = await fetchAllPages<Feedback>("https://p4sbu-yu75.onrender.com/admin/feedback", {
         headers: {
           Authorization: `Bearer ${token}`,
         },
       })
 
-      if (!response.ok) {
-        throw new Error(`Failed to fetch feedback: ${response.status}`)
-      }
-
-      const data = await response.json()
-
       // Sort by date (newest first)
       const sortedData = [...data].sort((a, b) => new Date(b.date).getTime() - new Date(a.date).getTime())
 
@@ -12,6 +12,7 @@ import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@
 import { Skeleton } from "@/components/ui/skeleton"
 import { ChevronLeft, ChevronRight, Pencil } from "lucide-react"
 import { useToast } from "@/components/ui/use-toast"
+import { fetchAllPages } from "@/lib/utils"
 import {
   Dialog,
   DialogContent,
@@ -106,13 +107,7 @@ export default function UserManagementPage() {
     setError(null)
 
     try {
-      const response = await fetch("https://p4sbu-yu75.onrender.com/admin/users")
-
-      if (!response.ok) {
-        throw new Error(`Error fetching users: ${response.status}`)
-      }
-
-      const data = await response.json()
+      const data = await fetchAllPages<User>("https://p4sbu-yu75.onrender.com/admin/users")
       setUsers(data)
     } catch (err) {
       console.error("Failed to fetch users:", err)
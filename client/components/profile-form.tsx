@@ -7,6 +7,7 @@ import { Input } from "@/components/ui/input"
 import { Skeleton } from "@/components/ui/skeleton"
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs"
 import { Badge } from "@/components/ui/badge"
+import { fetchAllPages } from "@/lib/utils"
 import { StarFilledIcon, StarIcon } from "@radix-ui/react-icons"
 
 interface UserProfile {
@@ -62,17 +63,11 @@ export default function ProfilePage() {
         setProfile(profileData)
 
         // Fetch user feedback data
-        const feedbackResponse = await fetch(`https://p4sbu-yu75.onrender.com/user/${userId}/feedback`, {
+        const feedbackData = await fetchAllPages<UserFeedback>(`https://p4sbu-yu75.onrender.com/user/${userId}/feedback`, {
           headers: {
             Authorization: `Bearer ${token}`,
           },
         })
-
-        if (!feedbackResponse.ok) {
-          throw new Error("Failed to fetch feedback data")
-        }
-
-        const feedbackData = await feedbackResponse.json()
         setFeedbackList(feedbackData)
       } catch (err) {
         setError(err instanceof Error ? err.message : "Failed to load profile data")
@@ -4,3 +4,23 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs))
 }
+
+// List endpoints return one page at a time and the cursor for the next one
+// in the X-Next-Cursor header; follow it until the last page
+export async function fetchAllPages<T>(url: string, init?: RequestInit): Promise<T[]> {
+  const items: T[] = []
+  let cursor: string | null = null
+  do {
+    const pageUrl = new URL(url)
+    pageUrl.searchParams.set("limit", "1000")
+    if (cursor) pageUrl.searchParams.set("cursor", cursor)
+
+    const response = await fetch(pageUrl.toString(), init)
+    if (!response.ok) {
+      throw new Error(`Error fetching ${pageUrl.pathname}: ${response.status}`)
+    }
+    items.push(...(await response.json()))
+    cursor = response.headers.get("X-Next-Cursor")
+  } while (cursor)
+  return items
+}